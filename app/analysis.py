@@ -0,0 +1,170 @@
+import hashlib, os, threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from .matcher import _trigrams, normalize_token
+from .metrics import timed
+from .utils import bullet_density
+
+ANALYSIS_VERSION = 2
+CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))
+SECTION_HINTS = ("experience", "education", "skills", "projects")
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+
+
+class ResumeAnalysis:
+    """One resume text, pre-processed once for every scorer that reads it.
+
+    Holds the lowercased text, the ``matcher.tokenize`` tokens with the line
+    each came from, and line start offsets. Hard matching, ATS keyword coverage
+    and evidence snippets all go through ``locate``, which is memoized per
+    skill; the fuzzy pass scores only windows around tokens that share
+    trigrams with the skill instead of the whole document.
+    """
+
+    def __init__(self, text: str, tokens: List[str], token_lines: List[int], line_starts: List[int],
+                 bullets: float, sha: str):
+        self.text = text
+        self.lower = text.lower()
+        self.tokens = tokens
+        self.token_lines = token_lines
+        self.line_starts = line_starts
+        self.bullet_density = bullets
+        self.sha = sha
+        self.has_sections = any(h in self.lower for h in SECTION_HINTS)
+        self._lines: Optional[List[str]] = None
+        self._located: Dict[str, Optional[int]] = {}
+        self._vocab = None
+
+    @classmethod
+    def build(cls, text: str) -> "ResumeAnalysis":
+        tokens, token_lines, line_starts = [], [], []
+        offset = 0
+        for i, line in enumerate(text.lower().splitlines(keepends=True)):
+            line_starts.append(offset)
+            offset += len(line)
+            for w in normalize_token(line).split():
+                t = w.rstrip(".")
+                if t:
+                    tokens.append(t)
+                    token_lines.append(i)
+        return cls(text, tokens, token_lines, line_starts, bullet_density(text), _sha(text))
+
+    def to_dict(self) -> Dict:
+        return {"v": ANALYSIS_VERSION, "sha": self.sha, "tokens": self.tokens, "token_lines": self.token_lines,
+                "line_starts": self.line_starts, "bullet_density": self.bullet_density}
+
+    @classmethod
+    def from_dict(cls, text: str, data: Optional[Dict]) -> Optional["ResumeAnalysis"]:
+        if not is_current(text, data):
+            return None
+        return cls(text, data["tokens"], data["token_lines"], data["line_starts"], data["bullet_density"], data["sha"])
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    def locate(self, skill: str) -> Optional[int]:
+        # line of the first substring occurrence of ``skill``, or None
+        if skill not in self._located:
+            pos = self.lower.find(skill) if skill else -1
+            self._located[skill] = bisect_right(self.line_starts, pos) - 1 if pos >= 0 else None
+        return self._located[skill]
+
+    def snippet(self, line: int) -> str:
+        return "\n".join(self.lines[max(0, line - 1):min(len(self.lines), line + 2)])
+
+    def _vocab_index(self):
+        # unique tokens -> positions, plus trigram postings over the vocabulary
+        if self._vocab is None:
+            positions: Dict[str, List[int]] = {}
+            for i, t in enumerate(self.tokens):
+                positions.setdefault(t, []).append(i)
+            vocab = list(positions)
+            postings: Dict[str, List[int]] = {}
+            counts = np.zeros(len(vocab), dtype=np.int32)
+            for i, t in enumerate(vocab):
+                grams = _trigrams(t)
+                counts[i] = len(grams)
+                for g in grams:
+                    postings.setdefault(g, []).append(i)
+            self._vocab = (vocab, [positions[t] for t in vocab], counts,
+                           {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()})
+        return self._vocab
+
+    def fuzzy_scores(self, skills: Iterable[str], cutoff: float, max_n: int,
+                     scorer=fuzz.partial_ratio, min_overlap: float = 0.5) -> Dict[str, float]:
+        # best score per skill over the n-grams (n <= max_n) that contain a token
+        # sharing most of its trigrams with the skill
+        vocab, positions, counts, postings = self._vocab_index()
+        tokens = self.tokens
+        best: Dict[str, float] = {}
+        for skill in skills:
+            s = normalize_token(skill)
+            s_grams = _trigrams(s)
+            hits = [postings[g] for g in s_grams if g in postings]
+            if not hits:
+                continue
+            shared = np.bincount(np.concatenate(hits), minlength=len(vocab))
+            need = np.maximum(np.ceil(min_overlap * np.minimum(counts, len(s_grams))), 1)
+            seen = set()
+            top = 0.0
+            for v in np.nonzero(shared >= need)[0]:
+                for p in positions[v]:
+                    for n in range(1, max_n + 1):
+                        for i in range(max(0, p - n + 1), min(p, len(tokens) - n) + 1):
+                            g = " ".join(tokens[i:i + n])
+                            if g in seen:
+                                continue
+                            seen.add(g)
+                            score = scorer(s, g, score_cutoff=cutoff)
+                            if score > top:
+                                top = score
+            if top:
+                best[s] = float(top)
+        return best
+
+
+def is_current(text: str, data: Optional[Dict]) -> bool:
+    # False when a stored analysis is missing, outdated or for another text
+    return bool(data) and data.get("v") == ANALYSIS_VERSION and data.get("sha") == _sha(text)
+
+
+_cache: "OrderedDict[str, ResumeAnalysis]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@timed("analysis.analyze")
+def analyze(text: str, stored: Optional[Dict] = None) -> ResumeAnalysis:
+    """Analysis for ``text``: from the LRU, else the persisted dict, else built."""
+    key = _sha(text)
+    with _cache_lock:
+        a = _cache.get(key)
+        if a is not None:
+            _cache.move_to_end(key)
+            return a
+    a = ResumeAnalysis.from_dict(text, stored) or ResumeAnalysis.build(text)
+    with _cache_lock:
+        _cache[key] = a
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return a
+
+
+def resume_analyses(raw_text: str, anonymized_text: str) -> Dict:
+    # what Resume.analysis stores: one entry per text variant scoring can use
+    return {"raw": ResumeAnalysis.build(raw_text).to_dict(),
+            "anonymized": ResumeAnalysis.build(anonymized_text).to_dict()}
+
+
+def variant(bias_anonymize: bool) -> str:
+    return "anonymized" if bias_anonymize else "raw"
@@ -0,0 +1,168 @@
+import hashlib, os, re, threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# PII kinds that get masked; "person" spans come from spaCy NER and are only
+# looked for when ANONYMIZE_NER=1
+POLICY = tuple(k.strip() for k in os.getenv("ANONYMIZE_POLICY", "email,phone,name,person").split(",") if k.strip())
+ANONYMIZE_NER = os.getenv("ANONYMIZE_NER", "0") == "1"
+NER_BATCH = int(os.getenv("ANONYMIZE_NER_BATCH", "16"))
+NER_CACHE_SIZE = int(os.getenv("ANONYMIZE_NER_CACHE", "1024"))
+# bump when the patterns change: stored spans from an older version are rescanned
+VERSION = 3
+
+MASKS = {"email": "[EMAIL]", "phone": "[PHONE]", "name": "[NAME]", "person": "[NAME]"}
+
+# Every pattern starts with a lookbehind that only lets a match begin at the
+# start of a token, so a long run of candidate characters is tried once, not
+# once per character, and every repetition is unambiguous: the scan is linear
+# even on 100 KB digit tables or "aaaa...". One alternation, one pass.
+_EMAIL = (r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@"
+          r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?![A-Za-z0-9-])")
+# optional +country code, then 10-15 digits with single space / dot / dash
+# separators, the first 1-5 optionally in parentheses (an area code; the
+# total is checked in _phone_end); never across lines
+_PHONE = (r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?"
+          r"(?:\(\d{1,5}\)[ .-]?\d(?:[ .-]?\d){5,13}|\d(?:[ .-]?\d){9,14})(?!\d)")
+_NAME = r"(?<![A-Za-z])(?i:name)[ \t]*:[ \t]*(?P<name>[^\n]+)"
+PII_RE = re.compile(f"(?P<email>{_EMAIL})|(?P<phone>{_PHONE})|{_NAME}")
+_DIGITS = re.compile(r"\d+")
+
+Span = List  # [start, end, kind]
+
+
+def _is_year(g: str) -> bool:
+    return len(g) == 4 and g[:2] in ("19", "20")
+
+
+def _phone_end(s: str) -> int:
+    """Length of the phone number the candidate ``s`` starts with; 0 if it isn't one."""
+    digits = _DIGITS.findall(s)
+    cc = 1 if s.startswith("+") else 0  # the country code doesn't count toward 10-15
+    n, national = len(digits), 0
+    for i in range(cc, len(digits)):
+        # a year after a complete number is the next column ("9876543210 2019")
+        if national >= 10 and _is_year(digits[i]):
+            n = i
+            break
+        national += len(digits[i])
+    cut, digits = n < len(digits), digits[:n]
+    if "(" in s and not 10 <= sum(len(g) for g in digits[cc:]) <= 15:
+        return 0
+    # "2019 2020 2021" and similar year rows in education tables
+    if len(digits) > 1 and all(_is_year(g) for g in digits):
+        return 0
+    # runs of 1-2 digit numbers are marks and scores ("85 90 78 92 88 76")
+    if all(len(g) <= 2 for g in digits):
+        return 0
+    # single-digit groups after the first are scores or list numbering, not phones
+    if any(len(g) == 1 for g in digits[1:]):
+        return 0
+    return list(_DIGITS.finditer(s))[n - 1].end() if cut else len(s)
+
+
+def find_spans(text: str) -> List[Span]:
+    spans = []
+    for m in PII_RE.finditer(text):
+        if m.group("email") is not None:
+            spans.append([m.start(), m.end(), "email"])
+        elif m.group("phone") is not None:
+            end = _phone_end(m.group())
+            if end:
+                spans.append([m.start(), m.start() + end, "phone"])
+        else:
+            s, e = m.span("name")
+            spans.append([s, e, "name"])
+    return spans
+
+
+_ner_cache: "OrderedDict[str, List[Span]]" = OrderedDict()
+_ner_lock = threading.Lock()
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+
+
+def ner_spans(texts: List[str]) -> List[List[Span]]:
+    """PERSON spans per text; cache misses go through ``nlp.pipe`` in batches
+    with every pipe but NER (and what it listens to) disabled."""
+    keys = [_sha(t) for t in texts]
+    out: List[Optional[List[Span]]] = [None] * len(texts)
+    with _ner_lock:
+        for i, k in enumerate(keys):
+            if k in _ner_cache:
+                _ner_cache.move_to_end(k)
+                out[i] = _ner_cache[k]
+    todo = [i for i, v in enumerate(out) if v is None]
+    if todo:
+        from .nlp import nlp  # spaCy only loads when NER redaction is actually used
+        model = nlp.get()
+        disable = [p for p in model.pipe_names if p not in ("ner", "tok2vec")]
+        docs = model.pipe((texts[i] for i in todo), batch_size=NER_BATCH, disable=disable)
+        for i, doc in zip(todo, docs):
+            out[i] = [[e.start_char, e.end_char, "person"] for e in doc.ents if e.label_ == "PERSON"]
+        with _ner_lock:
+            for i in todo:
+                _ner_cache[keys[i]] = out[i]
+                if len(_ner_cache) > NER_CACHE_SIZE:
+                    _ner_cache.popitem(last=False)
+    return out
+
+
+def scan_many(texts: List[str], ner: bool = ANONYMIZE_NER) -> List[Dict]:
+    """The stored PII record per text: every span found, whatever the policy."""
+    found = [find_spans(t) for t in texts]
+    if ner and texts:
+        for spans, person in zip(found, ner_spans(texts)):
+            spans.extend(person)
+            spans.sort()
+    return [{"version": VERSION, "sha": _sha(t), "ner": ner, "spans": s} for t, s in zip(texts, found)]
+
+
+def is_current(text: str, record: Optional[Dict], ner: bool = ANONYMIZE_NER) -> bool:
+    return bool(record) and record.get("version") == VERSION and record.get("sha") == _sha(text) \
+        and (record.get("ner") or not ner)
+
+
+def redact(text: str, spans: Iterable[Span], policy: Iterable[str] = POLICY) -> Tuple[str, Dict[str, int]]:
+    kinds = set(policy)
+    parts, counts, pos = [], {}, 0
+    for s, e, kind in sorted(sp for sp in spans if sp[2] in kinds):
+        if e <= pos:
+            continue  # inside a span already masked (a PERSON inside a "Name:" line)
+        s = max(s, pos)
+        parts.append(text[pos:s])
+        parts.append(MASKS[kind])
+        counts[kind + "s"] = counts.get(kind + "s", 0) + 1
+        pos = e
+    parts.append(text[pos:])
+    return "".join(parts), counts
+
+
+def anonymize_many(texts: List[str], policy: Iterable[str] = POLICY,
+                   ner: bool = ANONYMIZE_NER) -> List[Tuple[str, Dict]]:
+    """(anonymized text, PII record) per text; the record's spans let a later
+    policy change re-mask without rescanning."""
+    policy = tuple(policy)
+    records = scan_many(texts, ner=ner and "person" in policy)
+    out = []
+    for text, rec in zip(texts, records):
+        anon, counts = redact(text, rec["spans"], policy)
+        out.append((anon, {**rec, "policy": list(policy), "counts": counts}))
+    return out
+
+
+def anonymize(text: str, policy: Iterable[str] = POLICY, ner: bool = ANONYMIZE_NER) -> Tuple[str, Dict]:
+    return anonymize_many([text], policy, ner)[0]
+
+
+def reapply(text: str, record: Optional[Dict], policy: Iterable[str] = POLICY) -> Tuple[str, Dict]:
+    """Re-mask under ``policy`` from the stored spans; scans only when the
+    record is missing, stale, or lacks NER spans the policy now needs."""
+    policy = tuple(policy)
+    ner = ANONYMIZE_NER and "person" in policy
+    if not is_current(text, record, ner):
+        return anonymize(text, policy, ner)
+    anon, counts = redact(text, record["spans"], policy)
+    return anon, {**record, "policy": list(policy), "counts": counts}
@@ -0,0 +1,57 @@
+import hashlib, os, tempfile, threading
+from typing import Tuple
+
+CHUNK = 1024 * 1024
+MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_stats = {kind: {"uploads": 0, "file_hits": 0, "text_hits": 0} for kind in ("resume", "jd")}
+
+def text_fingerprint(text: str) -> str:
+    # case/whitespace-insensitive: the same resume re-exported still dedups
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8", "ignore")).hexdigest()
+
+def store_upload(src, dest_dir: str, filename: str) -> Tuple[str, str, int]:
+    """Stream ``src`` to ``dest_dir/<sha256><ext>`` and return (path, sha256, size).
+
+    The bytes go to a temp file in chunks while being hashed, then are renamed
+    to their content address; if that file already exists the copy is dropped.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                buf = src.read(CHUNK)
+                if not buf:
+                    break
+                size += len(buf)
+                if size > MAX_FILE_BYTES:
+                    raise ValueError(f"file larger than {MAX_FILE_BYTES} bytes")
+                h.update(buf)
+                out.write(buf)
+        sha = h.hexdigest()
+        path = os.path.join(dest_dir, sha + os.path.splitext(filename or "")[1].lower())
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            os.replace(tmp, path)
+        return path, sha, size
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def count(kind: str, event: str = "uploads"):
+    with _lock:
+        _stats[kind][event] += 1
+
+def stats() -> dict:
+    with _lock:
+        out = {}
+        for kind, s in _stats.items():
+            hits = s["file_hits"] + s["text_hits"]
+            out[kind] = {**s, "hit_rate": hits / s["uploads"] if s["uploads"] else 0.0}
+        return out
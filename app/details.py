@@ -0,0 +1,68 @@
+import json, os, zlib
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import Evaluation, EvaluationDetail
+
+try:  # zstandard is optional; zlib is always there
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# the part of an evaluation nobody ranks or filters by: evidence snippets, the
+# full hard-match and ATS reports, feedback text. Stored compressed in
+# evaluation_details and read only by GET /evaluate/{id}/details and POST /evaluate/
+DETAIL_FIELDS = ("hard_match", "soft_match", "feedback", "explainability", "ats_report")
+DETAILS_CODEC = os.getenv("DETAILS_CODEC", "zstd" if zstandard else "zlib")
+
+
+def pack(fields: Dict) -> Tuple[str, bytes, int]:
+    raw = json.dumps({k: fields.get(k) for k in DETAIL_FIELDS}, separators=(",", ":")).encode("utf-8")
+    if DETAILS_CODEC == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=6).compress(raw), len(raw)
+    return "zlib", zlib.compress(raw, 6), len(raw)
+
+
+def unpack(codec: str, blob: bytes) -> Dict:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("evaluation details are zstd-compressed: pip install zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        raw = zlib.decompress(blob)
+    return json.loads(raw)
+
+
+def split(record: Dict) -> Tuple[Dict, Dict]:
+    # (evaluations row, detail payload)
+    return ({k: v for k, v in record.items() if k not in DETAIL_FIELDS},
+            {k: record[k] for k in DETAIL_FIELDS if k in record})
+
+
+def store(db, ids: List[int], payloads: List[Dict]):
+    rows = []
+    for ev_id, fields in zip(ids, payloads):
+        codec, blob, size = pack(fields)
+        rows.append(dict(evaluation_id=ev_id, codec=codec, payload=blob, raw_bytes=size))
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(EvaluationDetail)
+        db.execute(ins.on_conflict_do_update(index_elements=["evaluation_id"],
+                                             set_={c: ins.excluded[c] for c in ("codec", "payload", "raw_bytes")}), rows)
+    else:
+        for row in rows:
+            db.merge(EvaluationDetail(**row))
+
+
+def load(db, ev: Evaluation) -> Optional[Tuple[str, Dict]]:
+    """(source, payload): the stored detail row ("stored"), or the inline JSON
+    of rows written before the split ("legacy")."""
+    d = db.execute(select(EvaluationDetail.codec, EvaluationDetail.payload)
+                   .where(EvaluationDetail.evaluation_id == ev.id)).first()
+    if d is not None:
+        return "stored", unpack(d.codec, d.payload)
+    if ev.hard_match is not None:
+        return "legacy", {k: getattr(ev, k) for k in DETAIL_FIELDS}
+    return None
@@ -0,0 +1,162 @@
+import json, os
+from abc import ABC, abstractmethod
+from typing import Dict, List
+import numpy as np
+from .vectors import EMBED_DIM
+
+# torch: sentence-transformers on PyTorch (the reference)
+# onnx / onnx-int8: ONNX Runtime over a local export, fp32 or dynamically
+# quantized; needs `pip install onnxruntime tokenizers` and a one-off
+#     python -m app.embedders export
+# (which itself needs torch, so run it on a build machine, not the CPU node)
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", os.path.join("data", "onnx", EMBED_MODEL.replace("/", "_")))
+# intra-op threads per process; 0 leaves the library default (all cores), which
+# oversubscribes once several workers share a node
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model_int8.onnx"}
+
+
+def _finish(vecs: np.ndarray, dim: int) -> np.ndarray:
+    # keep the first ``dim`` components and renormalize, so cosine stays a dot product.
+    # MiniLM isn't trained for truncation: check bench_embedders before lowering EMBED_DIM
+    vecs = np.asarray(vecs, dtype=np.float32)
+    if dim and vecs.shape[1] > dim:
+        vecs = vecs[:, :dim]
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-12)
+
+
+class Embedder(ABC):
+    """Texts in, unit-normalized float32 rows of width ``dim`` out."""
+
+    backend = ""
+
+    def __init__(self, dim: int = EMBED_DIM):
+        self.dim = dim
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        ...
+
+
+class TorchEmbedder(Embedder):
+    backend = "torch"
+
+    def __init__(self, dim: int = EMBED_DIM, threads: int = EMBED_THREADS):
+        super().__init__(dim)
+        # importing sentence_transformers pulls in torch: only when this backend is used
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(EMBED_MODEL, device="cpu")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return _finish(self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True), self.dim)
+
+
+class OnnxEmbedder(Embedder):
+    """The exported transformer under ONNX Runtime, with the tokenizer and
+    pooling of the sentence-transformers pipeline done outside torch."""
+
+    def __init__(self, backend: str = "onnx", dim: int = EMBED_DIM, threads: int = EMBED_THREADS,
+                 model_dir: str = EMBED_ONNX_DIR):
+        super().__init__(dim)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        self.backend = backend
+        path = os.path.join(model_dir, ONNX_FILES[backend])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} missing: run `python -m app.embedders export --out {model_dir}`")
+        with open(os.path.join(model_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.meta["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.meta.get("pad_id", 0))
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        enc = self.tokenizer.encode_batch(texts)
+        feeds = {"input_ids": np.array([e.ids for e in enc], dtype=np.int64),
+                 "attention_mask": np.array([e.attention_mask for e in enc], dtype=np.int64),
+                 "token_type_ids": np.array([e.type_ids for e in enc], dtype=np.int64)}
+        hidden = self.session.run(["last_hidden_state"], {k: v for k, v in feeds.items() if k in self.inputs})[0]
+        if self.meta.get("pooling") == "cls":
+            return hidden[:, 0]
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        # length-sorted batches: padding to the longest text in a batch is most of the waste
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = np.empty((len(texts), self.meta["dim"]), dtype=np.float32)
+        for s in range(0, len(order), batch_size):
+            idx = order[s:s + batch_size]
+            out[idx] = self._run([texts[i] for i in idx])
+        return _finish(out, self.dim)
+
+
+def load(backend: str = EMBED_BACKEND, **kw) -> Embedder:
+    if backend == "torch":
+        return TorchEmbedder(**kw)
+    if backend in ONNX_FILES:
+        return OnnxEmbedder(backend, **kw)
+    raise ValueError(f"unknown EMBED_BACKEND {backend!r}: torch, {', '.join(ONNX_FILES)}")
+
+
+def describe() -> Dict:
+    return {"backend": EMBED_BACKEND, "model": EMBED_MODEL, "dim": EMBED_DIM, "threads": EMBED_THREADS}
+
+
+def export(out_dir: str = EMBED_ONNX_DIR, int8: bool = True, opset: int = 14) -> Dict[str, str]:
+    """Export EMBED_MODEL's transformer to ONNX (plus an int8 copy) with its
+    tokenizer and pooling settings; needs torch and onnxruntime."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    st = SentenceTransformer(EMBED_MODEL, device="cpu")
+    hf, tok = st[0].auto_model.eval(), st.tokenizer
+    os.makedirs(out_dir, exist_ok=True)
+    tok.save_pretrained(out_dir)  # tokenizer.json, read by the `tokenizers` package at runtime
+    pooling = st[1].get_pooling_mode_str() if len(st) > 1 and hasattr(st[1], "get_pooling_mode_str") else "mean"
+    if pooling not in ("mean", "cls"):
+        raise ValueError(f"pooling {pooling!r} is not supported by OnnxEmbedder")
+    sample = tok(["export sample text"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+    paths = {"onnx": os.path.join(out_dir, ONNX_FILES["onnx"])}
+    with torch.no_grad():
+        torch.onnx.export(hf, tuple(sample[n] for n in names), paths["onnx"], input_names=names,
+                          output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=opset)
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        paths["onnx-int8"] = os.path.join(out_dir, ONNX_FILES["onnx-int8"])
+        quantize_dynamic(paths["onnx"], paths["onnx-int8"], weight_type=QuantType.QInt8)
+    meta = {"model": EMBED_MODEL, "max_seq_length": st.max_seq_length, "dim": st.get_sentence_embedding_dimension(),
+            "pooling": pooling, "pad_id": tok.pad_token_id or 0}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    for name, path in paths.items():
+        print(f"✅ Exported {name}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="embedding backends")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="export EMBED_MODEL to ONNX fp32 + int8")
+    ex.add_argument("--out", default=EMBED_ONNX_DIR)
+    ex.add_argument("--no-int8", action="store_true")
+    ex.add_argument("--opset", type=int, default=14)
+    a = ap.parse_args()
+    export(a.out, not a.no_int8, a.opset)
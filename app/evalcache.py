@@ -0,0 +1,130 @@
+import asyncio, hashlib, json, os, threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import null, select
+from sqlalchemy.dialects import postgresql, sqlite
+from . import details
+from .models import Evaluation
+from .ontology import get_ontology
+from .scoring import SCORER_VERSION
+
+# serialized EvaluationOut per cache key, in front of the evaluations table
+EVAL_CACHE_SIZE = int(os.getenv("EVAL_CACHE_SIZE", "1024"))
+# one stored evaluation per pair and flag; the row is updated in place on a rescore
+PAIR = ("resume_id", "jd_id", "bias_anonymized")
+
+_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "db_hits": 0, "computed": 0, "coalesced": 0}
+
+
+def eval_key(resume_id: int, jd_id: int, text: str, jd_text: str, must: Optional[List[str]],
+             good: Optional[List[str]], anonymize: bool) -> str:
+    """Everything an evaluation depends on: the scored resume text, the JD text
+    and skill lists, the flag, the scorer and the ontology version. The ids
+    keep two resumes with the same text from sharing a cached response."""
+    h = hashlib.sha256()
+    for part in (f"{resume_id}:{jd_id}", text or "", jd_text or "", json.dumps([must or [], good or []]),
+                 str(int(anonymize)), SCORER_VERSION, get_ontology().version):
+        h.update(part.encode("utf-8", "ignore"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def count(event: str):
+    with _lock:
+        _stats[event] += 1
+
+
+def get(key: str) -> Optional[Dict]:
+    with _lock:
+        out = _cache.get(key)
+        if out is not None:
+            _cache.move_to_end(key)
+        _stats["hits" if out is not None else "misses"] += 1
+        return out
+
+
+def put(key: str, out: Dict):
+    with _lock:
+        _cache[key] = out
+        _cache.move_to_end(key)
+        while len(_cache) > EVAL_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def stats() -> Dict:
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {**_stats, "size": len(_cache), "max_size": EVAL_CACHE_SIZE, "inflight": len(flight._inflight),
+                "hit_rate": _stats["hits"] / total if total else 0.0}
+
+
+def upsert(db, records: List[Dict]) -> List[int]:
+    """Insert or update evaluations by (resume, JD, flag); ids in record order.
+    Detail fields in the records go to evaluation_details."""
+    if not records:
+        return []
+    now = datetime.utcnow()
+    parts = [details.split(r) for r in records]
+    records = [{**hot, "created_at": now} for hot, _ in parts]
+    ids = _upsert_rows(db, records)
+    details.store(db, ids, [d for _, d in parts])
+    return ids
+
+
+def _upsert_rows(db, records: List[Dict]) -> List[int]:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(Evaluation)
+        # a legacy row's inline payload is superseded by the detail row written next
+        stmt = ins.on_conflict_do_update(index_elements=list(PAIR),
+                                         set_={**{c: null() for c in details.DETAIL_FIELDS},
+                                               **{c: ins.excluded[c] for c in records[0] if c not in PAIR}})
+        return list(db.scalars(stmt.returning(Evaluation.id, sort_by_parameter_order=True), records).all())
+    ids = []
+    for r in records:
+        ev = db.scalars(select(Evaluation).where(*(getattr(Evaluation, c) == r[c] for c in PAIR))).first()
+        if ev is None:
+            ev = Evaluation(**r)
+            db.add(ev)
+        else:
+            for c, v in r.items():
+                setattr(ev, c, v)
+        db.flush()
+        ids.append(ev.id)
+    return ids
+
+
+class SingleFlight:
+    """Concurrent calls for the same key share one execution (per process; the
+    unique pair index settles races between processes)."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        fut = self._inflight.get(key)
+        if fut is not None:
+            count("coalesced")
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        # a failure nobody else waited for must not be logged as "never retrieved"
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = fut
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+        fut.set_result(result)
+        return result
+
+
+flight = SingleFlight()
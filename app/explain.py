@@ -1,16 +1,14 @@
 from typing import Dict, List
+from .metrics import timed
 
-def evidence_cards(resume_text: str, skills: List[str]) -> List[Dict]:
+@timed("explain.evidence_cards")
+def evidence_cards(analysis, skills: List[str]) -> List[Dict]:
+    # analysis: a ResumeAnalysis; the first line mentioning the skill plus one line either side
     cards = []
-    lower = resume_text.lower()
-    lines = resume_text.splitlines()
     for s in skills:
-        indices = [i for i,l in enumerate(lines) if s in l.lower()]
-        snippet = ""
-        if indices:
-            i = indices[0]
-            snippet = "\n".join(lines[max(0,i-1):min(len(lines), i+2)])
-        cards.append({"skill": s, "found": bool(indices), "snippet": snippet})
+        line = analysis.locate(s)
+        snippet = analysis.snippet(line) if line is not None else ""
+        cards.append({"skill": s, "found": line is not None, "snippet": snippet})
     return cards
 
 def shap_like(weights: Dict, components: Dict) -> List[Dict]:
@@ -1,4 +1,5 @@
 from typing import Dict, List
+from .metrics import timed
 
 CAREER_TIPS = {
     "fresher": [
@@ -19,6 +20,7 @@ CAREER_TIPS = {
     ]
 }
 
+@timed("feedback.generate")
 def generate_feedback(career_stage: str, missing_skills: List[str], ats_report: Dict) -> str:
     tips = CAREER_TIPS.get(career_stage, CAREER_TIPS["junior"])
     gaps = ""
@@ -0,0 +1,249 @@
+import os, queue, threading, time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, or_, select, update
+from . import dedup
+from .analysis import resume_analyses
+from .anonymize import NER_BATCH, anonymize_many
+from .db import SessionLocal
+from .dedup import text_fingerprint
+from .matrix import maintainer
+from .metrics import record, timed
+from .models import IngestItem, IngestJob, Resume
+from .nlp import classify_career_stage
+from .semantic import embed_many
+from .tasks import parse_resume_file
+from .vector_index import get_index
+from .workers import CPU_WORKERS, cpu_pool
+
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "1") == "1"
+PARSE_CONCURRENCY = int(os.getenv("INGEST_PARSE_CONCURRENCY", str(CPU_WORKERS)))
+ANON_CONCURRENCY = int(os.getenv("INGEST_ANON_CONCURRENCY", "2"))
+EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "32"))
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+POLL_S = float(os.getenv("INGEST_POLL_S", "1.0"))
+# a "running" item whose worker died is handed out again after the lease expires
+LEASE_S = int(os.getenv("INGEST_LEASE_S", "600"))
+
+
+def _claimable(now: datetime):
+    return or_(IngestItem.status == "queued",
+               and_(IngestItem.status == "running", IngestItem.locked_at < now - timedelta(seconds=LEASE_S)))
+
+
+class Pipeline:
+    """parse -> anonymize -> embed over queued IngestItems.
+
+    Each stage has its own threads joined by bounded queues, so a slow stage
+    applies backpressure to the one before it and the claimer never takes more
+    work from the table than the pipeline can hold. Parsing runs in the CPU
+    process pool; embedding goes through ``embed_many`` in batches.
+    """
+
+    def __init__(self):
+        self._parse_q: "queue.Queue" = queue.Queue(maxsize=2 * PARSE_CONCURRENCY)
+        self._anon_q: "queue.Queue" = queue.Queue(maxsize=4 * EMBED_BATCH)
+        self._embed_q: "queue.Queue" = queue.Queue(maxsize=4 * EMBED_BATCH)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        specs = [("claim", self._claim_loop, 1), ("parse", self._parse_loop, PARSE_CONCURRENCY),
+                 ("anonymize", self._anon_loop, ANON_CONCURRENCY), ("embed", self._embed_loop, 1)]
+        for name, target, n in specs:
+            for i in range(n):
+                t = threading.Thread(target=target, name=f"ingest-{name}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2 * POLL_S)
+        self._threads = []
+
+    # ---- queue table ----------------------------------------------------------
+    def _claim(self, n: int) -> List[Dict]:
+        now = datetime.utcnow()
+        claimed = []
+        with SessionLocal() as db:
+            rows = db.execute(select(IngestItem.id, IngestItem.path, IngestItem.file_sha256)
+                              .where(_claimable(now)).order_by(IngestItem.id).limit(n)).all()
+            for item_id, path, file_sha in rows:
+                # conditional update: only one worker process wins each item
+                res = db.execute(update(IngestItem).where(IngestItem.id == item_id, _claimable(now))
+                                 .values(status="running", locked_at=now, updated_at=now,
+                                         attempts=IngestItem.attempts + 1))
+                if res.rowcount:
+                    claimed.append({"id": item_id, "path": path, "file_sha256": file_sha})
+            db.commit()
+        return claimed
+
+    def _fail(self, item: Dict, stage: str, err: Exception):
+        print(f"❌ Ingest item {item['id']} failed at {stage}: {err}")
+        with SessionLocal() as db:
+            row = db.get(IngestItem, item["id"])
+            if row is None:
+                return
+            row.status = "dead" if row.attempts >= MAX_ATTEMPTS else "queued"
+            row.stage = stage
+            row.error = f"{type(err).__name__}: {err}"[:2000]
+            row.locked_at = None
+            row.updated_at = datetime.utcnow()
+            if row.status == "dead" and row.file_sha256:
+                # copies waiting on this one will never be linked
+                db.execute(update(IngestItem).where(IngestItem.file_sha256 == row.file_sha256,
+                                                    IngestItem.status == "waiting")
+                           .values(status="dead", error=f"duplicate of item {row.id}, which failed at {stage}",
+                                   updated_at=row.updated_at))
+            db.commit()
+
+    # ---- stages ---------------------------------------------------------------
+    def _claim_loop(self):
+        while not self._stop.is_set():
+            free = self._parse_q.maxsize - self._parse_q.qsize()
+            items = []
+            if free > 0:
+                try:
+                    items = self._claim(free)
+                except Exception as e:
+                    print(f"❌ Ingest claim error: {e}")
+            for it in items:
+                self._parse_q.put(it)
+            if not items:
+                self._stop.wait(POLL_S)
+
+    def _get(self, q: "queue.Queue") -> Optional[Dict]:
+        try:
+            return q.get(timeout=POLL_S)
+        except queue.Empty:
+            return None
+
+    def _parse_loop(self):
+        while not self._stop.is_set():
+            item = self._get(self._parse_q)
+            if item is None:
+                continue
+            try:
+                with timed("ingest.parse"):
+                    item["text"], item["sections"] = cpu_pool.executor.submit(parse_resume_file, item["path"]).result()
+                if not item["text"].strip():
+                    raise ValueError("no text could be extracted")
+            except Exception as e:
+                self._fail(item, "parse", e)
+                continue
+            self._anon_q.put(item)
+
+    def _anon_loop(self):
+        while not self._stop.is_set():
+            first = self._get(self._anon_q)
+            if first is None:
+                continue
+            # whatever is already queued goes along, so NER (when enabled) runs batched
+            batch = [first]
+            while len(batch) < NER_BATCH:
+                try:
+                    batch.append(self._anon_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with timed("ingest.anonymize"):
+                    results = anonymize_many([it["text"] for it in batch])
+                    for it, (anon, pii) in zip(batch, results):
+                        it["anonymized"], it["pii"] = anon, pii
+                        it["analysis"] = resume_analyses(it["text"], anon)
+                        it["career_stage"] = classify_career_stage(it["text"])
+            except Exception as e:
+                for it in batch:
+                    self._fail(it, "anonymize", e)
+                continue
+            for it in batch:
+                self._embed_q.put(it)
+
+    def _embed_loop(self):
+        while not self._stop.is_set():
+            first = self._get(self._embed_q)
+            if first is None:
+                continue
+            batch = [first]
+            while len(batch) < EMBED_BATCH:
+                try:
+                    batch.append(self._embed_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with timed("ingest.embed"):
+                    vecs = embed_many([it["anonymized"] for it in batch])
+                self._persist(batch, vecs)
+            except Exception as e:
+                for it in batch:
+                    self._fail(it, "embed", e)
+
+    def _persist(self, batch: List[Dict], vecs: List[list]):
+        t0 = time.perf_counter()
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            fresh, linked = [], []
+            seen: Dict[str, Resume] = {}
+            for it, vec in zip(batch, vecs):
+                text_sha = text_fingerprint(it["text"])
+                # same text already stored (or earlier in this batch): link, don't insert
+                r = seen.get(text_sha) or db.scalars(
+                    select(Resume).where(or_(Resume.text_sha256 == text_sha,
+                                             and_(Resume.file_sha256 == it["file_sha256"],
+                                                  Resume.file_sha256.isnot(None))))
+                    .order_by(Resume.id)).first()
+                if r is None:
+                    r = Resume(raw_text=it["text"], anonymized_text=it["anonymized"], sections=it["sections"],
+                               career_stage=it["career_stage"], analysis=it["analysis"], pii=it["pii"], embedding=vec,
+                               file_sha256=it["file_sha256"], text_sha256=text_sha)
+                    fresh.append((r, vec))
+                    db.add(r)
+                else:
+                    dedup.count("resume", "text_hits")
+                seen[text_sha] = r
+                linked.append((it, r))
+            db.flush()
+            for it, r in linked:
+                db.execute(update(IngestItem).where(IngestItem.id == it["id"])
+                           .values(status="done", stage="embed", error="", resume_id=r.id,
+                                   locked_at=None, updated_at=now))
+                if it["file_sha256"]:
+                    # copies of the same file waiting on this one
+                    db.execute(update(IngestItem).where(IngestItem.file_sha256 == it["file_sha256"],
+                                                        IngestItem.status == "waiting")
+                               .values(status="done", resume_id=r.id, updated_at=now))
+            db.commit()
+            index = get_index()
+            for r, vec in fresh:
+                index.add(r.id, vec)
+            if fresh:
+                maintainer.submit_resumes(r.id for r, _ in fresh)
+        record("ingest.persist", time.perf_counter() - t0)
+
+
+def job_progress(db, job_id: int) -> Optional[Dict]:
+    job = db.get(IngestJob, job_id)
+    if job is None:
+        return None
+    counts = dict(db.execute(select(IngestItem.status, func.count()).where(IngestItem.job_id == job_id)
+                             .group_by(IngestItem.status)).all())
+    failed = db.execute(select(IngestItem.id, IngestItem.filename, IngestItem.stage, IngestItem.attempts,
+                               IngestItem.error, IngestItem.status)
+                        .where(IngestItem.job_id == job_id, IngestItem.error != "")
+                        .order_by(IngestItem.id).limit(100)).all()
+    finished = counts.get("done", 0) + counts.get("dead", 0)
+    return {
+        "job_id": job.id, "kind": job.kind, "total": job.total, "created_at": job.created_at,
+        "status": "completed" if finished >= job.total else ("running" if counts.get("running") or finished else "queued"),
+        "progress": finished / job.total if job.total else 1.0,
+        "counts": {s: counts.get(s, 0) for s in ("queued", "running", "waiting", "done", "dead")},
+        "errors": [{"item_id": i, "filename": f, "stage": st, "attempts": a, "error": e, "status": s}
+                   for i, f, st, a, e, s in failed],
+    }
+
+
+pipeline = Pipeline()
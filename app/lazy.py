@@ -0,0 +1,86 @@
+import os, threading, time
+from typing import Callable, Dict, Optional
+
+# off: load on first use; background: start loading at startup without blocking
+# it; eager: block startup until every model is loaded
+WARM_MODELS = os.getenv("WARM_MODELS", "background")
+
+
+class LazyModel:
+    """A model built on first ``get()``, once per process, safe under threads.
+
+    ``warm`` optionally runs one dummy inference after loading so the first
+    real request doesn't pay for kernel/thread-pool initialization. Only
+    ``required`` models are warmed up, preloaded and waited for by readiness;
+    an optional one loads on its first ``get()``.
+    """
+
+    def __init__(self, name: str, loader: Callable, warm: Optional[Callable] = None, required: bool = True):
+        self.name = name
+        self.required = required
+        self._loader = loader
+        self._warm = warm
+        self._lock = threading.Lock()
+        self._obj = None
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        _registry[name] = self
+
+    @property
+    def loaded(self) -> bool:
+        return self._obj is not None
+
+    def get(self):
+        obj = self._obj
+        if obj is None:
+            with self._lock:
+                if self._obj is None:
+                    t0 = time.perf_counter()
+                    try:
+                        self._obj = self._loader()
+                    except Exception as e:
+                        self.error = f"{type(e).__name__}: {e}"
+                        raise
+                    self.error = None
+                    self.load_seconds = time.perf_counter() - t0
+                    print(f"✅ Loaded {self.name} in {self.load_seconds:.1f}s")
+                obj = self._obj
+        return obj
+
+    def warm_up(self, infer: bool = True):
+        obj = self.get()
+        if infer and self._warm is not None:
+            self._warm(obj)
+
+    def status(self) -> Dict:
+        return {"loaded": self.loaded, "required": self.required, "load_seconds": self.load_seconds,
+                "error": self.error}
+
+
+_registry: Dict[str, LazyModel] = {}
+
+
+def warm_up(background: bool = False, infer: bool = True) -> Optional[threading.Thread]:
+    """Load every required model. ``infer=False`` only loads weights, which is
+    what a pre-fork master should do (no inference thread pools before fork)."""
+    def run():
+        for m in [m for m in _registry.values() if m.required]:
+            try:
+                m.warm_up(infer)
+            except Exception as e:
+                print(f"❌ Warm-up of {m.name} failed: {e}")
+    if not background:
+        run()
+        return None
+    t = threading.Thread(target=run, name="model-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def ready() -> bool:
+    # lazy by choice (WARM_MODELS=off) counts as ready
+    return WARM_MODELS == "off" or all(m.loaded for m in _registry.values() if m.required)
+
+
+def status() -> Dict:
+    return {name: m.status() for name, m in _registry.items()}
@@ -1,14 +1,110 @@
-from fastapi import FastAPI
-from .db import Base, engine
-from .routers import uploads, evaluate, search
+import os, time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from .db import engine, pool_stats
+from .migrate import sync_schema
+from .routers import uploads, evaluate, search, ontology, jobs
+from .semantic import batcher_stats, cache_stats
+from . import dedup, embedders, evalcache, ingest, lazy, matrix, metrics, profiling, workers
+
+# a pre-fork master (gunicorn.conf.py) syncs once and sets this to 0 for workers
+SYNC_SCHEMA = os.getenv("SYNC_SCHEMA_ON_STARTUP", "1") == "1"
+# per-stage durations on every response, visible in the browser's network panel
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
 
-Base.metadata.create_all(bind=engine)
 app = FastAPI(title="Automated Resume Relevance Check System")
 
 app.include_router(uploads.router)
 app.include_router(evaluate.router)
 app.include_router(search.router)
+app.include_router(ontology.router)
+app.include_router(jobs.router)
+
+@app.middleware("http")
+async def timing(request: Request, call_next):
+    t0 = time.perf_counter()
+    with metrics.request_scope() as timings:
+        if profiling.PROFILE_REQUESTS and request.headers.get("x-profile") == "1":
+            with profiling.profile(f"{request.method} {request.url.path}") as path:
+                response = await call_next(request)
+            response.headers["X-Profile-File"] = path
+        else:
+            response = await call_next(request)
+    took = time.perf_counter() - t0
+    # the route template, not the raw path, so ids don't explode the label set
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.record_http(request.method, route, response.status_code, took)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = metrics.server_timing(timings, took)
+    return response
+
+@app.exception_handler(workers.PoolSaturated)
+async def pool_saturated(request: Request, exc: workers.PoolSaturated):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+def startup():
+    # schema sync runs here, not at import: importing the app must stay cheap
+    if SYNC_SCHEMA:
+        sync_schema(engine)
+    if lazy.WARM_MODELS == "eager":
+        lazy.warm_up()
+    elif lazy.WARM_MODELS == "background":
+        lazy.warm_up(background=True)
+    if ingest.INGEST_ENABLED:
+        ingest.pipeline.start()
+    if matrix.MATRIX_ENABLED:
+        # every worker starts it; one wins the leader lock and scores
+        matrix.maintainer.start()
+
+@app.on_event("shutdown")
+def stop_workers():
+    ingest.pipeline.stop()
+    matrix.maintainer.stop()
+    workers.shutdown()
 
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+@app.get("/healthz")
+def liveness():
+    # the process is up and serving; never touches the DB or the models
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readiness():
+    db_ok = True
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        db_ok = False
+    ok = db_ok and lazy.ready()
+    body = {"status": "ready" if ok else "starting", "db": db_ok, "models": lazy.status()}
+    return JSONResponse(status_code=200 if ok else 503, content=body)
+
+@app.get("/stats")
+def stats():
+    return {"embedding_cache": cache_stats(), "embed_batcher": batcher_stats(), "pools": workers.stats(), "db": pool_stats(),
+            "models": lazy.status(), "embedder": embedders.describe(), "dedup": dedup.stats(), "evaluations": evalcache.stats(), "matrix": matrix.maintainer.stats(), "stages": metrics.snapshot()}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    samples = []
+    for k, v in pool_stats().items():
+        if k == "timeouts":
+            samples.append(("resume_checker_db_pool_timeouts_total", "counter", "Pool checkouts that timed out.", {}, v))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            samples.append(("resume_checker_db_pool", "gauge", "DB connection pool state.", {"field": k}, v))
+    for name, st in workers.stats().items():
+        for k in ("pending", "max_pending", "completed", "rejected"):
+            samples.append(("resume_checker_worker_pool", "gauge", "Worker pool state.", {"pool": name, "field": k}, st[k]))
+    for k, v in cache_stats().items():
+        samples.append(("resume_checker_embedding_cache", "gauge", "Embedding cache state.", {"field": k}, v))
+    for k, v in matrix.maintainer.stats().items():
+        samples.append(("resume_checker_matrix", "gauge", "Score matrix maintainer state.", {"field": k}, v))
+    for name, st in lazy.status().items():
+        samples.append(("resume_checker_model_loaded", "gauge", "1 once the model is loaded.", {"model": name}, st["loaded"]))
+    return PlainTextResponse(metrics.prometheus(samples), media_type="text/plain; version=0.0.4")
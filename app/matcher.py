@@ -0,0 +1,147 @@
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+_NORM_RE = re.compile(r"[^a-z0-9+#+.\- ]")
+# skills shorter than this ("ml", "tf", "go") match exactly only: WRatio scores
+# them >= 90 against any word containing them ("html", "tfs")
+FUZZY_MIN_LEN = 4
+
+
+def normalize_token(t: str) -> str:
+    return _NORM_RE.sub(" ", t.lower()).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    # normalize before splitting so "python,sql" and "python/django" are separate
+    # words; a sentence-final "." is not part of the skill
+    return [w for w in (w.rstrip(".") for w in normalize_token(text).split()) if w]
+
+
+def _trigrams(s: str) -> Set[str]:
+    padded = f" {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillMatcher:
+    """Skill vocabulary compiled once for repeated matching.
+
+    Exact hits come from a token trie walked over the text, so the cost is
+    linear in the number of words. The fuzzy pass only scores skills that share
+    enough character trigrams with the query (postings in numpy arrays), instead
+    of running rapidfuzz against the whole vocabulary.
+    """
+
+    def __init__(self, skills: Iterable[str], cache_size: int = 50_000):
+        self.skills: List[str] = sorted({normalize_token(s) for s in skills if normalize_token(s)})
+        self._ids: Dict[str, int] = {s: i for i, s in enumerate(self.skills)}
+        self._trie: Dict = {}
+        self.max_tokens = 1
+        for s in self.skills:
+            node = self._trie
+            toks = s.split()
+            self.max_tokens = max(self.max_tokens, len(toks))
+            for t in toks:
+                node = node.setdefault(t, {})
+            node["$"] = s
+        postings: Dict[str, List[int]] = {}
+        self._gram_counts = np.zeros(len(self.skills), dtype=np.int32)
+        for i, s in enumerate(self.skills):
+            grams = _trigrams(s)
+            self._gram_counts[i] = len(grams)
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._cache: "OrderedDict[Tuple, Optional[Tuple[str, float]]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def __contains__(self, skill: str) -> bool:
+        return normalize_token(skill) in self._ids
+
+    def find_exact(self, tokens: List[str]) -> Set[str]:
+        # walk the trie from every token; longest and shorter phrases are all reported
+        hits = set()
+        trie = self._trie
+        for i in range(len(tokens)):
+            node = trie
+            for t in tokens[i:i + self.max_tokens]:
+                node = node.get(t)
+                if node is None:
+                    break
+                if "$" in node:
+                    hits.add(node["$"])
+        return hits
+
+    def candidates(self, query: str, min_overlap: float = 0.5) -> List[str]:
+        grams = [g for g in _trigrams(query) if g in self._postings]
+        if not grams:
+            return []
+        counts = np.bincount(np.concatenate([self._postings[g] for g in grams]), minlength=len(self.skills))
+        # a close match shares most trigrams of the shorter of the two strings
+        need = np.ceil(min_overlap * np.minimum(self._gram_counts, len(_trigrams(query))))
+        idx = np.nonzero(counts >= np.maximum(need, 1))[0]
+        return [self.skills[i] for i in idx]
+
+    def best(self, query: str, cutoff: float = 90, scorer=fuzz.WRatio) -> Optional[Tuple[str, float]]:
+        if query in self._ids:
+            return query, 100.0
+        key = (query, cutoff, scorer)
+        try:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        except KeyError:
+            pass
+        cands = [c for c in self.candidates(query) if len(c) >= FUZZY_MIN_LEN]
+        res = None
+        if cands:
+            m = process.extractOne(query, cands, scorer=scorer, score_cutoff=cutoff)
+            if m:
+                res = (m[0], float(m[1]))
+        self._cache[key] = res
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return res
+
+    def match(self, tokens: List[str], max_n: int = 3, cutoff: float = 90, scorer=fuzz.WRatio) -> Set[str]:
+        hits = self.find_exact(tokens)
+        grams = set()
+        for n in range(1, max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                grams.add(" ".join(tokens[i:i + n]))
+        for g in grams:
+            m = self.best(g, cutoff, scorer)
+            if m:
+                hits.add(m[0])
+        return hits
+
+    def fuzzy_scores(self, tokens: List[str], targets: Iterable[str], cutoff: float,
+                     scorer=fuzz.partial_ratio) -> Dict[str, float]:
+        # best score per target skill over the text's n-grams; only n-grams that
+        # share trigrams with a target are ever scored
+        targets = {normalize_token(t) for t in targets}
+        best: Dict[str, float] = {}
+        grams = set()
+        for n in range(1, self.max_tokens + 2):
+            for i in range(len(tokens) - n + 1):
+                grams.add(" ".join(tokens[i:i + n]))
+        for g in grams:
+            for s in self.candidates(g):
+                if s not in targets:
+                    continue
+                score = scorer(s, g, score_cutoff=cutoff)
+                if score and score > best.get(s, 0):
+                    best[s] = float(score)
+        return best
+
+
+@lru_cache(maxsize=256)
+def compile_skills(skills: Tuple[str, ...]) -> SkillMatcher:
+    # JD skill lists repeat across every resume screened against the JD
+    return SkillMatcher(skills)
@@ -0,0 +1,346 @@
+import os, queue, threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import delete, exists, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from .db import SessionLocal, engine
+from .metrics import timed
+from .models import JobDescription, MatchScore, MatrixTask, Resume
+from .ontology import get_ontology
+from .semantic import embed_many
+from .tasks import matrix_fields_many
+from .workers import cpu_pool
+
+MATRIX_ENABLED = os.getenv("MATRIX_ENABLED", "1") == "1"
+CHUNK = int(os.getenv("MATRIX_CHUNK", "512"))
+# JDs per CPU-pool task when scoring one resume; keeps a single resume parallel
+JD_GROUP = 64
+# the matrix scores anonymized text, like the evaluate default
+VARIANT = "anonymized"
+# every web worker runs a maintainer thread, but only the one holding this lock
+# scores; the rest hand their work over through matrix_tasks
+MATRIX_LOCK_PATH = os.getenv("MATRIX_LOCK_PATH", os.path.join("data", "index", "matrix.lock"))
+LEADER_RETRY_S = float(os.getenv("MATRIX_LEADER_RETRY_S", "5"))
+TASK_BATCH = 500
+_ADVISORY_KEY = 0x6D6174726978  # "matrix"
+
+try:
+    import fcntl
+except ImportError:  # Windows: the dev server is one process, which always leads
+    fcntl = None
+
+_SCORE_COLS = ("score", "verdict", "hard_coverage", "soft_similarity", "ats_norm", "missing_must",
+               "skill_hits", "ontology_version", "updated_at")
+
+
+def open_jds():
+    # NULL is open: rows from before the column existed
+    return JobDescription.is_open.isnot(False)
+
+
+def _resume_cols():
+    return select(Resume.id, Resume.anonymized_text.label("text"), Resume.embedding, Resume.analysis)
+
+
+def _jd_cols():
+    return select(JobDescription.id, JobDescription.raw_text, JobDescription.must_have,
+                  JobDescription.good_to_have, JobDescription.embedding)
+
+
+def _upsert(db, rows: List[Dict]):
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(MatchScore)
+        db.execute(ins.on_conflict_do_update(index_elements=["resume_id", "jd_id"],
+                                             set_={c: ins.excluded[c] for c in _SCORE_COLS}), rows)
+    else:
+        for row in rows:
+            db.merge(MatchScore(**row))
+
+
+def score_block(db, resumes: Sequence, jds: Sequence) -> int:
+    """Score every resume x JD pair in the block and upsert the results.
+
+    Soft similarity for the whole block is one matrix product over the stacked
+    embeddings; hard matching runs on the CPU pool, where each JD's compiled
+    skill matcher is cached across the resumes it is scored against.
+    """
+    if not resumes or not jds:
+        return 0
+    missing = [r for r in resumes if r.embedding is None]
+    fresh = dict(zip((r.id for r in missing), embed_many([r.text or "" for r in missing])))
+    R = np.asarray([r.embedding if r.embedding is not None else fresh[r.id] for r in resumes], dtype=np.float32)
+    J = np.asarray([j.embedding for j in jds], dtype=np.float32)
+    sims = np.clip(R @ J.T, -1.0, 1.0)
+    tasks, pairs = [], []
+    for i, r in enumerate(resumes):
+        for s in range(0, len(jds), JD_GROUP):
+            group = jds[s:s + JD_GROUP]
+            tasks.append((r.text or "", (r.analysis or {}).get(VARIANT),
+                          [(j.must_have, j.good_to_have, float(sims[i, s + k])) for k, j in enumerate(group)]))
+            pairs.extend((r.id, j.id) for j in group)
+    fields = [f for group in cpu_pool.map(matrix_fields_many, tasks, chunksize=8) for f in group]
+    now = datetime.utcnow()
+    version = get_ontology().version
+    _upsert(db, [dict(resume_id=rid, jd_id=jid, ontology_version=version, updated_at=now, **f)
+                 for (rid, jid), f in zip(pairs, fields)])
+    db.commit()
+    return len(pairs)
+
+
+def _with_embeddings(db, jds: List) -> List:
+    # JDs uploaded before embeddings were stored: compute once and keep them
+    todo = [j for j in jds if j.embedding is None]
+    if not todo:
+        return jds
+    vecs = dict(zip((j.id for j in todo), embed_many([j.raw_text or "" for j in todo])))
+    for jid, vec in vecs.items():
+        db.get(JobDescription, jid).embedding = vec
+    db.commit()
+    return list(db.execute(_jd_cols().where(JobDescription.id.in_([j.id for j in jds]))
+                           .order_by(JobDescription.id)).all())
+
+
+def score_jd(jd_id: int, only_missing: bool = False) -> int:
+    # a new (or reopened) JD against every resume, CHUNK resumes at a time
+    with timed("matrix.score_jd"), SessionLocal() as db:
+        jds = _with_embeddings(db, db.execute(_jd_cols().where(JobDescription.id == jd_id, open_jds())).all())
+        if not jds:
+            return 0
+        version = get_ontology().version
+        done, last = 0, 0
+        while True:
+            q = _resume_cols().where(Resume.id > last)
+            if only_missing:
+                # rows from before skill_hits was stored count as missing too
+                q = q.where(~exists().where(MatchScore.resume_id == Resume.id, MatchScore.jd_id == jd_id,
+                                            MatchScore.ontology_version == version,
+                                            MatchScore.skill_hits.isnot(None)))
+            resumes = db.execute(q.order_by(Resume.id).limit(CHUNK)).all()
+            if not resumes:
+                return done
+            last = resumes[-1].id
+            done += score_block(db, resumes, jds)
+
+
+def backfill_jds() -> List[int]:
+    # open JDs with rows stored before skill_hits existed; score_jd(only_missing)
+    # rescores just those rows
+    with SessionLocal() as db:
+        return list(db.scalars(select(MatchScore.jd_id).distinct()
+                               .join(JobDescription, JobDescription.id == MatchScore.jd_id)
+                               .where(MatchScore.skill_hits.is_(None), open_jds())
+                               .order_by(MatchScore.jd_id)).all())
+
+
+def score_resumes(resume_ids: Iterable[int]) -> int:
+    # new resumes against every open JD, CHUNK JDs at a time
+    with timed("matrix.score_resumes"), SessionLocal() as db:
+        resumes = db.execute(_resume_cols().where(Resume.id.in_(list(resume_ids)))).all()
+        done, last = 0, 0
+        while resumes:
+            jds = db.execute(_jd_cols().where(JobDescription.id > last, open_jds())
+                             .order_by(JobDescription.id).limit(CHUNK)).all()
+            if not jds:
+                break
+            last = jds[-1].id
+            done += score_block(db, resumes, _with_embeddings(db, jds))
+        return done
+
+
+def resume_row(db, resume_id: int, offset: int = 0, limit: int = 50) -> Optional[Dict]:
+    """One page of a resume's matrix row over open JDs. Cells the maintainer
+    hasn't reached, or scored under an older ontology, are queued and reported
+    as ``pending``; they are never scored on the request."""
+    if db.get(Resume, resume_id) is None:
+        return None
+    total = db.scalar(select(func.count(JobDescription.id)).where(open_jds()))
+    jds = db.execute(select(JobDescription.id, JobDescription.title, JobDescription.company)
+                     .where(open_jds()).order_by(JobDescription.id).offset(offset).limit(limit)).all()
+    version = get_ontology().version
+    got = {m.jd_id: m for m in db.execute(
+        select(MatchScore.jd_id, MatchScore.score, MatchScore.verdict, MatchScore.hard_coverage,
+               MatchScore.soft_similarity, MatchScore.missing_must, MatchScore.ontology_version)
+        .where(MatchScore.resume_id == resume_id, MatchScore.jd_id.in_([j.id for j in jds])))}
+    gaps = {j.id for j in jds if j.id not in got or got[j.id].ontology_version != version}
+    if gaps:
+        maintainer.submit_resumes([resume_id])
+    items = []
+    for j in jds:
+        m = got.get(j.id)
+        items.append({"jd_id": j.id, "jd_title": j.title, "company": j.company,
+                      "score": m.score if m else None, "verdict": m.verdict if m else None,
+                      "hard_coverage": m.hard_coverage if m else None,
+                      "soft_similarity": m.soft_similarity if m else None,
+                      "missing_must": m.missing_must if m else None, "pending": j.id in gaps})
+    return {"resume_id": resume_id, "total": total, "offset": offset, "limit": limit,
+            "pending": len(gaps), "items": items}
+
+
+class _LeaderLock:
+    """Held for the life of the process: a Postgres advisory lock (works across
+    hosts) or an flock on MATRIX_LOCK_PATH (one host). Both go away with the
+    process, so another worker takes over."""
+
+    def __init__(self):
+        self._conn = None
+        self._file = None
+
+    def acquire(self) -> bool:
+        if engine.dialect.name == "postgresql":
+            conn = engine.connect()
+            got = conn.scalar(text("SELECT pg_try_advisory_lock(:k)"), {"k": _ADVISORY_KEY})
+            conn.commit()
+            if got:
+                self._conn = conn
+            else:
+                conn.close()
+            return bool(got)
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(MATRIX_LOCK_PATH) or ".", exist_ok=True)
+        f = open(MATRIX_LOCK_PATH, "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._conn is not None:
+            self._conn.close()  # the advisory lock goes with the session
+            self._conn = None
+        if self._file is not None:
+            self._file.close()  # and the flock with the descriptor
+            self._file = None
+
+
+class Maintainer:
+    """Background thread that keeps match_scores current as JDs and resumes arrive.
+
+    Only one process scores (see _LeaderLock); work submitted in the others
+    goes to matrix_tasks, which the leader drains whenever its own queue is
+    idle. Work is coalesced: a JD queued twice is scored once, and queued
+    resume ids are scored together against each chunk of open JDs.
+    """
+
+    def __init__(self):
+        self._q: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_jds: set = set()
+        self._pending_resumes: set = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_lock = _LeaderLock()
+        self.leader = False
+        self.processed = 0
+        self.failed = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="matrix-maintainer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._leader_lock.release()
+        self.leader = False
+
+    def submit_jd(self, jd_id: int, only_missing: bool = False):
+        if self._handoff("jd", [jd_id], only_missing):
+            return
+        with self._lock:
+            if jd_id in self._pending_jds:
+                return
+            self._pending_jds.add(jd_id)
+        self._q.put(("jd", jd_id, only_missing))
+
+    def submit_resumes(self, resume_ids: Iterable[int]):
+        resume_ids = list(resume_ids)
+        if not resume_ids or self._handoff("resume", resume_ids, False):
+            return
+        with self._lock:
+            first = not self._pending_resumes
+            self._pending_resumes.update(resume_ids)
+        if first:
+            self._q.put(("resumes", None, False))
+
+    def _handoff(self, kind: str, keys: List[int], only_missing: bool) -> bool:
+        # another process leads: leave the work in matrix_tasks for it
+        if self.leader or not MATRIX_ENABLED or not keys:
+            return False
+        with SessionLocal() as db:
+            db.execute(insert(MatrixTask), [dict(kind=kind, key=k, only_missing=only_missing) for k in keys])
+            db.commit()
+        return True
+
+    def _drain(self) -> int:
+        with SessionLocal() as db:
+            tasks = db.execute(select(MatrixTask.id, MatrixTask.kind, MatrixTask.key, MatrixTask.only_missing)
+                               .order_by(MatrixTask.id).limit(TASK_BATCH)).all()
+            if tasks:
+                db.execute(delete(MatrixTask).where(MatrixTask.id.in_([t.id for t in tasks])))
+                db.commit()
+        for t in tasks:
+            if t.kind == "jd":
+                self.submit_jd(t.key, t.only_missing)
+        self.submit_resumes(t.key for t in tasks if t.kind == "resume")
+        return len(tasks)
+
+    def _elect(self) -> bool:
+        try:
+            self.leader = self._leader_lock.acquire()
+        except Exception as e:
+            print(f"❌ Matrix leader election failed: {e}")
+        if self.leader:
+            print(f"✅ Matrix maintainer running in pid {os.getpid()}")
+            # rows stored before skill_hits existed
+            self._q.put(("backfill", None, False))
+        return self.leader
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self.leader and not self._elect():
+                self._stop.wait(LEADER_RETRY_S)
+                continue
+            try:
+                kind, key, only_missing = self._q.get(timeout=1.0)
+            except queue.Empty:
+                kind, key, only_missing = "drain", None, False
+            try:
+                if kind == "jd":
+                    with self._lock:
+                        self._pending_jds.discard(key)
+                    score_jd(key, only_missing)
+                elif kind == "backfill":
+                    for jd_id in backfill_jds():
+                        self.submit_jd(jd_id, only_missing=True)
+                elif kind == "drain":
+                    if not self._drain():
+                        continue
+                else:
+                    with self._lock:
+                        ids, self._pending_resumes = self._pending_resumes, set()
+                    score_resumes(ids)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Matrix update failed ({kind} {key}): {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"leader": self.leader, "queued_jds": len(self._pending_jds),
+                    "queued_resumes": len(self._pending_resumes), "processed": self.processed,
+                    "failed": self.failed}
+
+
+maintainer = Maintainer()
@@ -0,0 +1,176 @@
+import contextvars, threading, time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+# per-stage wall time; a window of recent samples backs the percentiles and
+# fixed buckets back the Prometheus histograms
+_WINDOW = 2048
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_lock = threading.Lock()
+
+
+class Hist:
+    __slots__ = ("count", "total", "max", "buckets", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.recent = deque(maxlen=_WINDOW)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def merge(self, other: "Hist"):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.recent.extend(other.recent)
+
+
+_stages: Dict[str, Hist] = {}
+_http: Dict[Tuple[str, str, int], Hist] = {}
+
+# stage -> seconds spent inside the current request (Server-Timing)
+_request: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+# set inside pool workers: samples are buffered and shipped back to the parent
+_collector: contextvars.ContextVar[Optional[Dict[str, Hist]]] = contextvars.ContextVar("stage_collector", default=None)
+
+
+def record(stage: str, seconds: float):
+    local = _collector.get()
+    if local is not None:
+        h = local.get(stage)
+        if h is None:
+            h = local[stage] = Hist()
+        h.add(seconds)
+        return
+    with _lock:
+        h = _stages.get(stage)
+        if h is None:
+            h = _stages[stage] = Hist()
+        h.add(seconds)
+    req = _request.get()
+    if req is not None:
+        req[stage] = req.get(stage, 0.0) + seconds
+
+
+def merge(collected: Dict[str, Hist]):
+    # replay what a pool worker buffered, in the submitting request's context
+    with _lock:
+        for stage, other in collected.items():
+            h = _stages.get(stage)
+            if h is None:
+                h = _stages[stage] = Hist()
+            h.merge(other)
+    req = _request.get()
+    if req is not None:
+        for stage, other in collected.items():
+            req[stage] = req.get(stage, 0.0) + other.total
+
+
+@contextmanager
+def collecting():
+    buf: Dict[str, Hist] = {}
+    token = _collector.set(buf)
+    try:
+        yield buf
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def timed(stage: str):
+    # also usable as a decorator: @timed("scoring.hard_match")
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0)
+
+
+@contextmanager
+def request_scope():
+    timings: Dict[str, float] = {}
+    token = _request.set(timings)
+    try:
+        yield timings
+    finally:
+        _request.reset(token)
+
+
+def record_http(method: str, route: str, status: int, seconds: float):
+    with _lock:
+        h = _http.get((method, route, status))
+        if h is None:
+            h = _http[(method, route, status)] = Hist()
+        h.add(seconds)
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    parts = [f"{stage};dur={1000 * s:.1f}" for stage, s in sorted(timings.items(), key=lambda kv: -kv[1])]
+    return ", ".join(parts + [f"total;dur={1000 * total:.1f}"])
+
+
+def snapshot() -> Dict[str, dict]:
+    with _lock:
+        items = [(k, h.count, h.total, h.max, list(h.recent)) for k, h in _stages.items()]
+    out = {}
+    for name, count, total, mx, recent in sorted(items):
+        p50, p95 = np.percentile(recent, [50, 95]) if recent else (0.0, 0.0)
+        out[name] = {"count": count, "mean_ms": 1000 * total / count, "p50_ms": 1000 * p50,
+                     "p95_ms": 1000 * p95, "max_ms": 1000 * mx}
+    return out
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    body = ",".join(f'{k}="{_esc(v)}"' for k, v in labels.items())
+    return "{" + body + "}" if body else ""
+
+
+def _histogram(name: str, help_: str, series: Iterable[Tuple[Dict, Hist]]) -> list:
+    lines = [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+    for labels, h in series:
+        cum = 0
+        for le, n in zip(BUCKETS + (float("inf"),), h.buckets):
+            cum += n
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf' if le == float('inf') else le})} {cum}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.total}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+    return lines
+
+
+def prometheus(samples: Iterable[Tuple[str, str, str, Dict, float]] = ()) -> str:
+    """Prometheus text exposition: stage and request histograms plus
+    ``(name, type, help, labels, value)`` gauge/counter samples from the caller."""
+    with _lock:
+        stages = [({"stage": k}, _copy(h)) for k, h in sorted(_stages.items())]
+        http = [({"method": m, "route": r, "status": s}, _copy(h)) for (m, r, s), h in sorted(_http.items())]
+    lines = _histogram("resume_checker_stage_seconds", "Wall time per pipeline stage.", stages)
+    lines += _histogram("resume_checker_request_seconds", "HTTP request wall time.", http)
+    seen = set()
+    for name, type_, help_, labels, value in samples:
+        if name not in seen:
+            seen.add(name)
+            lines += [f"# HELP {name} {help_}", f"# TYPE {name} {type_}"]
+        lines.append(f"{name}{_labels(labels)} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _copy(h: Hist) -> Hist:
+    c = Hist()
+    c.count, c.total, c.max, c.buckets = h.count, h.total, h.max, list(h.buckets)
+    return c
@@ -0,0 +1,91 @@
+from sqlalchemy import insert, inspect, null, select, text, update
+from sqlalchemy.engine import Engine
+from .db import Base
+
+def sync_schema(engine: Engine):
+    # create_all only creates missing tables; add any new nullable columns to
+    # existing ones so older databases keep working without a migration tool
+    from . import models  # noqa: F401  (register tables on Base)
+    if engine.dialect.name == "postgresql":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception as e:
+            # needs CREATE privilege; models skips the trigram indexes without it
+            print(f"❌ pg_trgm unavailable, ilike filters will scan: {e}")
+    Base.metadata.create_all(bind=engine)
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        dedupe_evaluations(conn, insp)
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {ddl}'))
+                print(f"✅ Added column {table.name}.{col.name}")
+            for idx in table.indexes:
+                idx.create(bind=conn, checkfirst=True)
+    migrate_embeddings(engine)
+    migrate_evaluation_details(engine)
+
+def dedupe_evaluations(conn, insp) -> int:
+    # evaluations from before ux_evaluations_pair: keep the newest per pair and
+    # flag, or the unique index can't be built
+    if "ux_evaluations_pair" in {i["name"] for i in insp.get_indexes("evaluations")}:
+        return 0
+    n = conn.execute(text("DELETE FROM evaluations WHERE id NOT IN (SELECT MAX(id) FROM evaluations "
+                          "GROUP BY resume_id, jd_id, bias_anonymized)")).rowcount
+    if n:
+        print(f"✅ Removed {n} duplicate evaluations")
+    return n
+
+def migrate_embeddings(engine: Engine, batch: int = 500) -> int:
+    # one-time copy of JSON list embeddings into the packed float32 column
+    from .models import Resume, JobDescription
+    moved = 0
+    for model in (Resume, JobDescription):
+        legacy = model.__table__.c.embedding
+        packed = model.__table__.c.embedding_f32
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(select(model.id, legacy).where(packed.is_(None), legacy.is_not(None))
+                                    .limit(batch)).all()
+                if not rows:
+                    break
+                for rid, vec in rows:
+                    conn.execute(update(model.__table__).where(model.__table__.c.id == rid)
+                                 .values({packed: vec, legacy: null()}))
+                moved += len(rows)
+    if moved:
+        print(f"✅ Migrated {moved} embeddings to packed float32")
+    return moved
+
+def migrate_evaluation_details(engine: Engine, batch: int = 500) -> int:
+    # one-time move of inline evaluation payloads into compressed evaluation_details
+    from .details import DETAIL_FIELDS, pack
+    from .models import Evaluation, EvaluationDetail
+    ev, det = Evaluation.__table__, EvaluationDetail.__table__
+    cols = [ev.c[k] for k in DETAIL_FIELDS]
+    moved = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select(ev.c.id, *cols).where(ev.c.hard_match.is_not(None))
+                                .order_by(ev.c.id).limit(batch)).all()
+            if not rows:
+                break
+            done = set(conn.scalars(select(det.c.evaluation_id).where(det.c.evaluation_id.in_([r.id for r in rows]))))
+            for r in rows:
+                if r.id not in done:
+                    codec, blob, size = pack(dict(zip(DETAIL_FIELDS, r[1:])))
+                    conn.execute(insert(det).values(evaluation_id=r.id, codec=codec, payload=blob, raw_bytes=size))
+                conn.execute(update(ev).where(ev.c.id == r.id).values({c: null() for c in cols}))
+            moved += len(rows)
+    if moved:
+        print(f"✅ Moved {moved} evaluation payloads to evaluation_details")
+    return moved
+
+if __name__ == "__main__":
+    from .db import engine
+    sync_schema(engine)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, Boolean, ForeignKey, Index, LargeBinary, text
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.db import Base
+from app.vectors import Vector
 
 class JobDescription(Base):
     __tablename__ = "job_descriptions"
@@ -12,10 +13,26 @@ class JobDescription(Base):
     raw_text = Column(Text)
     must_have = Column(JSON, default=[])
     good_to_have = Column(JSON, default=[])
+    ontology_version = Column(String, index=True, default="")  # version that derived the skill lists
+    is_open = Column(Boolean, index=True, default=True)  # closed JDs drop out of the score matrix
+    file_sha256 = Column(String(64), unique=True, index=True, nullable=True)  # bytes of an uploaded JD file
+    text_sha256 = Column(String(64), index=True, nullable=True)  # see dedup.text_fingerprint
+    embedding = Column("embedding_f32", Vector())  # computed once at upload
+    embedding_json = deferred(Column("embedding", JSON))  # legacy list[float], see migrate.py
     created_at = Column(DateTime, default=datetime.utcnow)
 
     evaluations = relationship("Evaluation", back_populates="jd")
 
+def _has_trgm(ddl, target, bind, **kw) -> bool:
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+def _trigram_index(name: str, column) -> Index:
+    # backs ilike('%...%') filters; postgres only, once pg_trgm exists (see migrate.py)
+    return Index(name, column, postgresql_using="gin",
+                 postgresql_ops={column.key: "gin_trgm_ops"}).ddl_if(dialect="postgresql", callable_=_has_trgm)
+
+_trigram_index("ix_job_descriptions_title_trgm", JobDescription.title)
+
 class Resume(Base):
     __tablename__ = "resumes"
     id = Column(Integer, primary_key=True, index=True)
@@ -26,12 +43,19 @@ class Resume(Base):
     raw_text = Column(Text)
     sections = Column(JSON, default={})
     anonymized_text = Column(Text)
-    embedding = Column(JSON)  # store list[float]
+    embedding = Column("embedding_f32", Vector())  # packed float32
+    embedding_json = deferred(Column("embedding", JSON))  # legacy list[float], see migrate.py
     career_stage = Column(String, default="unknown")  # fresher, junior, mid, senior
+    analysis = deferred(Column(JSON))  # {"raw": ..., "anonymized": ...}, see analysis.ResumeAnalysis
+    pii = deferred(Column(JSON))  # redaction spans + policy applied, see anonymize.py
+    file_sha256 = Column(String(64), unique=True, index=True, nullable=True)  # uploaded bytes; file lives at uploads/<sha>
+    text_sha256 = Column(String(64), index=True, nullable=True)  # see dedup.text_fingerprint
     created_at = Column(DateTime, default=datetime.utcnow)
 
     evaluations = relationship("Evaluation", back_populates="resume")
 
+_trigram_index("ix_resumes_location_trgm", Resume.location)
+
 class Evaluation(Base):
     __tablename__ = "evaluations"
     id = Column(Integer, primary_key=True, index=True)
@@ -39,14 +63,87 @@ class Evaluation(Base):
     jd_id = Column(Integer, ForeignKey("job_descriptions.id"))
     relevance_score = Column(Float)
     verdict = Column(String)  # High / Medium / Low
-    hard_match = Column(JSON, default={})
-    soft_match = Column(JSON, default={})
+    hard_coverage = Column(Float, nullable=True)
+    soft_similarity = Column(Float, nullable=True)
+    ats_norm = Column(Float, nullable=True)
     missing_elements = Column(JSON, default={"skills": [], "certifications": [], "projects": []})
-    feedback = Column(Text)
-    explainability = Column(JSON, default={})
-    ats_report = Column(JSON, default={})
+    # inline payload of rows from before evaluation_details; new rows leave these NULL
+    hard_match = deferred(Column(JSON))
+    soft_match = deferred(Column(JSON))
+    feedback = deferred(Column(Text))
+    explainability = deferred(Column(JSON))
+    ats_report = deferred(Column(JSON))
     bias_anonymized = Column(Boolean, default=False)
+    ontology_version = Column(String, index=True, default="")
+    cache_key = Column(String(64), index=True, nullable=True)  # inputs the row was scored from, see evalcache.eval_key
     created_at = Column(DateTime, default=datetime.utcnow)
 
     resume = relationship("Resume", back_populates="evaluations")
     jd = relationship("JobDescription", back_populates="evaluations")
+
+class EvaluationDetail(Base):
+    # cold half of an evaluation, compressed JSON (see details.py)
+    __tablename__ = "evaluation_details"
+    evaluation_id = Column(Integer, ForeignKey("evaluations.id"), primary_key=True)
+    codec = Column(String, default="zlib")
+    payload = Column(LargeBinary)
+    raw_bytes = Column(Integer, default=0)  # uncompressed size
+
+# one evaluation per pair and flag: POST /evaluate/ upserts (see evalcache.upsert)
+Index("ux_evaluations_pair", Evaluation.resume_id, Evaluation.jd_id, Evaluation.bias_anonymized, unique=True)
+# dashboard keyset order: best score first, id breaks ties
+Index("ix_evaluations_score_id", Evaluation.relevance_score.desc(), Evaluation.id.desc())
+# shortlist: one JD's evaluations already in page order
+Index("ix_evaluations_jd_score", Evaluation.jd_id, Evaluation.relevance_score.desc(), Evaluation.id.desc())
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, default="resume")
+    total = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    items = relationship("IngestItem", back_populates="job")
+
+class IngestItem(Base):
+    # one uploaded file; the table doubles as the work queue (no external broker)
+    __tablename__ = "ingest_items"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("ingest_jobs.id"), index=True)
+    filename = Column(String, default="")
+    path = Column(String)
+    file_sha256 = Column(String(64), index=True, nullable=True)
+    status = Column(String, index=True, default="queued")  # queued, running, waiting (dedup), done, dead
+    stage = Column(String, default="")  # last pipeline stage reached: parse, anonymize, embed
+    attempts = Column(Integer, default=0)
+    error = Column(Text, default="")
+    resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    job = relationship("IngestJob", back_populates="items")
+
+class MatchScore(Base):
+    # materialized resume x JD matrix, kept current by app/matrix.py
+    __tablename__ = "match_scores"
+    resume_id = Column(Integer, ForeignKey("resumes.id"), primary_key=True)
+    jd_id = Column(Integer, ForeignKey("job_descriptions.id"), primary_key=True, index=True)
+    score = Column(Float)
+    verdict = Column(String)
+    hard_coverage = Column(Float)
+    soft_similarity = Column(Float)
+    ats_norm = Column(Float)
+    missing_must = Column(Integer, default=0)
+    skill_hits = Column(LargeBinary, nullable=True)  # HIT_* flags per JD skill (must + good order), see scoring.py
+    ontology_version = Column(String, default="")
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class MatrixTask(Base):
+    # matrix work submitted in a worker that isn't running the maintainer; the
+    # process that is drains it (like ingest_items, the table is the hand-off)
+    __tablename__ = "matrix_tasks"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String)  # jd, resume
+    key = Column(Integer)
+    only_missing = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,41 +1,42 @@
-import spacy, json, os, re
-from rapidfuzz import fuzz, process
+import os, re
 from typing import List, Dict
+from .anonymize import ANONYMIZE_NER
+from .lazy import LazyModel
+from .matcher import compile_skills, normalize_token, tokenize
+from .metrics import timed
+from .ontology import get_ontology
 
-nlp = spacy.load("en_core_web_sm")
-ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY", "data/skill_ontology.json")
-with open(ONTOLOGY_PATH, "r", encoding="utf-8") as f:
-    SKILL_ONTOLOGY = json.load(f)
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+# only named entities are used: these components are never loaded
+SPACY_EXCLUDE = ["parser", "tagger", "attribute_ruler", "lemmatizer", "senter"]
 
+def _load_spacy():
+    import spacy
+    return spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+
+# only NER redaction needs spaCy on the request path; otherwise it loads on first use
+nlp = LazyModel("spacy", _load_spacy, warm=lambda m: m("Warm up in London."), required=ANONYMIZE_NER)
+
+@timed("nlp.entities")
 def extract_entities(text: str) -> Dict[str, List[str]]:
-    doc = nlp(text)
+    model = nlp.get()
+    # per-call disable (thread-safe, unlike select_pipes): anything but NER and what it listens to
+    doc = model(text, disable=[p for p in model.pipe_names if p not in ("ner", "tok2vec")])
     names = [ent.text for ent in doc.ents if ent.label_ in ("PERSON",)]
     orgs = [ent.text for ent in doc.ents if ent.label_ in ("ORG",)]
     locs = [ent.text for ent in doc.ents if ent.label_ in ("GPE", "LOC")]
     return {"names": names, "orgs": orgs, "locs": locs}
 
-def normalize_token(t: str) -> str:
-    return re.sub(r"[^a-z0-9+#+.\- ]", " ", t.lower()).strip()
-
+@timed("nlp.extract_skills")
 def extract_skills(text: str, seed: List[str] = None) -> List[str]:
     # heuristic: vocabulary from ontology + discovered n-grams that match closely
-    base = set()
-    for role in SKILL_ONTOLOGY.values():
-        for sk in role.get("must_have", []) + role.get("good_to_have", []):
-            base.add(normalize_token(sk))
+    onto = get_ontology()
+    matcher = onto.matcher
     if seed:
-        base |= set(normalize_token(s) for s in seed)
-    candidates = set()
-    words = [normalize_token(w) for w in text.split()]
-    grams = set()
-    for n in [1, 2, 3]:
-        for i in range(len(words)-n+1):
-            grams.add(" ".join(words[i:i+n]).strip())
-    for g in grams:
-        match, score, _ = process.extractOne(g, list(base)) if base else (None, 0, None)
-        if score >= 90:
-            candidates.add(match)
-    return sorted(candidates)
+        matcher = compile_skills(tuple(sorted(set(matcher.skills) | {normalize_token(s) for s in seed})))
+    if not len(matcher):
+        return []
+    return sorted({onto.canonical(s) for s in matcher.match(tokenize(text), max_n=3, cutoff=90)})
 
 def classify_career_stage(text: str) -> str:
     # very simple heuristic classifier
@@ -49,16 +50,7 @@ def classify_career_stage(text: str) -> str:
     if exp_years <= 5: return "mid"
     return "senior"
 
+@timed("nlp.parse_jd")
 def parse_jd(raw_text: str) -> Dict:
     # Extract lists by cue words; optionally enriched by ontology
-    lower = raw_text.lower()
-    must = []
-    good = []
-    for role, info in SKILL_ONTOLOGY.items():
-        for s in info.get("must_have", []):
-            if s in lower: must.append(s)
-        for s in info.get("good_to_have", []):
-            if s in lower: good.append(s)
-    must = sorted(set(must))
-    good = sorted(set(good))
-    return {"must_have": must, "good_to_have": good}
+    return get_ontology().derive_jd_skills(raw_text)
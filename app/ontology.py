@@ -0,0 +1,123 @@
+import hashlib, json, os, threading, time
+from typing import Dict, List, Optional, Tuple
+from .matcher import SkillMatcher, normalize_token, tokenize
+
+ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY", "data/skill_ontology.json")
+# how often (seconds) a worker stats the file looking for a new version
+RELOAD_INTERVAL = float(os.getenv("SKILL_ONTOLOGY_RELOAD_S", "5"))
+
+
+class Ontology:
+    """One immutable, fully indexed version of the skill ontology.
+
+    File format::
+
+        {"aliases": {"k8s": "kubernetes"},
+         "roles": {"software_engineer": {"must_have": [...], "good_to_have": [...]}}}
+
+    The older flat ``{role: {...}}`` layout is still accepted.
+    """
+
+    def __init__(self, data: Dict, version: str):
+        roles = data["roles"] if isinstance(data.get("roles"), dict) else data
+        self.version = version
+        self.loaded_at = time.time()
+        self.roles: Dict[str, Dict[str, List[str]]] = {
+            r: {"must_have": [normalize_token(s) for s in info.get("must_have", [])],
+                "good_to_have": [normalize_token(s) for s in info.get("good_to_have", [])]}
+            for r, info in roles.items() if isinstance(info, dict)
+        }
+        self.must_skills = frozenset(s for info in self.roles.values() for s in info["must_have"])
+        self.good_skills = frozenset(s for info in self.roles.values() for s in info["good_to_have"])
+        self.skills: List[str] = sorted(self.must_skills | self.good_skills)
+        # skill -> roles it belongs to, for role suggestions and reporting
+        self.skill_roles: Dict[str, List[str]] = {}
+        for r, info in self.roles.items():
+            for s in info["must_have"] + info["good_to_have"]:
+                self.skill_roles.setdefault(s, [])
+                if r not in self.skill_roles[s]:
+                    self.skill_roles[s].append(r)
+        self.aliases: Dict[str, str] = {normalize_token(a): normalize_token(c)
+                                        for a, c in data.get("aliases", {}).items()}
+        self._alias_of: Dict[str, Tuple[str, ...]] = {}
+        for a, c in self.aliases.items():
+            self._alias_of[c] = self._alias_of.get(c, ()) + (a,)
+        self.matcher = SkillMatcher(self.skills + list(self.aliases))
+
+    def canonical(self, skill: str) -> str:
+        s = normalize_token(skill)
+        return self.aliases.get(s, s)
+
+    def aliases_of(self, skill: str) -> Tuple[str, ...]:
+        return self._alias_of.get(self.canonical(skill), ())
+
+    def derive_jd_skills(self, raw_text: str) -> Dict:
+        hits = {self.canonical(s) for s in self.matcher.find_exact(tokenize(raw_text))}
+        return {"must_have": sorted(hits & self.must_skills), "good_to_have": sorted(hits & self.good_skills),
+                "ontology_version": self.version}
+
+    def summary(self) -> Dict:
+        return {"version": self.version, "loaded_at": self.loaded_at, "roles": len(self.roles),
+                "skills": len(self.skills), "aliases": len(self.aliases)}
+
+
+def load_ontology(path: str) -> Ontology:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return Ontology(json.loads(raw.decode("utf-8")), hashlib.sha256(raw).hexdigest()[:12])
+
+
+class OntologyStore:
+    # Readers grab ``current`` once and use that snapshot for the whole call; a
+    # reload builds the new Ontology off to the side and swaps one reference.
+    def __init__(self, path: str, interval: float = RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._checked = time.monotonic()
+        self.current = load_ontology(path)
+
+    def get(self) -> Ontology:
+        now = time.monotonic()
+        if self.interval >= 0 and now - self._checked >= self.interval:
+            self._checked = now
+            try:
+                if os.stat(self.path).st_mtime_ns != self._mtime:
+                    self.reload()
+            except OSError:
+                pass  # keep serving the last good version
+        return self.current
+
+    def reload(self, force: bool = False) -> Ontology:
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if not force and mtime == self._mtime:
+                return self.current
+            try:
+                fresh = load_ontology(self.path)
+            except (OSError, ValueError) as e:
+                print(f"❌ Ontology reload failed, keeping {self.current.version}: {e}")
+                return self.current
+            self._mtime = mtime
+            if fresh.version != self.current.version:
+                print(f"✅ Ontology reloaded: {self.current.version} -> {fresh.version}")
+                self.current = fresh
+            return self.current
+
+
+_store: Optional[OntologyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> OntologyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = OntologyStore(ONTOLOGY_PATH)
+    return _store
+
+
+def get_ontology() -> Ontology:
+    return get_store().get()
@@ -0,0 +1,19 @@
+import base64, json
+from typing import List, Optional
+from fastapi import HTTPException
+
+# opaque keyset cursors: the sort key of the last row a page returned
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List]:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(400, "Invalid cursor")
+    return values
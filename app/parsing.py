@@ -1,16 +1,109 @@
-import pdfplumber, docx2txt, os
+import os, time
+from typing import Dict, Iterator, Tuple
+import pdfplumber, docx2txt
+from .metrics import timed
 from .utils import split_sections
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # text-layer fast path is optional; pdfplumber handles everything
+    pdfium = None
+
+# extraction caps: a document past any of them is truncated, not rejected
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "50"))
+MAX_TEXT_BYTES = int(os.getenv("EXTRACT_MAX_TEXT_BYTES", str(1024 * 1024)))
+MAX_SECONDS = float(os.getenv("EXTRACT_MAX_SECONDS", "20"))
+# auto: pdfium text layer first, pdfplumber layout analysis only when needed
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")
+
+def _garbled(text: str) -> bool:
+    # pdfium emits U+FFFD for glyphs it can't map; pdfplumber often can
+    return text.count("\ufffd") > max(3, len(text) // 20)
+
+def _plumber_page(page) -> str:
+    try:
+        return page.extract_text() or ""
+    finally:
+        # drop the page's cached layout objects before moving on
+        (getattr(page, "close", None) or page.flush_cache)()
+
+def iter_pdf_pages(path: str, engine: str = PDF_ENGINE) -> Iterator[Tuple[str, str]]:
+    """Yield (text, engine) per page, holding one page's objects at a time."""
+    if engine in ("auto", "pdfium") and pdfium is not None:
+        try:
+            doc = pdfium.PdfDocument(path)
+        except Exception:
+            doc = None  # damaged or unusual file: let pdfplumber try
+        if doc is not None:
+            plumber = None
+            try:
+                for i in range(len(doc)):
+                    page = doc[i]
+                    try:
+                        tp = page.get_textpage()
+                        text = tp.get_text_range().replace("\r\n", "\n")
+                        tp.close()
+                    except Exception:
+                        text = None
+                    finally:
+                        page.close()
+                    if text is None or (engine == "auto" and _garbled(text)):
+                        plumber = plumber or pdfplumber.open(path)
+                        yield _plumber_page(plumber.pages[i]), "pdfplumber"
+                    else:
+                        yield text, "pdfium"
+            finally:
+                doc.close()
+                if plumber is not None:
+                    plumber.close()
+            return
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            yield _plumber_page(page), "pdfplumber"
+
+def extract_pdf(path: str, max_pages: int = MAX_PAGES, max_bytes: int = MAX_TEXT_BYTES,
+                max_seconds: float = MAX_SECONDS, engine: str = PDF_ENGINE) -> Tuple[str, Dict]:
+    # pages are consumed one at a time; only the (capped) text is kept
+    t0 = time.perf_counter()
+    parts, size, pages = [], 0, 0
+    engines = set()
+    truncated = ""
+    pages_iter = iter_pdf_pages(path, engine)
+    try:
+        for text, used in pages_iter:
+            if pages >= max_pages:
+                truncated = "pages"
+                break
+            pages += 1
+            engines.add(used)
+            encoded = len(text.encode("utf-8", "ignore"))
+            if size + encoded > max_bytes:
+                parts.append(text.encode("utf-8", "ignore")[:max_bytes - size].decode("utf-8", "ignore"))
+                truncated = "bytes"
+                break
+            parts.append(text)
+            size += encoded
+            if time.perf_counter() - t0 > max_seconds:
+                truncated = "time"
+                break
+    finally:
+        pages_iter.close()
+    info = {"pages": pages, "engine": "+".join(sorted(engines)), "truncated": truncated,
+            "seconds": time.perf_counter() - t0}
+    if truncated:
+        print(f"❌ PDF truncated ({truncated}) after {pages} pages: {os.path.basename(path)}")
+    return "\n".join(parts), info
+
+@timed("parsing.extract")
 def extract_text_from_file(path: str) -> str:
     _, ext = os.path.splitext(path.lower())
     if ext == ".pdf":
-        with pdfplumber.open(path) as pdf:
-            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+        return extract_pdf(path)[0]
     elif ext in [".docx"]:
-        return docx2txt.process(path) or ""
+        return (docx2txt.process(path) or "")[:MAX_TEXT_BYTES]
     else:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+            return f.read(MAX_TEXT_BYTES)
 
 def standardize(text: str) -> str:
     # normalize spaces and headers/footers heuristics
@@ -19,6 +112,7 @@ def standardize(text: str) -> str:
     lines = [l for l in lines if not l.lower().startswith("page ")]
     return "\n".join(lines)
 
+@timed("parsing.parse_resume")
 def parse_resume(text: str):
     std = standardize(text)
     sections = split_sections(std)
@@ -0,0 +1,92 @@
+import os, re, sys, threading, time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+# opt-in per-request profiling: with PROFILE_REQUESTS=1, a request carrying an
+# "X-Profile: 1" header is sampled and written to PROFILE_DIR as collapsed
+# stacks ("frame;frame;frame count"), the input of flamegraph.pl and speedscope
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# leaf frames of a thread that is parked, not working (the batcher, the maintainer)
+_IDLE = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+
+
+def _frame(code) -> str:
+    path = code.co_filename
+    if path.startswith(_APP_DIR):
+        path = "app" + path[len(_APP_DIR):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples every thread's stack on a timer.
+
+    Sync handlers and their helpers run in the threadpool and the CPU pool
+    threads, not on the event loop, so a tracing profiler started in the
+    middleware (cProfile, pyinstrument) would only see the loop waiting.
+    Sampling all threads catches them; idle threads and stacks that never
+    enter app code are dropped.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me or (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE:
+                    continue
+                stack, in_app = [], False
+                while frame is not None:
+                    in_app = in_app or frame.f_code.co_filename.startswith(_APP_DIR)
+                    stack.append(_frame(frame.f_code))
+                    frame = frame.f_back
+                if not in_app:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(tid, str(tid)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+@contextmanager
+def profile(label: str):
+    """Sample while the block runs; yields the path the profile is written to."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:80]
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{slug}.folded")
+    sampler = StackSampler()
+    sampler.start()
+    try:
+        yield path
+    finally:
+        sampler.stop()
+        sampler.write(path)
+        print(f"✅ Profile written: {path} ({sampler.samples} samples)")
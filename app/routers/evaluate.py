@@ -1,107 +1,244 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import numpy as np
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, select, tuple_
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
+from .. import details, evalcache
+from ..analysis import is_current, variant
+from ..db import SessionLocal, get_db
+from ..details import DETAIL_FIELDS
+from ..evalcache import eval_key
+from ..metrics import timed
 from ..models import Resume, JobDescription, Evaluation
-from ..schemas import EvaluateRequest, EvaluationOut
-from ..scoring import hard_match_scores, combine_score
-from ..semantic import embed, cosine
-from ..utils import anonymize_pii, bullet_density
-from ..explain import evidence_cards, shap_like
-from ..feedback import generate_feedback
-from typing import List
-from ..schemas import EvaluationOut 
+from ..pagination import decode_cursor, encode_cursor
+from ..schemas import EvaluateRequest, EvaluationOut, BatchEvaluateRequest, DashboardPage, DashboardRow, EvaluationDetails, RescoreRequest
+from ..scoring import score_fields
+from ..semantic import embed, embed_many, cosine
+from ..tasks import build_analysis, score_fields_args
+from ..whatif import components, pending, rescore
+from ..workers import cpu_pool, embed_pool
 router = APIRouter(prefix="/evaluate", tags=["evaluate"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def ats_report(resume_text: str, jd_must) -> dict:
-    bd = bullet_density(resume_text)
-    has_secs = any(h in resume_text.lower() for h in ["experience", "education", "skills", "projects"])
-    kc_hits = sum(1 for s in jd_must if s in resume_text.lower())
-    kc = kc_hits / max(1, len(jd_must))
-    score = 100 * (0.4*kc + 0.4*min(1.0, max(0.0, bd/0.4)) + 0.2*(1 if has_secs else 0))
-    return {"bullet_density": bd, "bullet_density_ok": 0.15 <= bd <= 0.5, "has_sections": has_secs, "keyword_coverage": kc, "score": score}
-
 @router.post("/", response_model=EvaluationOut)
-async def evaluate(req: EvaluateRequest, db: Session = Depends(get_db)):
-    resume = db.get(Resume, req.resume_id)
-    jd = db.get(JobDescription, req.jd_id)
+async def evaluate(req: EvaluateRequest, force: bool = False, db: Session = Depends(get_db)):
+    # idempotent: one stored evaluation per (resume, JD, flag), reused while its inputs are unchanged
+    def _load():
+        with timed("db.load"):
+            return db.get(Resume, req.resume_id), db.get(JobDescription, req.jd_id)
+    resume, jd = await run_in_threadpool(_load)
     if not resume or not jd:
         raise HTTPException(404, "Resume or JD not found")
 
     rtext = resume.anonymized_text if req.bias_anonymize else resume.raw_text
-    hard = hard_match_scores(rtext, jd.must_have or [], jd.good_to_have or [])
+    cache_key = eval_key(resume.id, jd.id, rtext, jd.raw_text, jd.must_have, jd.good_to_have, req.bias_anonymize)
+    if not force:
+        out = evalcache.get(cache_key)
+        if out is not None:
+            return out
+
+        def _stored():
+            with timed("db.load"):
+                ev = db.scalars(select(Evaluation).where(
+                    Evaluation.resume_id == resume.id, Evaluation.jd_id == jd.id,
+                    Evaluation.bias_anonymized == req.bias_anonymize, Evaluation.cache_key == cache_key)).first()
+                found = details.load(db, ev) if ev else None
+                return _evaluation_out(ev, found[1]) if found else None
+        out = await run_in_threadpool(_stored)
+        if out is not None:
+            evalcache.count("db_hits")
+            evalcache.put(cache_key, out)
+            return out
+    # identical requests in flight (a double-submit) wait for this one's result; a
+    # forced one never joins a normal computation that may have started on stale state
+    flight_key = f"{cache_key}:force" if force else cache_key
+    return await evalcache.flight.do(flight_key, lambda: _compute(db, resume, jd, rtext, req.bias_anonymize, cache_key))
+
+async def _compute(db: Session, resume: Resume, jd: JobDescription, rtext: str, bias_anonymize: bool,
+                   cache_key: str) -> dict:
+    key = variant(bias_anonymize)
+    analyses = await run_in_threadpool(lambda: resume.analysis)  # deferred column: load off the event loop
+    stored = (analyses or {}).get(key)
+    if not is_current(rtext or "", stored):
+        # resumes stored before analyses were persisted: build once and keep it
+        stored = await cpu_pool.run(build_analysis, rtext or "")
+        resume.analysis = {**(analyses or {}), key: stored}
     # soft similarity
     r_emb = resume.embedding
-    j_emb = embed(jd.raw_text)
+    j_emb = jd.embedding
+    if j_emb is None:
+        # JDs uploaded before embeddings were stored: compute once and keep it
+        j_emb = jd.embedding = await embed_pool.run(embed, jd.raw_text)
     soft_sim = cosine(r_emb, j_emb)
-    ats = ats_report(rtext, jd.must_have or [])
-    combined = combine_score(hard, soft_sim, ats)
+    fields = await cpu_pool.run(score_fields, rtext, resume.career_stage, jd.id, jd.must_have, jd.good_to_have,
+                                soft_sim, bias_anonymize, stored)
 
-    missing_elements = {
-        "skills": hard["missing_must"],
-        "certifications": [],  # could be inferred with regex list
-        "projects": []  # can be inferred if no 'projects' section present
-    }
-    expl_cards = evidence_cards(rtext, (jd.must_have or []) + (jd.good_to_have or []))
-    shap = shap_like(combined["weights"], combined["components"])
-    feedback = generate_feedback(resume.career_stage, hard["missing_must"], ats)
+    def _save():
+        with timed("db.commit"):
+            ev_id = evalcache.upsert(db, [dict(resume_id=resume.id, cache_key=cache_key, **fields)])[0]
+            db.commit()
+            return _evaluation_out(db.get(Evaluation, ev_id, populate_existing=True), fields)
+    out = await run_in_threadpool(_save)
+    evalcache.count("computed")
+    evalcache.put(cache_key, out)
+    return out
 
-    ev = Evaluation(
-        resume_id=resume.id,
-        jd_id=jd.id,
-        relevance_score=combined["overall"],
-        verdict=combined["verdict"],
-        hard_match=hard,
-        soft_match={"similarity": soft_sim},
-        missing_elements=missing_elements,
-        feedback=feedback,
-        explainability={"evidence": expl_cards, "contributions": shap},
-        ats_report=ats,
-        bias_anonymized=req.bias_anonymize
-    )
-    db.add(ev); db.commit(); db.refresh(ev)
-    return ev
-@router.get("/dashboard")
-def get_evaluations(
-    job_title: str = "",
-    min_score: float = 0.0,
-    location: str = "",
-    db: Session = Depends(get_db)
-):
-    query = db.query(Evaluation).join(Resume).join(JobDescription)
+def _evaluation_out(ev: Evaluation, detail: dict) -> dict:
+    # the narrow row plus its detail payload, in the EvaluationOut shape
+    hot = {c: getattr(ev, c) for c in ("id", "relevance_score", "verdict", "hard_coverage", "soft_similarity",
+                                       "ats_norm", "missing_elements", "bias_anonymized")}
+    return EvaluationOut.model_validate({**hot, **{k: detail.get(k) for k in DETAIL_FIELDS},
+                                         "resume": ev.resume, "jd": ev.jd}, from_attributes=True).model_dump()
 
-    if job_title:
-        query = query.filter(JobDescription.title.ilike(f"%{job_title}%"))
-    if location:
-        query = query.filter(Resume.location.ilike(f"%{location}%"))
-    query = query.filter(Evaluation.relevance_score >= min_score)
+@router.get("/{evaluation_id}/details", response_model=EvaluationDetails)
+def evaluation_details(evaluation_id: int, db: Session = Depends(get_db)):
+    ev = db.get(Evaluation, evaluation_id)
+    if not ev:
+        raise HTTPException(404, "Evaluation not found")
+    found = details.load(db, ev)
+    if found is not None:
+        source, d = found
+        return {"evaluation_id": ev.id, "source": source, **d}
+    # no stored payload (rows from before details were kept): rebuild it from the
+    # stored analysis and similarity, and keep it
+    resume, jd = ev.resume, ev.jd
+    rtext = resume.anonymized_text if ev.bias_anonymized else resume.raw_text
+    key = eval_key(resume.id, jd.id, rtext, jd.raw_text, jd.must_have, jd.good_to_have, ev.bias_anonymized)
+    current = ev.cache_key == key
+    stored = (resume.analysis or {}).get(variant(ev.bias_anonymized))
+    if current and ev.soft_similarity is not None:
+        soft_sim = ev.soft_similarity
+    else:
+        if jd.embedding is None:
+            jd.embedding = embed(jd.raw_text)
+        soft_sim = cosine(resume.embedding, jd.embedding)
+    fields = score_fields(rtext or "", resume.career_stage, jd.id, jd.must_have, jd.good_to_have, soft_sim,
+                          ev.bias_anonymized, stored if is_current(rtext or "", stored) else None)
+    d = details.split(fields)[1]
+    if current:
+        details.store(db, [ev.id], [d])
+        db.commit()
+        return {"evaluation_id": ev.id, "source": "recomputed", **d}
+    # the JD, resume or ontology changed since the row was scored: details built
+    # now wouldn't match its score, so the whole evaluation is redone, as _compute does
+    ev_id = evalcache.upsert(db, [dict(resume_id=resume.id, cache_key=key, **fields)])[0]
+    db.commit()
+    evalcache.put(key, _evaluation_out(db.get(Evaluation, ev_id, populate_existing=True), fields))
+    return {"evaluation_id": ev_id, "source": "rescored", **d}
+
+BATCH_CHUNK = 256
+
+@router.post("/batch")
+def evaluate_batch(req: BatchEvaluateRequest, db: Session = Depends(get_db)):
+    jd = db.get(JobDescription, req.jd_id)
+    if not jd:
+        raise HTTPException(404, "JD not found")
+    if jd.embedding is None:
+        jd.embedding = embed(jd.raw_text)
+        db.commit()
+    text_col = Resume.anonymized_text if req.bias_anonymize else Resume.raw_text
+    q = select(Resume.id, text_col.label("text"), Resume.career_stage, Resume.embedding, Resume.analysis)
+    if req.resume_ids is not None:
+        q = q.where(Resume.id.in_(req.resume_ids))
+    else:
+        # every resume not yet evaluated against this JD with this flag
+        q = q.where(~exists().where(Evaluation.resume_id == Resume.id, Evaluation.jd_id == jd.id,
+                                    Evaluation.bias_anonymized == req.bias_anonymize))
+    rows = db.execute(q.order_by(Resume.id)).all()
+    missing = sorted(set(req.resume_ids or []) - {r.id for r in rows})
+    j_vec = np.asarray(jd.embedding, dtype=np.float32)
+    # plain values: the request session goes away before the body streams
+    jd_id, jd_text, must, good = jd.id, jd.raw_text, jd.must_have, jd.good_to_have
+    key = variant(req.bias_anonymize)
 
-    results = query.order_by(Evaluation.relevance_score.desc()).limit(50).all()
-    return results
+    def stream():
+        # own session: the request-scoped one is closed before the body streams
+        session = SessionLocal()
+        done = 0
+        try:
+            for rid in missing:
+                yield json.dumps({"resume_id": rid, "error": "Resume not found"}) + "\n"
+            for start in range(0, len(rows), BATCH_CHUNK):
+                chunk = rows[start:start + BATCH_CHUNK]
+                todo = [r for r in chunk if r.embedding is None]
+                fresh = dict(zip((r.id for r in todo), embed_many([r.text or "" for r in todo])))
+                embs = [r.embedding if r.embedding is not None else fresh[r.id] for r in chunk]
+                # soft similarity for the whole chunk in one matrix-vector product
+                sims = np.clip(np.asarray(embs, dtype=np.float32) @ j_vec, -1.0, 1.0)
+                # hard matching / ATS / evidence fan out over the CPU pool
+                fields = cpu_pool.map(score_fields_args, [(r.text or "", r.career_stage, jd_id, must, good, float(sim),
+                                                           req.bias_anonymize, (r.analysis or {}).get(key))
+                                                          for r, sim in zip(chunk, sims)], chunksize=16)
+                records = [dict(resume_id=r.id, cache_key=eval_key(r.id, jd_id, r.text, jd_text, must, good, req.bias_anonymize), **f)
+                           for r, f in zip(chunk, fields)]
+                ids = evalcache.upsert(session, records)
+                # commit per chunk: streamed ids always exist, and SQLite's write
+                # lock is held for one chunk rather than the whole stream
+                session.commit()
+                for ev_id, rec in zip(ids, records):
+                    yield json.dumps({"evaluation_id": ev_id, "resume_id": rec["resume_id"],
+                                      "score": rec["relevance_score"], "verdict": rec["verdict"]}) + "\n"
+                done += len(records)
+            yield json.dumps({"done": True, "jd_id": jd_id, "evaluated": done, "not_found": len(missing)}) + "\n"
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Batch evaluation error: {e}")
+            yield json.dumps({"done": False, "jd_id": jd_id, "evaluated": done, "error": str(e)}) + "\n"
+        finally:
+            session.close()
 
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
- # Make sure this is imported
+@router.post("/rescore")
+def rescore_jd(req: RescoreRequest, db: Session = Depends(get_db)):
+    # what-if re-ranking from the stored match_scores components: no model, no resume text
+    jd = db.get(JobDescription, req.jd_id)
+    if not jd:
+        raise HTTPException(404, "JD not found")
+    if req.assume_skills and req.resume_id is None:
+        raise HTTPException(400, "assume_skills needs a resume_id")
+    waiting = pending(db, jd.id)
+    c = components(db, jd)
+    try:
+        out = rescore(c, req.weights, req.add_must, req.remove_must, req.resume_id, req.assume_skills,
+                      req.top_k, req.min_score)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except KeyError:
+        raise HTTPException(404, "Resume has no match score for this JD yet")
+    # candidates still being scored in the background are not in the ranking yet
+    return {"jd_id": jd.id, "pending": waiting, **out}
 
-@router.get("/dashboard", response_model=List[EvaluationOut])
+@router.get("/dashboard", response_model=DashboardPage)
 def get_evaluations(
     job_title: str = "",
     min_score: float = 0.0,
     location: str = "",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Evaluation).join(Resume).join(JobDescription)
-
+    # one joined query over just the displayed columns, paged by (score, id)
+    q = (select(Evaluation.id, Evaluation.resume_id, Evaluation.jd_id, Evaluation.relevance_score,
+                Evaluation.verdict, Evaluation.missing_elements, Evaluation.created_at,
+                JobDescription.title, JobDescription.company, Resume.location, Resume.career_stage)
+         .join(Resume, Evaluation.resume_id == Resume.id)
+         .join(JobDescription, Evaluation.jd_id == JobDescription.id)
+         .where(Evaluation.relevance_score >= min_score))
     if job_title:
-        query = query.filter(JobDescription.title.ilike(f"%{job_title}%"))
+        q = q.where(JobDescription.title.ilike(f"%{job_title}%"))
     if location:
-        query = query.filter(Resume.location.ilike(f"%{location}%"))
-    query = query.filter(Evaluation.relevance_score >= min_score)
-
-    results = query.order_by(Evaluation.relevance_score.desc()).limit(50).all()
-    return results
+        q = q.where(Resume.location.ilike(f"%{location}%"))
+    after = decode_cursor(cursor, 2)
+    if after:
+        q = q.where(tuple_(Evaluation.relevance_score, Evaluation.id) < tuple_(*after))
+    rows = db.execute(q.order_by(Evaluation.relevance_score.desc(), Evaluation.id.desc()).limit(limit + 1)).all()
+    items = [DashboardRow(evaluation_id=r.id, resume_id=r.resume_id, jd_id=r.jd_id, relevance_score=r.relevance_score,
+                          verdict=r.verdict or "", jd_title=r.title or "", company=r.company or "",
+                          location=r.location or "", career_stage=r.career_stage or "unknown",
+                          missing_skills=(r.missing_elements or {}).get("skills", []), created_at=r.created_at)
+             for r in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].relevance_score, rows[limit - 1].id) if len(rows) > limit else None
+    return DashboardPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from ..db import get_db
+from ..ingest import job_progress
+from ..models import IngestItem
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    progress = job_progress(db, job_id)
+    if progress is None:
+        raise HTTPException(404, "Job not found")
+    return progress
+
+@router.get("/{job_id}/items")
+def job_items(job_id: int, status: str | None = None, db: Session = Depends(get_db)):
+    q = select(IngestItem.id, IngestItem.filename, IngestItem.status, IngestItem.stage,
+               IngestItem.attempts, IngestItem.error, IngestItem.resume_id).where(IngestItem.job_id == job_id)
+    if status:
+        q = q.where(IngestItem.status == status)
+    return [dict(r._mapping) for r in db.execute(q.order_by(IngestItem.id))]
+
+@router.post("/{job_id}/retry")
+def retry_dead(job_id: int, db: Session = Depends(get_db)):
+    # put dead-lettered items back on the queue with a fresh attempt budget
+    res = db.execute(update(IngestItem).where(IngestItem.job_id == job_id, IngestItem.status == "dead",
+                                              IngestItem.stage != "upload")
+                     .values(status="queued", attempts=0, locked_at=None))
+    db.commit()
+    return {"job_id": job_id, "requeued": res.rowcount}
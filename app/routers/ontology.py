@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from ..db import get_db
+from ..matrix import maintainer
+from ..models import Evaluation, JobDescription
+from ..nlp import parse_jd
+from ..ontology import get_ontology, get_store
+
+router = APIRouter(prefix="/ontology", tags=["ontology"])
+
+@router.get("/")
+def ontology_info():
+    return get_ontology().summary()
+
+@router.post("/reload")
+def reload_ontology():
+    return get_store().reload(force=True).summary()
+
+@router.get("/stale")
+def stale(db: Session = Depends(get_db)):
+    # rows produced under an older ontology; "" means the version was not recorded
+    version = get_ontology().version
+    jd_ids = db.scalars(select(JobDescription.id).where(
+        JobDescription.ontology_version != "", JobDescription.ontology_version != version)).all()
+    evals = db.scalar(select(func.count(Evaluation.id)).where(Evaluation.ontology_version != version))
+    return {"version": version, "stale_jd_ids": jd_ids, "stale_evaluations": evals}
+
+@router.post("/rederive")
+def rederive(db: Session = Depends(get_db)):
+    # re-derive skill lists only for JDs whose lists all came from an older
+    # ontology; a JD with a hand-written list is stored with version ""
+    version = get_ontology().version
+    jds = db.scalars(select(JobDescription).where(
+        JobDescription.ontology_version != "", JobDescription.ontology_version != version)).all()
+    for jd in jds:
+        derived = parse_jd(jd.raw_text or "")
+        jd.must_have = derived["must_have"]
+        jd.good_to_have = derived["good_to_have"]
+        jd.ontology_version = derived["ontology_version"]
+    db.commit()
+    for jd in jds:
+        maintainer.submit_jd(jd.id)
+    return {"version": version, "rederived_jd_ids": [jd.id for jd in jds]}
@@ -1,47 +1,168 @@
-from fastapi import APIRouter, Depends
+import csv, io, json, os, time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..db import SessionLocal
+from sqlalchemy import select, tuple_
+from ..db import SessionLocal, get_db
 from ..models import Evaluation, Resume, JobDescription
+from ..semantic import embed
+from ..vector_index import get_index
+from ..analysis import variant
+from ..matrix import resume_row
+from ..pagination import decode_cursor, encode_cursor
+from ..scoring import score_fields
+
+try:  # parquet export is optional
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 router = APIRouter(prefix="/search", tags=["search"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# rows fetched per round trip from the server-side cursor, and per parquet row group
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "5000"))
+EXPORT_COLUMNS = ("evaluation_id", "resume_id", "score", "verdict", "career_stage", "location")
+EXPORT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+def shortlist_query(jd_id: int, min_score: float, location: str | None, career_stage: str | None):
+    # filters run in SQL so a page is always `limit` rows when enough exist;
+    # ix_evaluations_jd_score serves the jd_id filter and the ordering
+    q = (select(Evaluation.id, Evaluation.resume_id, Evaluation.relevance_score, Evaluation.verdict,
+                Resume.career_stage, Resume.location)
+         .join(Resume, Evaluation.resume_id == Resume.id)
+         .where(Evaluation.jd_id == jd_id, Evaluation.relevance_score >= min_score))
+    if location:
+        q = q.where(Resume.location.ilike(f"%{location}%"))
+    if career_stage:
+        q = q.where(Resume.career_stage == career_stage)
+    return q.order_by(Evaluation.relevance_score.desc(), Evaluation.id.desc())
 
 @router.get("/shortlist")
-def shortlist(jd_id: int, min_score: float = 60.0, location: str | None = None, limit: int = 50, db: Session = Depends(get_db)):
-    q = select(Evaluation, Resume).join(Resume).where(Evaluation.jd_id == jd_id, Evaluation.relevance_score >= min_score).order_by(Evaluation.relevance_score.desc()).limit(limit)
-    rows = db.execute(q).all()
-    results = []
-    for ev, res in rows:
-        if location and res.location and location.lower() not in res.location.lower():
-            continue
-        results.append({
-            "evaluation_id": ev.id,
-            "resume_id": res.id,
-            "score": ev.relevance_score,
-            "verdict": ev.verdict,
-            "career_stage": res.career_stage
-        })
-    return results
+def shortlist(jd_id: int, min_score: float = 60.0, location: str | None = None, career_stage: str | None = None,
+              limit: int = Query(50, ge=1, le=500), cursor: str | None = None, db: Session = Depends(get_db)):
+    q = shortlist_query(jd_id, min_score, location, career_stage)
+    after = decode_cursor(cursor, 2)
+    if after:
+        q = q.where(tuple_(Evaluation.relevance_score, Evaluation.id) < tuple_(*after))
+    rows = db.execute(q.limit(limit + 1)).all()
+    results = [{
+        "evaluation_id": r.id,
+        "resume_id": r.resume_id,
+        "score": r.relevance_score,
+        "verdict": r.verdict,
+        "career_stage": r.career_stage,
+        "location": r.location
+    } for r in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].relevance_score, rows[limit - 1].id) if len(rows) > limit else None
+    return {"jd_id": jd_id, "items": results, "next_cursor": next_cursor}
+
+def _export_rows(q):
+    # own session: the request-scoped one is closed before the body streams.
+    # yield_per streams from a server-side cursor (named cursor on postgres), so
+    # memory is one chunk whatever the export size
+    with SessionLocal() as session:
+        for part in session.execute(q.execution_options(yield_per=EXPORT_CHUNK)).partitions():
+            yield [(r.id, r.resume_id, r.relevance_score, r.verdict, r.career_stage, r.location) for r in part]
+
+def _csv(chunks):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        w.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0); buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+def _ndjson(chunks):
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, r))) + "\n" for r in rows).encode("utf-8")
+
+class _Sink(io.RawIOBase):
+    # file-like the parquet writer writes into; drained into the response after each row group
+    def __init__(self):
+        self.parts, self.pos = [], 0
+    def writable(self):
+        return True
+    def write(self, b):
+        self.parts.append(bytes(b)); self.pos += len(b)
+        return len(b)
+    def tell(self):
+        return self.pos
+    def drain(self) -> bytes:
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+def _parquet(chunks):
+    schema = pa.schema([("evaluation_id", pa.int64()), ("resume_id", pa.int64()), ("score", pa.float64()),
+                        ("verdict", pa.string()), ("career_stage", pa.string()), ("location", pa.string())])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema)
+    for rows in chunks:
+        writer.write_table(pa.Table.from_pydict(dict(zip(EXPORT_COLUMNS, map(list, zip(*rows)))), schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+@router.get("/shortlist/export")
+def shortlist_export(jd_id: int, format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"), min_score: float = 60.0,
+                     location: str | None = None, career_stage: str | None = None, db: Session = Depends(get_db)):
+    # every matching candidate, streamed; same filters and order as /shortlist
+    if db.get(JobDescription, jd_id) is None:
+        raise HTTPException(404, "JD not found")
+    if format == "parquet" and pq is None:
+        raise HTTPException(501, "parquet export needs pyarrow")
+    q = shortlist_query(jd_id, min_score, location, career_stage)
+    body = {"csv": _csv, "ndjson": _ndjson, "parquet": _parquet}[format](_export_rows(q))
+    return StreamingResponse(body, media_type=EXPORT_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="shortlist_jd{jd_id}.{format}"'})
 
 @router.get("/matrix")
-def matrix(resume_id: int, db: Session = Depends(get_db)):
-    # match a resume against all JDs (multi-JD matrix)
-    jds = db.query(JobDescription).all()
-    evs = db.query(Evaluation).filter(Evaluation.resume_id == resume_id).all()
-    ev_map = {(e.jd_id): e for e in evs}
-    out = []
-    for jd in jds:
-        e = ev_map.get(jd.id)
-        out.append({
-            "jd_id": jd.id, "jd_title": jd.title, "company": jd.company,
-            "score": e.relevance_score if e else None,
-            "verdict": e.verdict if e else None
-        })
-    return out
+def matrix(resume_id: int, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500),
+           db: Session = Depends(get_db)):
+    # match a resume against all open JDs (multi-JD matrix), from match_scores
+    row = resume_row(db, resume_id, offset, limit)
+    if row is None:
+        raise HTTPException(404, "Resume not found")
+    return row
+
+def ensure_index(db: Session):
+    # first use on a database that predates the index: build it from stored embeddings
+    index = get_index()
+    if not len(index) and db.scalar(select(Resume.id).where(Resume.embedding.is_not(None)).limit(1)):
+        index.rebuild(db.execute(select(Resume.id, Resume.embedding).execution_options(yield_per=1000)))
+    return index
+
+@router.get("/semantic")
+def semantic_search(jd_id: int, k: int = Query(20, ge=1, le=1000), rescore: bool = False,
+                    bias_anonymize: bool = True, db: Session = Depends(get_db)):
+    # top-k resumes by embedding cosine without needing an Evaluation per pair
+    jd = db.get(JobDescription, jd_id)
+    if not jd:
+        raise HTTPException(404, "JD not found")
+    if jd.embedding is None:
+        jd.embedding = embed(jd.raw_text)
+        db.commit()
+    index = ensure_index(db)
+    t0 = time.perf_counter()
+    hits = index.search(jd.embedding, k)
+    search_ms = (time.perf_counter() - t0) * 1000
+    text_col = Resume.anonymized_text if bias_anonymize else Resume.raw_text
+    cols = [Resume.id, Resume.location, Resume.career_stage] + ([text_col.label("text"), Resume.analysis] if rescore else [])
+    rows = {r.id: r for r in db.execute(select(*cols).where(Resume.id.in_([i for i, _ in hits])))}
+    results = []
+    for rid, sim in hits:
+        r = rows.get(rid)
+        if r is None:
+            continue  # deleted since it was indexed
+        item = {"resume_id": rid, "similarity": sim, "location": r.location, "career_stage": r.career_stage}
+        if rescore:
+            # full scoring of just these k, not persisted
+            f = score_fields(r.text or "", r.career_stage, jd.id, jd.must_have, jd.good_to_have, sim, bias_anonymize,
+                             (r.analysis or {}).get(variant(bias_anonymize)))
+            item.update(score=f["relevance_score"], verdict=f["verdict"], missing_skills=f["hard_match"]["missing_must"])
+        results.append(item)
+    if rescore:
+        results.sort(key=lambda x: x["score"], reverse=True)
+    return {"jd_id": jd_id, "indexed": len(index), "search_ms": search_ms, "results": results}
@@ -1,52 +1,102 @@
-import os
+import os, zipfile
+from typing import List
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from ..models import Resume, JobDescription
-from ..schemas import ResumeOut, JDOut, JDCreate
-from ..nlp import parse_jd, classify_career_stage
-from ..parsing import extract_text_from_file, parse_resume
-from ..semantic import embed
-from ..utils import anonymize_pii
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+from .. import dedup
+from ..analysis import resume_analyses
+from ..anonymize import ANONYMIZE_NER, MASKS, POLICY, is_current, reapply
+from ..db import get_db
+from ..dedup import store_upload, text_fingerprint
+from ..models import Resume, JobDescription, IngestJob, IngestItem
+from ..ingest import job_progress
+from ..matrix import maintainer
+from ..schemas import ResumeOut, JDOut, JDCreate, JDStatus
+from ..nlp import classify_career_stage
+from ..semantic import embed, embed_many
+from ..tasks import anonymize_resume, derive_jd, parse_resume_file, prepare_jd_file
+from ..vector_index import get_index
+from ..workers import PoolSaturated, cpu_pool, embed_pool
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+RESUME_EXTS = (".pdf", ".docx", ".txt")
+MAX_FILE_BYTES = dedup.MAX_FILE_BYTES
 
-def get_db():
-    db = SessionLocal()
+def _save(db: Session, obj):
+    # blocking session work runs in the threadpool, off the event loop
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    if isinstance(obj, Resume):
+        get_index().add(obj.id, obj.embedding)
+    return obj
+
+def _find(db: Session, model, file_sha: str = None, text_sha: str = None, **match):
+    # existing row with the same bytes, or the same normalized text
+    if file_sha:
+        row = db.scalars(select(model).where(model.file_sha256 == file_sha)).first()
+        if row is not None:
+            return row, "file_hits"
+    if text_sha:
+        row = db.scalars(select(model).filter_by(text_sha256=text_sha, **match).order_by(model.id)).first()
+        if row is not None:
+            return row, "text_hits"
+    return None, None
+
+def _save_dedup(db: Session, obj, model, **match):
+    # a concurrent identical upload won the unique index: return its row
     try:
-        yield db
-    finally:
-        db.close()
+        return _save(db, obj)
+    except IntegrityError:
+        db.rollback()
+        row, _ = _find(db, model, obj.file_sha256, obj.text_sha256, **match)
+        if row is None:
+            raise
+        return row
 
 @router.post("/resume", response_model=ResumeOut)
 async def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_db)):
     try:
-        content = await file.read()
-        path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(path, "wb") as f:
-            f.write(content)
-
-        raw_text = extract_text_from_file(path)
-        std_text, sections = parse_resume(raw_text)
-        anonymized_text, _ = anonymize_pii(std_text)
+        # stored under its SHA-256, so same-named uploads no longer overwrite each other
+        path, file_sha, _ = await run_in_threadpool(store_upload, file.file, UPLOAD_DIR, file.filename)
+        dedup.count("resume")
+        r, hit = await run_in_threadpool(_find, db, Resume, file_sha)
+        if r is None:
+            std_text, sections = await cpu_pool.run(parse_resume_file, path)
+            text_sha = text_fingerprint(std_text)
+            r, hit = await run_in_threadpool(_find, db, Resume, None, text_sha)
+        if r is not None:
+            # identical upload: skip anonymization, the model and the insert
+            dedup.count("resume", hit)
+            print(f"✅ Resume deduplicated ({hit}): {r.id}")
+            return r
+
+        anonymized_text, analysis, pii = await cpu_pool.run(anonymize_resume, std_text)
         career_stage = classify_career_stage(std_text)
-        embedding = embed(anonymized_text)
+        embedding = await embed_pool.run(embed, anonymized_text)
 
         r = Resume(
             raw_text=std_text,
             anonymized_text=anonymized_text,
             sections=sections,
             career_stage=career_stage,
-            embedding=embedding
+            analysis=analysis,
+            pii=pii,
+            embedding=embedding,
+            file_sha256=file_sha,
+            text_sha256=text_sha
         )
-        db.add(r)
-        db.commit()
-        db.refresh(r)
+        r = await run_in_threadpool(_save_dedup, db, r, Resume)
+        maintainer.submit_resumes([r.id])
         print(f"✅ Resume saved: {r.id}")
         return r
+    except PoolSaturated:
+        raise
     except Exception as e:
         print(f"❌ Resume upload error: {e}")
         raise HTTPException(status_code=500, detail=f"Resume upload failed: {str(e)}")
@@ -54,20 +104,35 @@ async def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_
 @router.post("/jd", response_model=JDOut)
 async def upload_jd(jd: JDCreate, db: Session = Depends(get_db)):
     try:
-        derived = parse_jd(jd.raw_text)
+        dedup.count("jd")
+        text_sha = text_fingerprint(jd.raw_text)
+        match = dict(title=jd.title, company=jd.company, location=jd.location)
+        j, hit = await run_in_threadpool(_find, db, JobDescription, None, text_sha, **match)
+        if j is not None and (not jd.must_have or j.must_have == jd.must_have) \
+                and (not jd.good_to_have or j.good_to_have == jd.good_to_have):
+            dedup.count("jd", hit)
+            print(f"✅ JD deduplicated: {j.id}")
+            return j
+        derived = await cpu_pool.run(derive_jd, jd.raw_text)
+        embedding = await embed_pool.run(embed, jd.raw_text)
         j = JobDescription(
             title=jd.title,
             company=jd.company,
             location=jd.location,
             raw_text=jd.raw_text,
             must_have=jd.must_have or derived["must_have"],
-            good_to_have=jd.good_to_have or derived["good_to_have"]
+            good_to_have=jd.good_to_have or derived["good_to_have"],
+            # "" keeps /ontology/rederive away from a JD with any hand-written list
+            ontology_version="" if jd.must_have or jd.good_to_have else derived["ontology_version"],
+            text_sha256=text_sha,
+            embedding=embedding
         )
-        db.add(j)
-        db.commit()
-        db.refresh(j)
+        await run_in_threadpool(_save, db, j)
+        maintainer.submit_jd(j.id)
         print(f"✅ JD saved: {j.id}")
         return j
+    except PoolSaturated:
+        raise
     except Exception as e:
         print(f"❌ JD upload error: {e}")
         raise HTTPException(status_code=500, detail=f"JD upload failed: {str(e)}")
@@ -75,13 +140,16 @@ async def upload_jd(jd: JDCreate, db: Session = Depends(get_db)):
 @router.post("/jd-file", response_model=JDOut)
 async def upload_jd_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
     try:
-        content = await file.read()
-        path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(path, "wb") as f:
-            f.write(content)
+        path, file_sha, _ = await run_in_threadpool(store_upload, file.file, UPLOAD_DIR, file.filename)
+        dedup.count("jd")
+        j, hit = await run_in_threadpool(_find, db, JobDescription, file_sha)
+        if j is not None:
+            dedup.count("jd", hit)
+            print(f"✅ JD file deduplicated: {j.id}")
+            return j
 
-        raw_text = extract_text_from_file(path)
-        derived = parse_jd(raw_text)
+        raw_text, derived = await cpu_pool.run(prepare_jd_file, path)
+        embedding = await embed_pool.run(embed, raw_text)
 
         j = JobDescription(
             title=file.filename,
@@ -89,13 +157,129 @@ async def upload_jd_file(file: UploadFile = File(...), db: Session = Depends(get
             location="",
             raw_text=raw_text,
             must_have=derived["must_have"],
-            good_to_have=derived["good_to_have"]
+            good_to_have=derived["good_to_have"],
+            ontology_version=derived["ontology_version"],
+            file_sha256=file_sha,
+            text_sha256=text_fingerprint(raw_text),
+            embedding=embedding
         )
-        db.add(j)
-        db.commit()
-        db.refresh(j)
+        j = await run_in_threadpool(_save_dedup, db, j, JobDescription)
+        maintainer.submit_jd(j.id)
         print(f"✅ JD file saved: {j.id}")
         return j
+    except PoolSaturated:
+        raise
     except Exception as e:
         print(f"❌ JD file upload error: {e}")
         raise HTTPException(status_code=500, detail=f"JD file upload failed: {str(e)}")
+
+@router.patch("/jd/{jd_id}", response_model=JDOut)
+def set_jd_status(jd_id: int, status: JDStatus, db: Session = Depends(get_db)):
+    j = db.get(JobDescription, jd_id)
+    if not j:
+        raise HTTPException(404, "JD not found")
+    reopened = status.is_open and j.is_open is False
+    j.is_open = status.is_open
+    db.commit()
+    if reopened:
+        # resumes uploaded while the JD was closed have no matrix cells yet
+        maintainer.submit_jd(j.id, only_missing=True)
+    return j
+
+@router.post("/resumes/bulk", status_code=202)
+def upload_resumes_bulk(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
+    # files (or ZIPs of files) are written to disk and queued; the ingest
+    # pipeline parses, anonymizes and embeds them in the background
+    job = IngestJob(kind="resume")
+    db.add(job)
+    db.flush()
+    items = []
+    seen = {}  # file sha -> resume id (None while the first copy is still queued)
+
+    def add(name: str, src, size: int = 0):
+        item = IngestItem(job_id=job.id, filename=name)
+        try:
+            if not name.lower().endswith(RESUME_EXTS):
+                raise ValueError("unsupported file type")
+            if size > MAX_FILE_BYTES:
+                raise ValueError(f"file larger than {MAX_FILE_BYTES} bytes")
+            item.path, item.file_sha256, _ = store_upload(src, UPLOAD_DIR, name)
+            dedup.count("resume")
+            if item.file_sha256 not in seen:
+                existing, _ = _find(db, Resume, item.file_sha256)
+                seen[item.file_sha256] = existing.id if existing else None
+            rid = seen[item.file_sha256]
+            if rid is not None:
+                # already stored: nothing to parse
+                dedup.count("resume", "file_hits")
+                item.status, item.stage, item.resume_id = "done", "dedup", rid
+            elif any(i.file_sha256 == item.file_sha256 for i in items):
+                # queued earlier in this job: waits for that copy, which links
+                # resume_id when it is persisted (or marks this dead if it dies)
+                dedup.count("resume", "file_hits")
+                item.status, item.stage = "waiting", "dedup"
+        except Exception as e:
+            item.status, item.stage, item.error = "dead", "upload", f"{type(e).__name__}: {e}"
+        items.append(item)
+
+    try:
+        for f in files:
+            if f.filename.lower().endswith(".zip"):
+                with zipfile.ZipFile(f.file) as zf:
+                    for info in zf.infolist():
+                        if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                            continue
+                        with zf.open(info) as src:
+                            add(info.filename, src, info.file_size)
+            else:
+                add(f.filename, f.file)
+        job.total = len(items)
+        db.add_all(items)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Bulk upload error: {e}")
+        raise HTTPException(status_code=400, detail=f"Bulk upload failed: {str(e)}")
+    print(f"✅ Ingest job {job.id} queued: {job.total} files")
+    return job_progress(db, job.id)
+
+REANON_BATCH = 64
+
+@router.post("/resumes/reanonymize")
+def reanonymize_resumes(policy: str = "", db: Session = Depends(get_db)):
+    # re-mask every resume under a new policy from its stored spans (only rows
+    # without current spans are rescanned), then refresh what depends on the
+    # anonymized text: its analysis, the embedding and the score matrix
+    kinds = tuple(k.strip() for k in policy.split(",") if k.strip()) or POLICY
+    unknown = sorted(set(kinds) - set(MASKS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown PII kinds: {unknown}")
+    ner = ANONYMIZE_NER and "person" in kinds
+    last_id, scanned, rescanned, changed = 0, 0, 0, []
+    while True:
+        rows = db.scalars(select(Resume).options(undefer(Resume.pii), undefer(Resume.analysis))
+                          .where(Resume.id > last_id).order_by(Resume.id).limit(REANON_BATCH)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+        moved = []
+        for r in rows:
+            text = r.raw_text or ""
+            rescanned += not is_current(text, r.pii, ner)
+            anon, r.pii = reapply(text, r.pii, kinds)
+            if anon != r.anonymized_text:
+                r.anonymized_text = anon
+                r.analysis = resume_analyses(text, anon)
+                moved.append(r)
+        for r, vec in zip(moved, embed_many([r.anonymized_text for r in moved])):
+            r.embedding = vec
+        db.commit()
+        index = get_index()
+        for r in moved:
+            index.add(r.id, r.embedding)
+        changed.extend(r.id for r in moved)
+    if changed:
+        maintainer.submit_resumes(changed)
+    print(f"✅ Re-anonymized {len(changed)} of {scanned} resumes ({rescanned} rescanned)")
+    return {"policy": list(kinds), "scanned": scanned, "rescanned": rescanned, "changed": len(changed)}
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import List, Dict, Optional, Any
 
 class JDCreate(BaseModel):
@@ -11,8 +12,12 @@ class JDCreate(BaseModel):
 
 class JDOut(JDCreate):
     id: int
+    is_open: Optional[bool] = True
     class Config: from_attributes = True
 
+class JDStatus(BaseModel):
+    is_open: bool
+
 class ResumeCreate(BaseModel):
     raw_text: str
     candidate_name: str = ""
@@ -33,10 +38,28 @@ class EvaluateRequest(BaseModel):
     jd_id: int
     bias_anonymize: bool = True
 
+class BatchEvaluateRequest(BaseModel):
+    jd_id: int
+    resume_ids: Optional[List[int]] = None  # None = every resume not yet evaluated for this JD
+    bias_anonymize: bool = True
+
+class RescoreRequest(BaseModel):
+    jd_id: int
+    weights: Optional[Dict[str, float]] = None  # {"hard", "soft", "ats"}; normalized to sum to 1
+    add_must: List[str] = []  # good-to-have skills treated as must-have
+    remove_must: List[str] = []
+    resume_id: Optional[int] = None  # candidate view: where this resume would land
+    assume_skills: List[str] = []  # "pretend I have": exact hits for resume_id only
+    top_k: int = Field(20, ge=1, le=1000)
+    min_score: float = 0.0
+
 class EvaluationOut(BaseModel):
     id: int
     relevance_score: float
     verdict: str
+    hard_coverage: Optional[float] = None
+    soft_similarity: Optional[float] = None
+    ats_norm: Optional[float] = None
     missing_elements: Dict[str, List[str]]
     feedback: str
     hard_match: Dict[str, Any]
@@ -49,3 +72,30 @@ class EvaluationOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class EvaluationDetails(BaseModel):
+    evaluation_id: int
+    source: str  # stored, legacy (inline columns), recomputed or rescored (row was stale)
+    hard_match: Dict[str, Any]
+    soft_match: Dict[str, Any]
+    feedback: str
+    explainability: Dict[str, Any]
+    ats_report: Dict[str, Any]
+
+class DashboardRow(BaseModel):
+    # slim projection: no resume / JD text
+    evaluation_id: int
+    resume_id: int
+    jd_id: int
+    relevance_score: float
+    verdict: str
+    jd_title: str = ""
+    company: str = ""
+    location: str = ""
+    career_stage: str = "unknown"
+    missing_skills: List[str] = []
+    created_at: Optional[datetime] = None
+
+class DashboardPage(BaseModel):
+    items: List[DashboardRow]
+    next_cursor: Optional[str] = None
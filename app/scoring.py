@@ -1,25 +1,48 @@
-from rapidfuzz import fuzz
-from typing import Dict, List
-from .semantic import cosine
-from .utils import verdict_from_score
+from typing import Dict, List, Optional
+import numpy as np
+from .analysis import ResumeAnalysis, analyze
+from .explain import evidence_cards, shap_like
+from .feedback import generate_feedback
+from .matcher import compile_skills, normalize_token
+from .metrics import timed
+from .ontology import get_ontology
+from .utils import VERDICT_HIGH, VERDICT_MEDIUM, verdict_from_score
 
-def hard_match_scores(resume_text: str, jd_must: List[str], jd_good: List[str]) -> Dict:
+# bump when score_fields output changes: cached evaluations under the old version are recomputed
+SCORER_VERSION = "2"
+DEFAULT_WEIGHTS = {"hard": 0.55, "soft": 0.35, "ats": 0.10}
+# per-skill hit flags kept in match_scores.skill_hits, one byte per JD skill
+HIT_EXACT, HIT_FUZZY, HIT_LOCATED = 1, 2, 4
+
+def _found(skill: str, exact: set, a: ResumeAnalysis, aliases: tuple = ()) -> bool:
+    # token phrase hit (skill or an ontology alias), or a substring hit inside a
+    # longer word ("sql" in "postgresql")
+    return normalize_token(skill) in exact or a.locate(skill) is not None or any(al in exact for al in aliases)
+
+@timed("scoring.hard_match")
+def hard_match_scores(resume, jd_must: List[str], jd_good: List[str]) -> Dict:
+    # resume: raw text or a ResumeAnalysis
+    a = resume if isinstance(resume, ResumeAnalysis) else analyze(resume)
+    onto = get_ontology()
+    aliases = {s: onto.aliases_of(s) for s in list(jd_must) + list(jd_good)}
+    matcher = compile_skills(tuple(jd_must) + tuple(jd_good) + tuple(al for als in aliases.values() for al in als))
+    exact = matcher.find_exact(a.tokens)
     exact_hits = []
     fuzzy_hits = []
     missing = []
+    pending = [s for s in jd_must if not _found(s, exact, a, aliases[s])]
+    # fuzzy pass only over windows around tokens that resemble a missing skill
+    fuzzy = a.fuzzy_scores(pending, cutoff=85, max_n=matcher.max_tokens + 1) if pending else {}
     for skill in jd_must:
-        if skill in resume_text.lower():
+        if skill not in pending:
             exact_hits.append(skill)
         else:
-            score = fuzz.partial_ratio(skill, resume_text.lower())
+            score = fuzzy.get(normalize_token(skill), 0)
             if score >= 85:
                 fuzzy_hits.append({"skill": skill, "score": score})
             else:
                 missing.append(skill)
-    good_hits = []
-    for skill in jd_good:
-        if skill in resume_text.lower():
-            good_hits.append(skill)
+    good_hits = [s for s in jd_good if _found(s, exact, a, aliases[s])]
     return {
         "exact_hits": exact_hits,
         "fuzzy_hits": fuzzy_hits,
@@ -27,11 +50,19 @@ def hard_match_scores(resume_text: str, jd_must: List[str], jd_good: List[str])
         "missing_must": missing
     }
 
-def combine_score(hard: Dict, soft_sim: float, ats: Dict) -> Dict:
-    # weights tuned for clarity; adjust during demo via Streamlit slider
-    w_hard = 0.55
-    w_soft = 0.35
-    w_ats = 0.10
+def normalize_weights(weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+    # missing components keep their default; the result sums to 1 so scores stay 0-100
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+    if set(w) != set(DEFAULT_WEIGHTS) or any(v < 0 for v in w.values()) or sum(w.values()) <= 0:
+        raise ValueError(f"weights must be non-negative {sorted(DEFAULT_WEIGHTS)} with a positive sum")
+    total = sum(w.values())
+    return {k: v / total for k, v in w.items()}
+
+def combine_score(hard: Dict, soft_sim: float, ats: Dict, weights: Optional[Dict[str, float]] = None) -> Dict:
+    w = weights or DEFAULT_WEIGHTS
+    w_hard = w["hard"]
+    w_soft = w["soft"]
+    w_ats = w["ats"]
     hard_cov = 0.0
     denom = len(hard["exact_hits"]) + len(hard["fuzzy_hits"]) + len(hard["missing_must"])
     if denom > 0:
@@ -41,3 +72,79 @@ def combine_score(hard: Dict, soft_sim: float, ats: Dict) -> Dict:
     return {"overall": overall, "verdict": verdict_from_score(overall),
             "weights": {"hard": w_hard, "soft": w_soft, "ats": w_ats},
             "components": {"hard_coverage": hard_cov, "soft_similarity": soft_sim, "ats_norm": ats_norm}}
+
+def combine_many(hard_cov: np.ndarray, soft_sim: np.ndarray, ats_norm: np.ndarray,
+                 weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    # combine_score over whole columns (what-if re-ranking)
+    w = weights or DEFAULT_WEIGHTS
+    return 100.0 * (w["hard"] * hard_cov + w["soft"] * soft_sim + w["ats"] * ats_norm)
+
+def verdicts(scores: np.ndarray) -> np.ndarray:
+    return np.where(scores >= VERDICT_HIGH, "High", np.where(scores >= VERDICT_MEDIUM, "Medium", "Low"))
+
+def skill_states(a: ResumeAnalysis, hard: Dict, jd_must: List[str], jd_good: List[str]) -> bytes:
+    # enough to recompute hard coverage and ATS keyword coverage for any must-have
+    # subset of the JD's skills: exact hit, fuzzy hit, substring hit (ats_report)
+    exact = set(hard["exact_hits"]) | set(hard["good_hits"])
+    fuzzy = {h["skill"] for h in hard["fuzzy_hits"]}
+    return bytes((HIT_EXACT if s in exact else 0) | (HIT_FUZZY if s in fuzzy else 0)
+                 | (HIT_LOCATED if a.locate(s) is not None else 0) for s in list(jd_must) + list(jd_good))
+
+@timed("scoring.ats")
+def ats_report(resume, jd_must) -> dict:
+    a = resume if isinstance(resume, ResumeAnalysis) else analyze(resume)
+    bd = a.bullet_density
+    kc_hits = sum(1 for s in jd_must if a.locate(s) is not None)
+    kc = kc_hits / max(1, len(jd_must))
+    score = 100 * (0.4*kc + 0.4*min(1.0, max(0.0, bd/0.4)) + 0.2*(1 if a.has_sections else 0))
+    return {"bullet_density": bd, "bullet_density_ok": 0.15 <= bd <= 0.5, "has_sections": a.has_sections, "keyword_coverage": kc, "score": score}
+
+def matrix_fields(rtext: str, jd_must: List[str], jd_good: List[str], soft_sim: float,
+                  analysis: Optional[Dict] = None) -> dict:
+    # the compact per-pair result kept in match_scores (no feedback / evidence)
+    jd_must = jd_must or []
+    jd_good = jd_good or []
+    a = analyze(rtext, analysis)
+    hard = hard_match_scores(a, jd_must, jd_good)
+    combined = combine_score(hard, soft_sim, ats_report(a, jd_must))
+    return dict(score=combined["overall"], verdict=combined["verdict"],
+                hard_coverage=combined["components"]["hard_coverage"], soft_similarity=soft_sim,
+                ats_norm=combined["components"]["ats_norm"], missing_must=len(hard["missing_must"]),
+                skill_hits=skill_states(a, hard, jd_must, jd_good))
+
+@timed("scoring.score_fields")
+def score_fields(rtext: str, career_stage: str, jd_id: int, jd_must: List[str], jd_good: List[str],
+                 soft_sim: float, bias_anonymize: bool, analysis: Optional[Dict] = None) -> dict:
+    # everything an Evaluation row needs except resume_id; shared by single and batch scoring.
+    # ``analysis`` is the stored Resume.analysis entry for rtext, if there is one
+    jd_must = jd_must or []
+    jd_good = jd_good or []
+    a = analyze(rtext, analysis)
+    hard = hard_match_scores(a, jd_must, jd_good)
+    ats = ats_report(a, jd_must)
+    combined = combine_score(hard, soft_sim, ats)
+
+    missing_elements = {
+        "skills": hard["missing_must"],
+        "certifications": [],  # could be inferred with regex list
+        "projects": []  # can be inferred if no 'projects' section present
+    }
+    expl_cards = evidence_cards(a, jd_must + jd_good)
+    shap = shap_like(combined["weights"], combined["components"])
+    feedback = generate_feedback(career_stage, hard["missing_must"], ats)
+    return dict(
+        jd_id=jd_id,
+        relevance_score=combined["overall"],
+        verdict=combined["verdict"],
+        hard_coverage=combined["components"]["hard_coverage"],
+        soft_similarity=soft_sim,
+        ats_norm=combined["components"]["ats_norm"],
+        hard_match=hard,
+        soft_match={"similarity": soft_sim},
+        missing_elements=missing_elements,
+        feedback=feedback,
+        explainability={"evidence": expl_cards, "contributions": shap},
+        ats_report=ats,
+        bias_anonymized=bias_anonymize,
+        ontology_version=get_ontology().version
+    )
@@ -1,12 +1,149 @@
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List
+import hashlib, os, queue, threading, time
 import numpy as np
+from . import embedders
+from .lazy import LazyModel
+from .metrics import record, timed
 
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+# the backend (EMBED_BACKEND: torch, onnx, onnx-int8) is chosen in embedders.py
+_model = LazyModel("embedder", embedders.load, warm=lambda m: m.encode(["warm up"]))
 
+# content-hash keyed LRU: re-uploaded resumes and duplicate JDs skip the model
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+_cache: "OrderedDict[str, list]" = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+# micro-batching: concurrent embed() calls are coalesced into one encode()
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+
+def _cache_get(key: str):
+    with _cache_lock:
+        vec = _cache.get(key)
+        if vec is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+        return vec
+
+def _cache_put(key: str, vec: list):
+    with _cache_lock:
+        _cache[key] = vec
+        while len(_cache) > EMBED_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def _encode(texts: List[str]) -> List[list]:
+    vecs = _model.get().encode(texts, batch_size=max(1, len(texts)))
+    return [v.tolist() for v in vecs]
+
+
+class _Batcher:
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batch_sizes: dict = {}  # batch size -> number of encode() calls
+        self.items = 0
+
+    def submit(self, text: str, key: str) -> Future:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+        fut = Future()
+        self._q.put((text, key, fut, time.perf_counter()))
+        return fut
+
+    def _collect(self) -> list:
+        batch = [self._q.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            left = deadline - time.perf_counter()
+            try:
+                batch.append(self._q.get(timeout=left) if left > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            now = time.perf_counter()
+            for _, _, _, queued in batch:
+                record("embed.batch_wait", now - queued)
+            # identical texts queued together are encoded once
+            uniq = list(OrderedDict((key, text) for text, key, _, _ in batch).items())
+            try:
+                t0 = time.perf_counter()
+                vecs = dict(zip((k for k, _ in uniq), _encode([t for _, t in uniq])))
+                record("embed.encode_batch", time.perf_counter() - t0)
+            except Exception as e:
+                for _, _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            with self._lock:
+                self.batch_sizes[len(uniq)] = self.batch_sizes.get(len(uniq), 0) + 1
+                self.items += len(batch)
+            for key, vec in vecs.items():
+                _cache_put(key, vec)
+            for _, key, fut, _ in batch:
+                fut.set_result(vecs[key])
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = sum(self.batch_sizes.values())
+            return {"max_batch": self.max_batch, "max_wait_ms": self.max_wait * 1000, "queued": self._q.qsize(),
+                    "encode_calls": calls, "items": self.items,
+                    "mean_batch": self.items / calls if calls else 0.0,
+                    "batch_size_histogram": dict(sorted(self.batch_sizes.items()))}
+
+
+_batcher = _Batcher(EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS)
+
+@timed("semantic.embed")
 def embed(text: str) -> list:
-    vec = _model.encode([text], normalize_embeddings=True)[0]
-    return vec.tolist()
+    key = text_hash(text)
+    vec = _cache_get(key)
+    if vec is not None:
+        return vec
+    return _batcher.submit(text, key).result()
+
+@timed("semantic.embed_many")
+def embed_many(texts: List[str]) -> List[list]:
+    # bulk callers already have a batch: skip the queue, encode misses in chunks
+    keys = [text_hash(t) for t in texts]
+    out = [_cache_get(k) for k in keys]
+    todo = OrderedDict((k, t) for k, t, v in zip(keys, texts, out) if v is None)
+    items = list(todo.items())
+    for i in range(0, len(items), EMBED_MAX_BATCH):
+        chunk = items[i:i + EMBED_MAX_BATCH]
+        t0 = time.perf_counter()
+        for (k, _), vec in zip(chunk, _encode([t for _, t in chunk])):
+            _cache_put(k, vec)
+            todo[k] = vec
+        record("embed.encode_batch", time.perf_counter() - t0)
+    return [v if v is not None else todo[k] for k, v in zip(keys, out)]
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {**_stats, "size": len(_cache), "max_size": EMBED_CACHE_SIZE,
+                "hit_rate": _stats["hits"] / total if total else 0.0}
+
+def batcher_stats() -> dict:
+    return _batcher.stats()
 
-def cosine(a: list, b: list) -> float:
-    a = np.array(a); b = np.array(b)
+def cosine(a, b) -> float:
+    # inputs are unit-normalized; float32 avoids copying packed vectors
+    a = np.asarray(a, dtype=np.float32); b = np.asarray(b, dtype=np.float32)
     return float(np.clip(np.dot(a, b), -1.0, 1.0))
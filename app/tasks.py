@@ -0,0 +1,33 @@
+# Picklable entry points for the CPU process pool. Keep imports light: this
+# module is imported by every worker process and must not pull in the models.
+from typing import Dict, List, Tuple
+from .analysis import ResumeAnalysis, resume_analyses
+from .ontology import get_ontology
+from .parsing import extract_text_from_file, parse_resume
+from .scoring import matrix_fields, score_fields
+from .anonymize import anonymize
+
+def parse_resume_file(path: str) -> Tuple[str, Dict]:
+    return parse_resume(extract_text_from_file(path))
+
+def anonymize_resume(std_text: str) -> Tuple[str, Dict, Dict]:
+    anonymized_text, pii = anonymize(std_text)
+    return anonymized_text, resume_analyses(std_text, anonymized_text), pii
+
+def build_analysis(text: str) -> Dict:
+    return ResumeAnalysis.build(text).to_dict()
+
+def prepare_jd_file(path: str) -> Tuple[str, Dict]:
+    raw_text = extract_text_from_file(path)
+    return raw_text, get_ontology().derive_jd_skills(raw_text)
+
+def derive_jd(raw_text: str) -> Dict:
+    return get_ontology().derive_jd_skills(raw_text)
+
+def score_fields_args(args: List) -> Dict:
+    return score_fields(*args)
+
+def matrix_fields_many(args: List) -> List[Dict]:
+    # one resume against a group of JDs: the analysis is shipped to the worker once
+    rtext, analysis, jds = args
+    return [matrix_fields(rtext, must, good, sim, analysis) for must, good, sim in jds]
@@ -1,18 +1,9 @@
-import re
-
-EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-PHONE_RE = re.compile(r"(\+?\d{1,3}[-.\s]?)?(\d{3,5}[-.\s]?\d{3,4}[-.\s]?\d{3,4})")
-NAME_HINT_RE = re.compile(r"Name\s*:\s*(.+)", re.I)
+from .anonymize import anonymize
 
 def anonymize_pii(text: str) -> (str, dict):
-    found = {}
-    text, n = EMAIL_RE.subn("[EMAIL]", text)
-    if n: found["emails"] = n
-    text, n = PHONE_RE.subn("[PHONE]", text)
-    if n: found["phones"] = n
-    # light name redaction (heuristic)
-    text = NAME_HINT_RE.sub("Name: [NAME]", text)
-    return text, found
+    # text and per-kind counts under the default policy; see anonymize.py
+    text, record = anonymize(text)
+    return text, record["counts"]
 
 def split_sections(text: str):
     # very light heuristic section splitter
@@ -35,5 +26,8 @@ def bullet_density(text: str):
     lines = max(1, len(text.splitlines()))
     return bullets / lines
 
+VERDICT_HIGH = 75
+VERDICT_MEDIUM = 50
+
 def verdict_from_score(score: float) -> str:
-    return "High" if score >= 75 else ("Medium" if score >= 50 else "Low")
+    return "High" if score >= VERDICT_HIGH else ("Medium" if score >= VERDICT_MEDIUM else "Low")
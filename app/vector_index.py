@@ -0,0 +1,235 @@
+import os, struct, threading
+from typing import List, Optional, Tuple
+import numpy as np
+from .vectors import EMBED_DIM
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends/compaction are only serialized in-process
+    fcntl = None
+
+INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join("data", "index", "resumes"))
+# below IVF_MIN vectors a brute-force matrix product is already fast enough
+IVF_MIN = int(os.getenv("VECTOR_INDEX_IVF_MIN", "50000"))
+IVF_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+COMPACT_EVERY = int(os.getenv("VECTOR_INDEX_COMPACT_EVERY", "1000"))
+
+
+class VectorIndex:
+    """Cosine top-k over unit vectors, persisted as a snapshot plus an append log.
+
+    Search is a float32 matrix-vector product with ``argpartition`` for the top k.
+    Past ``ivf_min`` vectors an IVF layer (spherical k-means lists) restricts the
+    product to the ``nprobe`` closest lists. ``add`` appends one record to
+    ``<path>.log``; other workers replay the log tail on their next search, and
+    every ``COMPACT_EVERY`` records the log is folded into ``<path>.npz``.
+    """
+
+    def __init__(self, dim: int = EMBED_DIM, path: Optional[str] = INDEX_PATH,
+                 ivf_min: int = IVF_MIN, nprobe: int = IVF_NPROBE):
+        self.dim = dim
+        self.path = path
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._rec = struct.Struct(f"<q{dim}f")
+        self._reset()
+        self._snap_mtime = None
+        self._log_offset = 0
+        if path:
+            self._load()
+
+    def _reset(self):
+        self._n = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._mat = np.empty((0, self.dim), dtype=np.float32)
+        self._pos = {}
+        self._centroids = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._ivf_built_at = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---- in-memory updates -------------------------------------------------
+    def _grow(self, need: int):
+        cap = max(1024, len(self._ids))
+        while cap < need:
+            cap *= 2
+        if cap == len(self._ids):
+            return
+        ids = np.empty(cap, dtype=np.int64); ids[:self._n] = self._ids[:self._n]
+        mat = np.empty((cap, self.dim), dtype=np.float32); mat[:self._n] = self._mat[:self._n]
+        assign = np.full(cap, -1, dtype=np.int32); assign[:self._n] = self._assign[:self._n]
+        self._ids, self._mat, self._assign = ids, mat, assign
+
+    def _put(self, rid: int, vec):
+        row = self._pos.get(rid)
+        if row is None:
+            if self._n >= len(self._ids):
+                self._grow(self._n + 1)
+            row = self._n
+            self._pos[rid] = row
+            self._ids[row] = rid
+            self._n += 1
+        self._mat[row] = vec
+        if self._centroids is not None:
+            self._assign[row] = int(np.argmax(self._centroids @ self._mat[row]))
+
+    def _bulk(self, ids: np.ndarray, mat: np.ndarray):
+        # ids are unique here (snapshots and rebuilds never repeat an id)
+        self._reset()
+        n = len(ids)
+        self._grow(n)
+        self._ids[:n] = ids
+        self._mat[:n] = mat
+        self._pos = {rid: row for row, rid in enumerate(ids.tolist())}
+        self._n = n
+
+    # ---- IVF ----------------------------------------------------------------
+    def _build_ivf(self, iters: int = 10, seed: int = 0):
+        n = self._n
+        nlist = max(8, int(np.sqrt(n)))
+        rnd = np.random.default_rng(seed)
+        data = self._mat[:n]
+        sample = data[rnd.choice(n, size=min(n, 64 * nlist), replace=False)]
+        cent = sample[rnd.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            lab = np.argmax(sample @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, lab, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            filled = norms > 0  # empty lists keep their previous centroid
+            cent[filled] = sums[filled] / norms[filled, None]
+        assign = np.empty(n, dtype=np.int32)
+        for s in range(0, n, 16384):
+            assign[s:s + 16384] = np.argmax(data[s:s + 16384] @ cent.T, axis=1)
+        self._centroids = cent
+        self._assign[:n] = assign
+        self._ivf_built_at = n
+
+    def _rows_to_scan(self, q: np.ndarray) -> Optional[np.ndarray]:
+        if self._n < self.ivf_min:
+            return None
+        if self._centroids is None or self._n > 2 * self._ivf_built_at:
+            self._build_ivf()
+        probe = np.argsort(-(self._centroids @ q))[:self.nprobe]
+        return np.nonzero(np.isin(self._assign[:self._n], probe))[0]
+
+    # ---- public API ---------------------------------------------------------
+    def add(self, rid: int, vec, persist: bool = True):
+        vec = np.asarray(vec, dtype=np.float32)
+        with self._lock:
+            self._sync()
+            self._put(int(rid), vec)
+            if persist and self.path:
+                self._append(int(rid), vec)
+
+    def search(self, q, k: int = 10, exact: bool = False) -> List[Tuple[int, float]]:
+        q = np.asarray(q, dtype=np.float32)
+        with self._lock:
+            self._sync()
+            if not self._n:
+                return []
+            rows = None if exact else self._rows_to_scan(q)
+            if rows is None:
+                sims = self._mat[:self._n] @ q
+            else:
+                sims = self._mat[rows] @ q
+            k = min(k, len(sims))
+            if not k:
+                return []
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            ids = self._ids[top] if rows is None else self._ids[rows[top]]
+            return [(int(i), float(s)) for i, s in zip(ids, sims[top])]
+
+    def rebuild(self, items):
+        # items: iterable of (id, vector); replaces the index and its files
+        with self._lock:
+            pairs = [(int(i), v) for i, v in items if v is not None]
+            ids = np.array([i for i, _ in pairs], dtype=np.int64)
+            mat = np.array([v for _, v in pairs], dtype=np.float32).reshape(-1, self.dim)
+            self._bulk(ids, mat)
+            if self.path:
+                self._snapshot()
+
+    # ---- persistence --------------------------------------------------------
+    def _locked(self, f, exclusive=True):
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _append(self, rid: int, vec: np.ndarray):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".log", "a+b") as f:
+            self._locked(f)
+            self._replay(f)  # records other workers appended since our last sync
+            f.write(self._rec.pack(rid, *vec.tolist()))
+            f.flush()
+            size = f.tell()
+        self._log_offset = size
+        if size // self._rec.size >= COMPACT_EVERY:
+            self._snapshot()
+
+    def _snapshot(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".log", "a+b") as log:
+            self._locked(log)
+            self._replay(log)  # don't drop records other workers appended
+            tmp = self.path + ".tmp.npz"
+            np.savez(tmp, ids=self._ids[:self._n], mat=self._mat[:self._n])
+            os.replace(tmp, self.path + ".npz")
+            log.truncate(0)
+        self._log_offset = 0
+        self._snap_mtime = os.stat(self.path + ".npz").st_mtime_ns
+
+    def _load(self):
+        if os.path.exists(self.path + ".npz"):
+            snap = np.load(self.path + ".npz")
+            self._bulk(snap["ids"], snap["mat"])
+            self._snap_mtime = os.stat(self.path + ".npz").st_mtime_ns
+        else:
+            self._reset()
+            self._snap_mtime = None
+        self._log_offset = 0
+        if os.path.exists(self.path + ".log"):
+            with open(self.path + ".log", "rb") as f:
+                self._replay(f)
+
+    def _replay(self, f):
+        f.seek(0, os.SEEK_END)
+        end = f.tell() - f.tell() % self._rec.size
+        if end <= self._log_offset:
+            return
+        f.seek(self._log_offset)
+        buf = f.read(end - self._log_offset)
+        for rec in self._rec.iter_unpack(buf):
+            self._put(rec[0], np.asarray(rec[1:], dtype=np.float32))
+        self._log_offset = end
+
+    def _sync(self):
+        # pick up snapshots/appends written by other worker processes
+        if not self.path:
+            return
+        snap = self.path + ".npz"
+        mtime = os.stat(snap).st_mtime_ns if os.path.exists(snap) else None
+        log = self.path + ".log"
+        size = os.path.getsize(log) if os.path.exists(log) else 0
+        if mtime != self._snap_mtime or size < self._log_offset:
+            self._load()
+        elif size > self._log_offset:
+            with open(log, "rb") as f:
+                self._replay(f)
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> VectorIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = VectorIndex()
+    return _index
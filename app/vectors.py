@@ -0,0 +1,55 @@
+import os
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+try:  # pgvector is optional; without it Postgres stores the same packed bytes
+    from pgvector.sqlalchemy import Vector as PgVector
+except ImportError:
+    PgVector = None
+
+USE_PGVECTOR = os.getenv("USE_PGVECTOR", "0") == "1"
+DTYPE = np.dtype("<f4")
+# stored embedding width; lower it only together with a re-embed (see embedders.py)
+EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
+
+def pack(vec) -> bytes:
+    return np.asarray(vec, dtype=DTYPE).tobytes()
+
+def unpack(blob) -> np.ndarray:
+    # zero-copy view over the driver's buffer (read-only)
+    return np.frombuffer(blob, dtype=DTYPE)
+
+class Vector(TypeDecorator):
+    """float32 embedding column: pgvector on Postgres when enabled, packed bytes elsewhere.
+
+    Values read back as 1-D float32 numpy arrays; lists or arrays can be written.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dim: int = EMBED_DIM):
+        super().__init__()
+        self.dim = dim
+
+    def _pg(self, dialect) -> bool:
+        return USE_PGVECTOR and PgVector is not None and dialect.name == "postgresql"
+
+    def load_dialect_impl(self, dialect):
+        if self._pg(dialect):
+            return dialect.type_descriptor(PgVector(self.dim))
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if self._pg(dialect):
+            return np.asarray(value, dtype=np.float32)
+        return pack(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return unpack(value)
+        return np.asarray(value, dtype=np.float32)
@@ -0,0 +1,150 @@
+import os, threading, time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select
+from .matcher import normalize_token
+from .matrix import maintainer
+from .metrics import timed
+from .models import JobDescription, MatchScore, Resume
+from .ontology import get_ontology
+from .scoring import HIT_EXACT, HIT_FUZZY, HIT_LOCATED, combine_many, normalize_weights, verdicts
+
+# JDs whose score components stay in memory; a JD of 100k candidates with 30
+# skills is ~4 MB of columns
+WHATIF_CACHE_SIZE = int(os.getenv("WHATIF_CACHE_SIZE", "32"))
+
+
+class Components:
+    """One JD's match_scores rows as columns: what a re-weighting needs and
+    nothing else (no text, no embeddings)."""
+
+    __slots__ = ("stamp", "skills", "n_must", "resume_ids", "hard", "soft", "ats_rest", "hits",
+                 "score", "base_rank")
+
+    def __init__(self, stamp, skills: List[str], n_must: int, rows: List):
+        self.stamp = stamp
+        self.skills = skills
+        self.n_must = n_must
+        # rows scored against other skill lists can't be re-weighted per skill
+        rows = [r for r in rows if r.skill_hits is not None and len(r.skill_hits) == len(skills)]
+        self.resume_ids = np.fromiter((r.resume_id for r in rows), dtype=np.int64, count=len(rows))
+        self.hard = np.fromiter((r.hard_coverage or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+        self.soft = np.fromiter((r.soft_similarity or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+        ats = np.fromiter((r.ats_norm or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+        self.hits = np.frombuffer(b"".join(r.skill_hits for r in rows), dtype=np.uint8).reshape(len(rows), len(skills))
+        # ats_report is 0.4 * keyword coverage of the must list plus terms that
+        # don't depend on the JD; keep the latter
+        located = (self.hits[:, :n_must] & HIT_LOCATED) != 0
+        self.ats_rest = ats - 0.4 * located.sum(axis=1) / max(1, n_must)
+        self.score = combine_many(self.hard, self.soft, ats)
+        self.base_rank = np.empty(len(rows), dtype=np.int64)
+        self.base_rank[np.argsort(-self.score, kind="stable")] = np.arange(1, len(rows) + 1)
+
+
+_cache: "OrderedDict[int, Components]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def pending(db, jd_id: int) -> int:
+    """Resumes without a current match_scores row for the JD: not reached by the
+    matrix maintainer yet, scored under an older ontology, or stored before
+    skill_hits existed. They are queued for the maintainer, never scored here,
+    so a rescore answers from the rows it has."""
+    current = db.scalar(select(func.count()).select_from(MatchScore).where(
+        MatchScore.jd_id == jd_id, MatchScore.ontology_version == get_ontology().version,
+        MatchScore.skill_hits.isnot(None)))
+    n = max(0, db.scalar(select(func.count(Resume.id))) - current)
+    if n:
+        maintainer.submit_jd(jd_id, only_missing=True)
+    return n
+
+
+@timed("whatif.load")
+def components(db, jd: JobDescription) -> Components:
+    version = get_ontology().version
+    skills = list(jd.must_have or []) + list(jd.good_to_have or [])
+    count, updated = db.execute(select(func.count(), func.max(MatchScore.updated_at))
+                                .where(MatchScore.jd_id == jd.id)).one()
+    stamp = (count, updated, version, tuple(skills))
+    with _lock:
+        c = _cache.get(jd.id)
+        if c is not None and c.stamp == stamp:
+            _cache.move_to_end(jd.id)
+            return c
+    rows = db.execute(select(MatchScore.resume_id, MatchScore.hard_coverage, MatchScore.soft_similarity,
+                             MatchScore.ats_norm, MatchScore.skill_hits)
+                      .where(MatchScore.jd_id == jd.id, MatchScore.ontology_version == version)
+                      .order_by(MatchScore.resume_id)).all()
+    c = Components(stamp, skills, len(jd.must_have or []), rows)
+    with _lock:
+        _cache[jd.id] = c
+        _cache.move_to_end(jd.id)
+        while len(_cache) > WHATIF_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return c
+
+
+def _index(skills: List[str]) -> Dict[str, int]:
+    out = {}
+    for i, s in enumerate(skills):
+        out.setdefault(normalize_token(s), i)
+    return out
+
+
+def rescore(c: Components, weights: Optional[Dict[str, float]] = None, add_must: List[str] = (),
+            remove_must: List[str] = (), resume_id: Optional[int] = None, assume_skills: List[str] = (),
+            top_k: int = 20, min_score: float = 0.0) -> Dict:
+    """Scores and verdicts of every candidate under new weights and a new
+    must-have list, computed from the stored components in a few array ops.
+
+    ``add_must`` promotes skills from the JD's good-to-have list (only JD
+    skills have stored hits); ``assume_skills`` marks skills as exact hits for
+    ``resume_id`` alone. Names that aren't JD skills come back in ``ignored_skills``.
+    """
+    t0 = time.perf_counter()
+    w = normalize_weights(weights)
+    idx = _index(c.skills)
+    ignored = [s for s in list(add_must) + list(remove_must) + list(assume_skills) if normalize_token(s) not in idx]
+    removed = {idx[normalize_token(s)] for s in remove_must if normalize_token(s) in idx}
+    must = [i for i in dict.fromkeys(idx[normalize_token(s)] for s in c.skills[:c.n_must]) if i not in removed]
+    must += [i for i in dict.fromkeys(idx[normalize_token(s)] for s in add_must if normalize_token(s) in idx)
+             if i not in must and i not in removed]
+
+    M = c.hits[:, must]  # fancy indexing copies, so the cached matrix is never written
+    row = None
+    if resume_id is not None:
+        found = np.flatnonzero(c.resume_ids == resume_id)
+        if not len(found):
+            raise KeyError(resume_id)
+        row = int(found[0])
+        assumed = {idx[normalize_token(s)] for s in assume_skills if normalize_token(s) in idx}
+        cols = [p for p, i in enumerate(must) if i in assumed]
+        M[row, cols] |= HIT_EXACT | HIT_LOCATED
+    exact = (M & HIT_EXACT) != 0
+    fuzzy = ((M & HIT_FUZZY) != 0) & ~exact
+    n = len(must)
+    hard = (exact.sum(axis=1) + 0.6 * fuzzy.sum(axis=1)) / n if n else np.zeros(len(c.resume_ids))
+    ats = np.clip(c.ats_rest + 0.4 * ((M & HIT_LOCATED) != 0).sum(axis=1) / max(1, n), 0.0, 1.0)
+    scores = combine_many(hard, c.soft, ats, w)
+
+    eligible = np.flatnonzero(scores >= min_score)
+    k = min(top_k, len(eligible))
+    top = eligible[np.argpartition(-scores[eligible], k - 1)[:k]] if k else eligible[:0]
+    top = top[np.lexsort((c.resume_ids[top], -scores[top]))]
+    labels = verdicts(scores[top])
+
+    def item(i: int, rank: int) -> Dict:
+        return {"resume_id": int(c.resume_ids[i]), "rank": rank, "score": round(float(scores[i]), 2),
+                "baseline_rank": int(c.base_rank[i]), "baseline_score": round(float(c.score[i]), 2),
+                "hard_coverage": round(float(hard[i]), 4), "ats_norm": round(float(ats[i]), 4),
+                "missing_must": [c.skills[must[p]] for p in np.flatnonzero(~exact[i] & ~fuzzy[i])]}
+
+    items = [{**item(i, r), "verdict": str(v)} for r, (i, v) in enumerate(zip(top, labels), 1)]
+    out = {"candidates": len(c.resume_ids), "eligible": len(eligible), "weights": w,
+           "must_have": [c.skills[i] for i in must], "ignored_skills": ignored, "items": items}
+    if row is not None:
+        rank = int((scores > scores[row]).sum()) + 1
+        out["candidate"] = {**item(row, rank), "verdict": str(verdicts(scores[row:row + 1])[0])}
+    out["took_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return out
@@ -0,0 +1,154 @@
+import asyncio, multiprocessing, os, threading, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from .metrics import collecting, merge, record
+
+# CPU pool: PDF/DOCX extraction, standardization, anonymization, skill matching.
+# "thread" keeps everything in-process (debugging, platforms without cheap processes).
+CPU_POOL = os.getenv("CPU_POOL", "process")
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 2)))
+CPU_MAX_PENDING = int(os.getenv("CPU_MAX_PENDING", str(4 * CPU_WORKERS)))
+# embedding pool: these threads mostly wait on semantic's micro-batcher, so there
+# must be at least EMBED_MAX_BATCH of them for batches to fill up
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "32"))
+EMBED_MAX_PENDING = int(os.getenv("EMBED_MAX_PENDING", "64"))
+
+
+class PoolSaturated(Exception):
+    def __init__(self, pool: str):
+        super().__init__(f"{pool} pool is saturated, retry shortly")
+        self.pool = pool
+
+
+def _call(fn, args):
+    # runs in the worker: report when it actually started so queue wait is visible,
+    # and ship back the stage timings recorded inside fn
+    start = time.time()
+    t0 = time.perf_counter()
+    with collecting() as stages:
+        result = fn(*args)
+    return start, time.perf_counter() - t0, stages, result
+
+
+def _call_item(fn, item):
+    with collecting() as stages:
+        return stages, fn(item)
+
+
+class WorkerPool:
+    def __init__(self, name: str, kind: str, workers: int, max_pending: int):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)  # map waits here for pending slots
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    ctx = multiprocessing.get_context(os.getenv("CPU_POOL_START", "spawn"))
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=ctx)
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(self.name)
+            self._pending += 1
+
+    def _acquire_wait(self, n: int):
+        # bulk work waits for room instead of failing; it still counts, so
+        # interactive ``run`` calls see the load
+        with self._room:
+            self._room.wait_for(lambda: self._pending + n <= self.max_pending)
+            self._pending += n
+
+    def _release(self, ok: bool, n: int = 1):
+        with self._room:
+            self._pending -= n
+            if ok:
+                self.completed += n
+            self._room.notify_all()
+
+    def _broken(self):
+        with self._lock:
+            self._executor = None  # a worker died (OOM on a huge PDF); start fresh next time
+
+    async def run(self, fn, *args, stage: str = None):
+        # bounded: callers get PoolSaturated (HTTP 429) instead of an unbounded queue
+        self._acquire()
+        stage = stage or fn.__name__
+        submitted = time.time()
+        ok = False
+        try:
+            start, took, stages, result = await asyncio.get_running_loop().run_in_executor(self.executor, _call, fn, args)
+            record(f"{self.name}.queue_wait", max(0.0, start - submitted))
+            record(stage, took)
+            merge(stages)
+            ok = True
+            return result
+        except BrokenProcessPool:
+            self._broken()
+            raise
+        finally:
+            self._release(ok)
+
+    def map(self, fn, items, chunksize: int = 1) -> list:
+        """For bulk work already running in a thread (batch scoring, the matrix
+        maintainer). Items go in waves of at most half of max_pending chunks,
+        one pending slot per chunk, so a big batch leaves interactive calls
+        headroom instead of flooding the executor's queue."""
+        items = list(items)
+        per_wave = max(1, self.max_pending // 2) * chunksize
+        out = []
+        for s in range(0, len(items), per_wave):
+            wave = items[s:s + per_wave]
+            n = -(-len(wave) // chunksize)
+            self._acquire_wait(n)
+            ok = False
+            try:
+                for stages, result in self.executor.map(partial(_call_item, fn), wave, chunksize=chunksize):
+                    merge(stages)
+                    out.append(result)
+                ok = True
+            except BrokenProcessPool:
+                self._broken()
+                raise
+            finally:
+                self._release(ok, n)
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"kind": self.kind, "workers": self.workers, "pending": self._pending,
+                    "max_pending": self.max_pending, "completed": self.completed, "rejected": self.rejected}
+
+    def shutdown(self):
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+
+cpu_pool = WorkerPool("cpu", CPU_POOL, CPU_WORKERS, CPU_MAX_PENDING)
+embed_pool = WorkerPool("embed", "thread", EMBED_WORKERS, EMBED_MAX_PENDING)
+
+
+def stats() -> dict:
+    return {p.name: p.stats() for p in (cpu_pool, embed_pool)}
+
+
+def shutdown():
+    for p in (cpu_pool, embed_pool):
+        p.shutdown()
@@ -0,0 +1,89 @@
+"""Hard match + ATS + evidence for one long resume against many must-haves.
+
+    python -m bench.bench_analysis [--pages 10] [--must 50] [--repeat 20]
+
+Compares the previous per-skill rescans (lowercase per skill, fuzzy pass over
+every resume n-gram) with ``ResumeAnalysis``: cold (built from text), from the
+persisted dict, and warm (already in the LRU).
+"""
+import argparse, json, random, time
+
+from app.analysis import ResumeAnalysis, analyze
+from app.explain import evidence_cards
+from app.matcher import compile_skills, normalize_token, tokenize
+from app.scoring import ats_report, hard_match_scores
+from app.utils import bullet_density
+
+from bench.bench_skill_matcher import FILLER, synthetic_vocab
+
+WORDS_PER_PAGE = 500
+
+
+def synthetic_resume(skills, pages: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    lines = ["Experience", "Education", "Skills", "Projects"]
+    for _ in range(pages * WORDS_PER_PAGE // 10):
+        words = [rnd.choice(FILLER) for _ in range(9)]
+        if rnd.random() < 0.05:
+            words.append(rnd.choice(skills))
+        lines.append(("- " if rnd.random() < 0.3 else "") + " ".join(words))
+    return "\n".join(lines)
+
+
+def legacy(resume_text, jd_must, jd_good):
+    # the per-call path scoring used before ResumeAnalysis
+    lower = resume_text.lower()
+    tokens = tokenize(resume_text)
+    matcher = compile_skills(tuple(jd_must) + tuple(jd_good))
+    exact = matcher.find_exact(tokens)
+    pending = [s for s in jd_must if not (normalize_token(s) in exact or s in resume_text.lower())]
+    fuzzy = matcher.fuzzy_scores(tokens, pending, cutoff=85) if pending else {}
+    hard = {"exact": [s for s in jd_must if s not in pending], "fuzzy": fuzzy}
+    kc = sum(1 for s in jd_must if s in resume_text.lower()) / max(1, len(jd_must))
+    ats = {"bd": bullet_density(resume_text), "kc": kc}
+    lines = resume_text.splitlines()
+    cards = []
+    for s in jd_must + jd_good:
+        idx = [i for i, l in enumerate(lines) if s in l.lower()]
+        cards.append("\n".join(lines[max(0, idx[0] - 1):idx[0] + 2]) if idx else "")
+    return hard, ats, cards, lower
+
+
+def current(a, jd_must, jd_good):
+    return hard_match_scores(a, jd_must, jd_good), ats_report(a, jd_must), evidence_cards(a, jd_must + jd_good)
+
+
+def timeit(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - t0) / repeat * 1000, 3)
+
+
+def run(pages, n_must, repeat):
+    vocab = synthetic_vocab(2000)
+    rnd = random.Random(1)
+    must = rnd.sample(vocab, n_must)
+    good = rnd.sample(vocab, 10)
+    # half the must-haves appear verbatim, a few with a typo, the rest are missing
+    present = must[: n_must // 2] + [s[:-1] + "x" for s in must[n_must // 2: n_must // 2 + 5]]
+    text = synthetic_resume(present + good, pages)
+    stored = ResumeAnalysis.build(text).to_dict()
+    current(ResumeAnalysis.build(text), must, good)  # compile the JD matcher once for both paths
+    return {
+        "pages": pages, "chars": len(text), "tokens": len(stored["tokens"]), "must_haves": n_must,
+        "legacy_ms": timeit(lambda: legacy(text, must, good), repeat),
+        "cold_ms": timeit(lambda: current(ResumeAnalysis.build(text), must, good), repeat),
+        "from_stored_ms": timeit(lambda: current(ResumeAnalysis.from_dict(text, stored), must, good), repeat),
+        "warm_ms": timeit(lambda: current(analyze(text), must, good), repeat),
+        "build_ms": timeit(lambda: ResumeAnalysis.build(text), repeat),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--must", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=20)
+    a = ap.parse_args()
+    print(json.dumps(run(a.pages, a.must, a.repeat), indent=2))
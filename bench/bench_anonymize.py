@@ -0,0 +1,125 @@
+"""PII redaction on pathological inputs: the old three-pass regexes vs the engine.
+
+    python -m bench.bench_anonymize [--sizes 1000,10000,100000] [--legacy-max 20000] [--ner]
+
+Inputs are long runs that make a backtracking pattern retry at every
+character (``aaaa...``, digit runs, ``a@a.a.a...``), digit-heavy tables
+(years, grades, IDs) and an ordinary synthetic resume, each at every size.
+Reports seconds per call, the scaling exponent between the smallest and
+largest size (1.0 = linear) and how many phone masks were applied, which on
+the tables are all false positives. The report also lists which common
+phone formats (area code in parentheses, country code, separators) the
+engine masks. Legacy runs above --legacy-max are
+skipped (the email pattern is quadratic). --ner also times PERSON
+detection through ``nlp.pipe`` in batches against one document at a time.
+"""
+import argparse, json, math, random, re, time
+
+from bench.corpus import resume_lines, vocabulary
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(\+?\d{1,3}[-.\s]?)?(\d{3,5}[-.\s]?\d{3,4}[-.\s]?\d{3,4})")
+NAME_HINT_RE = re.compile(r"Name\s*:\s*(.+)", re.I)
+
+
+PHONE_FORMATS = ["(555) 123-4567", "+1 (555) 123-4567", "(555)123-4567", "555-123-4567", "555.123.4567",
+                 "+91 98765 43210", "+44 20 7946 0958", "(020) 7946 0958", "9876543210"]
+
+
+def phone_formats() -> dict:
+    from app.anonymize import anonymize
+    missed = [p for p in PHONE_FORMATS if anonymize(f"Phone: {p} (mobile)", ner=False)[0] != "Phone: [PHONE] (mobile)"]
+    return {"masked": len(PHONE_FORMATS) - len(missed), "total": len(PHONE_FORMATS), "missed": missed}
+
+
+def legacy(text: str) -> str:
+    text = EMAIL_RE.sub("[EMAIL]", text)
+    text = PHONE_RE.sub("[PHONE]", text)
+    return NAME_HINT_RE.sub("Name: [NAME]", text)
+
+
+def _repeat(unit: str, n: int) -> str:
+    return (unit * (n // max(1, len(unit)) + 1))[:n]
+
+
+def inputs(n: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    years = " ".join(str(rnd.randint(1995, 2025)) for _ in range(n // 5 + 1))[:n]
+    grades = "\n".join((f"Semester {i % 8 + 1} {rnd.uniform(6, 10):.2f} {rnd.randint(60, 99)} "
+                        f"{rnd.randint(1000, 9999)} {rnd.randint(1000, 9999)} {rnd.randint(1000, 9999)}") if i % 2 else
+                       f"{rnd.choice(('Marks:', 'Scores'))} " + " ".join(str(rnd.randint(10, 99)) for _ in range(6))
+                       for i in range(n // 40 + 1))[:n]
+    ids = " ".join(str(rnd.randint(10 ** 7, 10 ** 13)) for _ in range(n // 10 + 1))[:n]
+    resume = _repeat("\n".join(resume_lines(vocabulary(), 80, seed)) + "\n", n)
+    return {"alnum_run": "a" * n, "digit_run": "1" * n, "dotted_domain": "a@" + _repeat("a.", n - 2),
+            "year_table": years, "grade_table": grades, "id_table": ids, "resume": resume}
+
+
+def timeit(fn, text: str, min_s: float = 0.2):
+    runs, t0 = 0, time.perf_counter()
+    while True:
+        out = fn(text)
+        runs += 1
+        took = time.perf_counter() - t0
+        if took >= min_s or took > 1.0:
+            return took / runs, out
+
+
+def run(sizes, legacy_max):
+    from app.anonymize import anonymize
+    engine = lambda t: anonymize(t, ner=False)[0]
+    rows = []
+    for n in sizes:
+        for name, text in inputs(n).items():
+            new_s, new_out = timeit(engine, text)
+            row = {"input": name, "chars": n, "engine_ms": round(new_s * 1000, 3),
+                   "engine_phone_masks": new_out.count("[PHONE]")}
+            if n <= legacy_max:
+                old_s, old_out = timeit(legacy, text)
+                row.update(legacy_ms=round(old_s * 1000, 3), legacy_phone_masks=old_out.count("[PHONE]"),
+                           speedup=round(old_s / new_s, 1) if new_s else None)
+            rows.append(row)
+    scaling = {}
+    lo, hi = min(sizes), max(sizes)
+    for name in inputs(lo):
+        a = next(r for r in rows if r["input"] == name and r["chars"] == lo)
+        b = next(r for r in rows if r["input"] == name and r["chars"] == hi)
+        if hi > lo and a["engine_ms"] > 0:
+            scaling[name] = round(math.log(b["engine_ms"] / a["engine_ms"]) / math.log(hi / lo), 2)
+    return {"phone_formats": phone_formats(), "rows": rows, "engine_scaling_exponent": scaling}
+
+
+def run_ner(docs: int, batch: int):
+    from app import anonymize
+    texts = ["\n".join(resume_lines(vocabulary(), 60, i)) for i in range(docs)]
+    anonymize.NER_BATCH = batch
+    anonymize._ner_cache.clear()
+    anonymize.ner_spans(texts[:1])  # model load
+    anonymize._ner_cache.clear()
+    t0 = time.perf_counter()
+    for t in texts:
+        anonymize.ner_spans([t])
+    single = time.perf_counter() - t0
+    anonymize._ner_cache.clear()
+    t0 = time.perf_counter()
+    anonymize.ner_spans(texts)
+    batched = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    anonymize.ner_spans(texts)
+    cached = time.perf_counter() - t0
+    return {"docs": docs, "batch": batch, "one_by_one_s": round(single, 3), "batched_s": round(batched, 3),
+            "cached_s": round(cached, 4)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--legacy-max", type=int, default=20000)
+    ap.add_argument("--ner", action="store_true")
+    ap.add_argument("--ner-docs", type=int, default=64)
+    ap.add_argument("--ner-batch", type=int, default=16)
+    a = ap.parse_args()
+    report = run([int(s) for s in a.sizes.split(",")], a.legacy_max)
+    if a.ner:
+        report["ner"] = run_ner(a.ner_docs, a.ner_batch)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,118 @@
+"""Query count and latency for GET /evaluate/dashboard on a seeded SQLite DB.
+
+    python -m bench.bench_dashboard [--evaluations 20000] [--pages 50] [--p95-ms 50]
+
+Walks the dashboard with keyset cursors and times each page; also loads one
+page the old way (ORM rows serialized through ``EvaluationOut``, which
+lazy-loads each resume and JD) for comparison. Exits non-zero if a page
+issues more than one query or p95 exceeds --p95-ms.
+"""
+import argparse, json, os, random, sys, tempfile, time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Evaluation, JobDescription, Resume
+from app.routers import evaluate
+from app.schemas import EvaluationOut
+
+TITLES = ["Data Scientist", "ML Engineer", "Backend Developer", "Frontend Developer", "DevOps Engineer"]
+CITIES = ["Hyderabad", "Pune", "Bangalore", "Delhi", "Chennai"]
+
+
+def seed(engine, n_evals: int, n_resumes: int, n_jds: int, seed: int = 0):
+    rnd = random.Random(seed)
+    text = "lorem ipsum dolor sit amet " * 200  # ~5 KB, like a parsed resume
+    with engine.begin() as conn:
+        conn.execute(insert(JobDescription), [dict(id=i, title=f"{rnd.choice(TITLES)} {i}", company=f"co{i}",
+                                                   location=rnd.choice(CITIES), raw_text=text,
+                                                   must_have=["python"], good_to_have=[]) for i in range(1, n_jds + 1)])
+        conn.execute(insert(Resume), [dict(id=i, raw_text=text, anonymized_text=text, location=rnd.choice(CITIES),
+                                           sections={}, career_stage="junior") for i in range(1, n_resumes + 1)])
+        # distinct pairs: evaluations are unique per (resume, JD, flag)
+        pairs = rnd.sample(range(n_resumes * n_jds), min(n_evals, n_resumes * n_jds))
+        conn.execute(insert(Evaluation), [dict(resume_id=p // n_jds + 1, jd_id=p % n_jds + 1,
+                                               relevance_score=round(rnd.uniform(0, 100), 2), verdict="Medium",
+                                               hard_match={}, soft_match={}, feedback="", explainability={},
+                                               ats_report={}, bias_anonymized=True,
+                                               missing_elements={"skills": ["docker"], "certifications": [], "projects": []})
+                                          for p in pairs])
+
+
+def p95(xs):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(0.95 * len(xs)))]
+
+
+def run(n_evals, pages, limit, query):
+    path = os.path.join(tempfile.mkdtemp(), "dashboard.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    seed(engine, n_evals, max(1, n_evals // 10), 50)
+    Session = sessionmaker(bind=engine)
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a, **k: queries.append(1))
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(evaluate.router)
+    app.dependency_overrides[evaluate.get_db] = get_db
+    client = TestClient(app)
+
+    times, counts, rows, cursor = [], [], 0, None
+    for _ in range(pages):
+        params = dict(query, limit=limit, **({"cursor": cursor} if cursor else {}))
+        queries.clear()
+        t0 = time.perf_counter()
+        body = client.get("/evaluate/dashboard", params=params).json()
+        times.append((time.perf_counter() - t0) * 1000)
+        counts.append(len(queries))
+        rows += len(body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    # the previous read path, for comparison
+    db = Session()
+    queries.clear()
+    t0 = time.perf_counter()
+    legacy = (db.query(Evaluation).join(Resume).join(JobDescription).filter(Evaluation.relevance_score >= 0)
+              .order_by(Evaluation.relevance_score.desc()).limit(limit).all())
+    payload = json.dumps([EvaluationOut.model_validate(e).model_dump(mode="json") for e in legacy])
+    legacy_ms = (time.perf_counter() - t0) * 1000
+    legacy_queries = len(queries)
+    db.close()
+    return {"evaluations": n_evals, "pages": len(times), "rows": rows, "max_queries_per_page": max(counts),
+            "p50_ms": round(sorted(times)[len(times) // 2], 2), "p95_ms": round(p95(times), 2),
+            "legacy_queries_per_page": legacy_queries, "legacy_page_ms": round(legacy_ms, 2),
+            "legacy_page_kb": round(len(payload) / 1024, 1)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--evaluations", type=int, default=20000)
+    ap.add_argument("--pages", type=int, default=50)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--job-title", default="")
+    ap.add_argument("--location", default="")
+    ap.add_argument("--p95-ms", type=float, default=50.0)
+    a = ap.parse_args()
+    report = run(a.evaluations, a.pages, a.limit, {"job_title": a.job_title, "location": a.location})
+    print(json.dumps(report, indent=2))
+    failed = []
+    if report["max_queries_per_page"] > 1:
+        failed.append(f"{report['max_queries_per_page']} queries per page (expected 1)")
+    if report["p95_ms"] > a.p95_ms:
+        failed.append(f"p95 {report['p95_ms']} ms > {a.p95_ms} ms")
+    if failed:
+        print("FAIL: " + "; ".join(failed), file=sys.stderr)
+        sys.exit(1)
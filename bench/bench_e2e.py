@@ -0,0 +1,190 @@
+"""End-to-end pipeline benchmark on a synthetic corpus, with a regression gate.
+
+    python -m bench.bench_e2e [--resumes 60] [--jds 5] [--lines 60] [--formats txt,docx,pdf]
+                              [--baseline PATH] [--tolerance 0.25] [--save-baseline PATH]
+
+Generates a corpus with ``bench.corpus``, then runs each stage over it one
+document at a time: the pipeline functions (extract, parse, anonymize,
+skills, embed, hard match, ATS + combine) and the HTTP endpoints through
+TestClient against a fresh SQLite database. DATABASE_URL is pointed at a
+temp file before the app is imported, so nothing touches a real database.
+
+Per stage: items, throughput, p50/p95/p99 latency and the Python heap peak.
+The first --warmup items of each stage run under tracemalloc (the memory
+figure) and are left out of the latency numbers, which also keeps model
+loading and cold caches out of the percentiles. Process peak RSS is
+reported once for the whole run.
+
+With --baseline, a stage whose p95 grew (by more than --min-delta-ms) or
+whose throughput dropped by more than --tolerance (fraction) fails the run
+with exit status 1. Save a
+baseline on the reference machine with --save-baseline; numbers from
+different hardware are not comparable.
+"""
+import argparse, contextlib, json, os, resource, sys, tempfile, time, tracemalloc
+
+from bench.corpus import generate
+
+
+def _rss_mb() -> float:
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024 * 1024) if sys.platform == "darwin" else r / 1024
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(p * len(xs)))], 3) if xs else None
+
+
+def run_stage(name: str, fn, inputs: list, warmup: int):
+    """Call ``fn`` on every input; returns (outputs, report row)."""
+    outs, lat = [], []
+    warm = inputs[:warmup]
+    tracemalloc.start()
+    for x in warm:
+        outs.append(fn(x))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for x in inputs[warmup:]:
+        s = time.perf_counter()
+        outs.append(fn(x))
+        lat.append((time.perf_counter() - s) * 1000)
+    wall = time.perf_counter() - t0
+    row = {"stage": name, "items": len(lat), "per_s": round(len(lat) / wall, 1) if wall > 0 else None,
+           "p50_ms": pct(lat, 0.50), "p95_ms": pct(lat, 0.95), "p99_ms": pct(lat, 0.99),
+           "heap_peak_kb": round(peak / 1024, 1)}
+    print(f"✅ {name}: {row['items']} items, p95 {row['p95_ms']} ms", file=sys.stderr)
+    return outs, row
+
+
+def pipeline_stages(corpus: dict, warmup: int) -> list:
+    from app.nlp import extract_skills
+    from app.parsing import extract_text_from_file, parse_resume
+    from app.scoring import ats_report, combine_score, hard_match_scores
+    from app.semantic import cosine, embed
+    from app.utils import anonymize_pii
+
+    rows = []
+    files = corpus["resumes"]
+    for fmt in sorted({f["format"] for f in files}):
+        paths = [f["path"] for f in files if f["format"] == fmt]
+        _, row = run_stage(f"extract.{fmt}", extract_text_from_file, paths, warmup)
+        rows.append(row)
+    texts = [extract_text_from_file(f["path"]) for f in files]
+    parsed, row = run_stage("parse_resume", parse_resume, texts, warmup)
+    rows.append(row)
+    std = [p[0] for p in parsed]
+    anon, row = run_stage("anonymize_pii", lambda t: anonymize_pii(t)[0], std, warmup)
+    rows.append(row)
+    _, row = run_stage("extract_skills", extract_skills, anon, warmup)
+    rows.append(row)
+    vecs, row = run_stage("embed", embed, anon, warmup)
+    rows.append(row)
+    jd = corpus["jds"][0]
+    jd_vec = embed(jd["raw_text"])
+    hards, row = run_stage("hard_match_scores", lambda t: hard_match_scores(t, jd["must_have"], jd["good_to_have"]),
+                           anon, warmup)
+    rows.append(row)
+    items = list(zip(anon, hards, vecs))
+    _, row = run_stage("ats_combine", lambda x: combine_score(x[1], cosine(x[2], jd_vec), ats_report(x[0], jd["must_have"])),
+                       items, warmup)
+    rows.append(row)
+    return rows
+
+
+def http_stages(corpus: dict, warmup: int, work_dir: str) -> list:
+    from fastapi.testclient import TestClient
+    import app.main as main
+    from app.routers import uploads
+
+    uploads.UPLOAD_DIR = os.path.join(work_dir, "uploads")  # keep the repo's uploads/ clean
+    os.makedirs(uploads.UPLOAD_DIR, exist_ok=True)
+    rows = []
+    with TestClient(main.app) as client:
+        def ok(r):
+            if r.status_code >= 400:
+                raise RuntimeError(f"{r.request.method} {r.request.url.path}: {r.status_code} {r.text[:200]}")
+            return r.json()
+
+        def upload(f):
+            with open(f["path"], "rb") as fh:
+                return ok(client.post("/upload/resume", files={"file": (os.path.basename(f["path"]), fh)}))
+
+        resumes, row = run_stage("http.upload_resume", upload, corpus["resumes"], warmup)
+        rows.append(row)
+        jds, row = run_stage("http.upload_jd", lambda jd: ok(client.post("/upload/jd", json=jd)),
+                             corpus["jds"], min(warmup, max(0, len(corpus["jds"]) - 1)))
+        rows.append(row)
+        pairs = [{"resume_id": r["id"], "jd_id": jds[i % len(jds)]["id"]} for i, r in enumerate(resumes)]
+        _, row = run_stage("http.evaluate", lambda p: ok(client.post("/evaluate/", json=p)), pairs, warmup)
+        rows.append(row)
+        pages = [{"limit": 20, "min_score": m} for m in (0, 10, 20, 30, 40) for _ in range(4)]
+        _, row = run_stage("http.dashboard", lambda q: ok(client.get("/evaluate/dashboard", params=q)), pages, warmup)
+        rows.append(row)
+        lists = [{"jd_id": j["id"], "min_score": 0, "limit": 20} for j in jds for _ in range(max(4, 25 // len(jds)))]
+        _, row = run_stage("http.shortlist", lambda q: ok(client.get("/search/shortlist", params=q)), lists, warmup)
+        rows.append(row)
+    return rows
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float = 1.0) -> list:
+    # min_delta_ms: sub-millisecond stages jitter by more than any sane tolerance
+    base = {r["stage"]: r for r in baseline.get("stages", [])}
+    failures = []
+    for r in report["stages"]:
+        b = base.get(r["stage"])
+        if not b:
+            continue
+        if b.get("p95_ms") and r["p95_ms"] is not None and r["p95_ms"] > b["p95_ms"] * (1 + tolerance) \
+                and r["p95_ms"] - b["p95_ms"] > min_delta_ms:
+            failures.append(f"{r['stage']}: p95 {r['p95_ms']} ms vs baseline {b['p95_ms']} ms")
+        if b.get("per_s") and r["per_s"] is not None and r["per_s"] < b["per_s"] * (1 - tolerance):
+            failures.append(f"{r['stage']}: {r['per_s']}/s vs baseline {b['per_s']}/s")
+    return failures
+
+
+def main(a) -> int:
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    # before any app import: app.db builds its engine from the environment
+    os.environ["DATABASE_URL"] = a.database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ.setdefault("INGEST_ENABLED", "0")
+    os.environ.setdefault("MATRIX_ENABLED", "0")
+    os.environ.setdefault("WARM_MODELS", "off")
+    os.environ.setdefault("SERVER_TIMING", "0")
+
+    corpus = generate(os.path.join(work_dir, "corpus"), a.resumes, a.jds, a.lines, a.formats.split(","), a.seed)
+    with contextlib.redirect_stdout(sys.stderr):  # the app's progress prints; stdout is the report
+        stages = pipeline_stages(corpus, a.warmup)
+        if not a.skip_http:
+            stages += http_stages(corpus, a.warmup, work_dir)
+    report = {"resumes": a.resumes, "jds": a.jds, "lines": a.lines, "formats": a.formats,
+              "peak_rss_mb": round(_rss_mb(), 1), "stages": stages}
+    print(json.dumps(report, indent=2))
+    if a.save_baseline:
+        with open(a.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f:
+            failures = compare(report, json.load(f), a.tolerance, a.min_delta_ms)
+        if failures:
+            print("REGRESSION:\n  " + "\n  ".join(failures), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=60)
+    ap.add_argument("--jds", type=int, default=5)
+    ap.add_argument("--lines", type=int, default=60, help="lines per synthetic resume")
+    ap.add_argument("--formats", default="txt,docx,pdf")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--warmup", type=int, default=5, help="items per stage measured for memory, not latency")
+    ap.add_argument("--skip-http", action="store_true")
+    ap.add_argument("--database-url", default="", help="defaults to a fresh SQLite file")
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore p95 growth smaller than this")
+    ap.add_argument("--save-baseline")
+    sys.exit(main(ap.parse_args()))
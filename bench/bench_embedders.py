@@ -0,0 +1,133 @@
+"""Embedding backends: throughput, memory and agreement with PyTorch.
+
+    python -m bench.bench_embedders [--backends torch,onnx,onnx-int8] [--threads 0] [--dim 0]
+                                    [--synthetic 0] [--repeat 3] [--batch 32]
+
+Texts are the sample resumes and JDs in ``uploads/`` (plus --synthetic
+generated resumes). Each backend runs in a fresh interpreter so its RSS is
+its own: load time, RSS after load, texts/sec over --repeat passes and peak
+RSS. The first backend is the reference (torch by default); every other one
+is compared with it on
+
+- cosine agreement: per text, cos(reference vector, backend vector)
+  (skipped with --dim, which truncates every backend but the reference),
+- ranking agreement: for each JD, Spearman correlation of the resume
+  similarity scores and whether the top-ranked resume is the same.
+
+The ONNX backends need ``python -m app.embedders export`` first.
+"""
+import argparse, glob, json, os, resource, subprocess, sys, tempfile, time
+import numpy as np
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def corpus(synthetic: int):
+    from app.parsing import extract_text_from_file
+    resumes, jds = [], []
+    for path in sorted(glob.glob(os.path.join("uploads", "*.pdf"))):
+        (jds if "jd" in os.path.basename(path).lower() else resumes).append(extract_text_from_file(path))
+    if synthetic:
+        from bench.corpus import jd_fields, resume_lines, vocabulary
+        vocab = vocabulary()
+        resumes += ["\n".join(resume_lines(vocab, 60, i)) for i in range(synthetic)]
+        jds += [jd_fields(vocab, j)["raw_text"] for j in range(max(1, synthetic // 20))]
+    return resumes, jds
+
+
+def child(backend: str, texts_path: str, out_path: str, repeat: int, batch: int):
+    with open(texts_path, encoding="utf-8") as f:
+        texts = json.load(f)
+    base_rss = _rss_mb()
+    t0 = time.perf_counter()
+    from app import embedders
+    model = embedders.load(backend)
+    model.encode(["warm up"])
+    out = {"backend": backend, "load_s": round(time.perf_counter() - t0, 2),
+           "rss_start_mb": round(base_rss, 1), "rss_loaded_mb": round(_rss_mb(), 1)}
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        vecs = model.encode(texts, batch_size=batch)
+    took = time.perf_counter() - t0
+    out.update(texts=len(texts), dim=int(vecs.shape[1]), texts_per_s=round(repeat * len(texts) / took, 1),
+               rss_peak_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+               threads=embedders.EMBED_THREADS)
+    np.save(out_path, vecs)
+    print(json.dumps(out))
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra, rb = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    if len(a) < 2:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def agreement(ref: np.ndarray, vecs: np.ndarray, n_resumes: int) -> dict:
+    out = {}
+    if ref.shape == vecs.shape:
+        cos = np.sum(ref * vecs, axis=1)
+        out.update(cosine_min=round(float(cos.min()), 5), cosine_mean=round(float(cos.mean()), 5),
+                   cosine_p5=round(float(np.percentile(cos, 5)), 5))
+    rr, rj = ref[:n_resumes], ref[n_resumes:]
+    vr, vj = vecs[:n_resumes], vecs[n_resumes:]
+    if len(rj) and n_resumes:
+        s_ref, s_new = rj @ rr.T, vj @ vr.T
+        rhos = [_spearman(s_ref[j], s_new[j]) for j in range(len(rj))]
+        out.update(spearman_min=round(min(rhos), 4), spearman_mean=round(float(np.mean(rhos)), 4),
+                   top1_same=round(float(np.mean(s_ref.argmax(axis=1) == s_new.argmax(axis=1))), 4))
+    return out
+
+
+def main(a) -> int:
+    resumes, jds = corpus(a.synthetic)
+    work = tempfile.mkdtemp(prefix="bench_embed_")
+    texts_path = os.path.join(work, "texts.json")
+    with open(texts_path, "w", encoding="utf-8") as f:
+        json.dump(resumes + jds, f)
+    env = dict(os.environ)
+    if a.threads:
+        env["EMBED_THREADS"] = str(a.threads)
+    rows, vecs = [], {}
+    for i, backend in enumerate(a.backends.split(",")):
+        if a.dim and i:
+            env["EMBED_DIM"] = str(a.dim)
+        out_path = os.path.join(work, f"{backend}.npy")
+        p = subprocess.run([sys.executable, "-m", "bench.bench_embedders", "--child", backend, "--texts", texts_path,
+                            "--out", out_path, "--repeat", str(a.repeat), "--batch", str(a.batch)],
+                           env=env, capture_output=True, text=True)
+        if p.returncode != 0:
+            rows.append({"backend": backend, "error": (p.stderr.strip().splitlines() or ["failed"])[-1]})
+            continue
+        rows.append(json.loads(p.stdout.strip().splitlines()[-1]))
+        vecs[backend] = np.load(out_path)
+    ref = next((r["backend"] for r in rows if "error" not in r), None)
+    for r in rows:
+        if ref and r["backend"] != ref and r["backend"] in vecs:
+            r["vs_" + ref] = agreement(vecs[ref], vecs[r["backend"]], len(resumes))
+    print(json.dumps({"resumes": len(resumes), "jds": len(jds), "reference": ref, "backends": rows}, indent=2))
+    return 0 if ref else 1
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="torch,onnx,onnx-int8", help="the first one is the reference")
+    ap.add_argument("--threads", type=int, default=0, help="EMBED_THREADS for every backend")
+    ap.add_argument("--dim", type=int, default=0, help="EMBED_DIM (truncation) for every backend but the first")
+    ap.add_argument("--synthetic", type=int, default=0, help="extra generated resumes")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--child")
+    ap.add_argument("--texts")
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    if a.child:
+        child(a.child, a.texts, a.out, a.repeat, a.batch)
+        sys.exit(0)
+    sys.exit(main(a))
@@ -0,0 +1,139 @@
+"""Evaluation storage: detail payloads inline vs in compressed evaluation_details.
+
+    python -m bench.bench_eval_storage [--evaluations 20000] [--resumes 40] [--pages 30]
+
+Scores --resumes synthetic resumes against one synthetic JD with
+``score_fields`` (real evidence snippets, hard-match and ATS reports,
+feedback), then seeds two SQLite files with --evaluations rows cycling
+through those payloads:
+
+- inline: the old layout, every payload in the evaluations row's JSON columns,
+- split: narrow evaluations rows plus one compressed evaluation_details row each.
+
+Per layout, after VACUUM: file size, bytes per table (when SQLite has the
+dbstat table), dashboard page latency walking --pages keyset pages, and
+GET /evaluate/{id}/details latency (the inline layout is served through the
+legacy fallback, so both read paths are timed on the same endpoint).
+"""
+import argparse, json, os, random, sqlite3, tempfile, time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.details import pack, split
+from app.models import Evaluation, EvaluationDetail, JobDescription, Resume
+from app.routers import evaluate
+from bench.corpus import jd_fields, resume_lines, vocabulary
+
+
+def payloads(n: int):
+    from app.scoring import score_fields
+    vocab = vocabulary()
+    jd = jd_fields(vocab, 0)
+    rnd = random.Random(0)
+    texts = ["\n".join(resume_lines(vocab, 60, i)) for i in range(n)]
+    return [score_fields(t, "junior", 1, jd["must_have"], jd["good_to_have"], rnd.uniform(0.2, 0.8), True)
+            for t in texts]
+
+
+def seed(path: str, layout: str, fields: list, n_evals: int, n_jds: int = 20):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    n_resumes = max(1, n_evals // n_jds + 1)
+    with engine.begin() as conn:
+        conn.execute(insert(JobDescription), [dict(id=i, title=f"Role {i}", company=f"co{i}", raw_text="jd",
+                                                   must_have=[], good_to_have=[]) for i in range(1, n_jds + 1)])
+        conn.execute(insert(Resume), [dict(id=i, raw_text="r", anonymized_text="r", sections={}, career_stage="junior")
+                                      for i in range(1, n_resumes + 1)])
+        for s in range(0, n_evals, 1000):
+            rows, dets = [], []
+            for k in range(s, min(n_evals, s + 1000)):
+                hot, detail = split({**fields[k % len(fields)], "jd_id": k % n_jds + 1})
+                row = dict(id=k + 1, resume_id=k // n_jds + 1, **hot)
+                if layout == "inline":
+                    row.update(detail)
+                else:
+                    codec, blob, size = pack(detail)
+                    dets.append(dict(evaluation_id=k + 1, codec=codec, payload=blob, raw_bytes=size))
+                rows.append(row)
+            conn.execute(insert(Evaluation), rows)
+            if dets:
+                conn.execute(insert(EvaluationDetail), dets)
+    engine.dispose()
+    with sqlite3.connect(path) as c:
+        c.execute("VACUUM")
+
+
+def table_bytes(path: str) -> dict:
+    with sqlite3.connect(path) as c:
+        try:
+            rows = c.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+        except sqlite3.OperationalError:
+            return {}  # built without SQLITE_ENABLE_DBSTAT_VTAB
+    return {name: size for name, size in rows if name.startswith(("evaluation", "ix_evaluations", "ux_evaluations"))}
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(p * len(xs)))], 3) if xs else None
+
+
+def measure(path: str, pages: int, n_evals: int) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(evaluate.router)
+    app.dependency_overrides[evaluate.get_db] = get_db
+    client = TestClient(app)
+    dash, cursor = [], None
+    for _ in range(pages):
+        t0 = time.perf_counter()
+        body = client.get("/evaluate/dashboard", params={"limit": 50, **({"cursor": cursor} if cursor else {})}).json()
+        dash.append((time.perf_counter() - t0) * 1000)
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    rnd = random.Random(1)
+    det = []
+    for _ in range(200):
+        t0 = time.perf_counter()
+        r = client.get(f"/evaluate/{rnd.randint(1, n_evals)}/details")
+        det.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.text
+    engine.dispose()
+    return {"dashboard_p50_ms": pct(dash, 0.5), "dashboard_p95_ms": pct(dash, 0.95),
+            "details_p50_ms": pct(det, 0.5), "details_p95_ms": pct(det, 0.95)}
+
+
+def run(n_evals: int, n_resumes: int, pages: int) -> dict:
+    fields = payloads(n_resumes)
+    raw = [len(json.dumps(split(f)[1])) for f in fields]
+    work = tempfile.mkdtemp(prefix="bench_eval_storage_")
+    out = {"evaluations": n_evals, "payload_json_bytes_mean": round(sum(raw) / len(raw)),
+           "payload_compressed_bytes_mean": round(sum(len(pack(split(f)[1])[1]) for f in fields) / len(fields))}
+    for layout in ("inline", "split"):
+        path = os.path.join(work, f"{layout}.db")
+        seed(path, layout, fields, n_evals)
+        out[layout] = {"file_mb": round(os.path.getsize(path) / 1e6, 2),
+                       "table_bytes": table_bytes(path), **measure(path, pages, n_evals)}
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--evaluations", type=int, default=20000)
+    ap.add_argument("--resumes", type=int, default=40, help="distinct payloads")
+    ap.add_argument("--pages", type=int, default=30)
+    a = ap.parse_args()
+    print(json.dumps(run(a.evaluations, a.resumes, a.pages), indent=2))
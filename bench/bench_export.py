@@ -0,0 +1,86 @@
+"""Streaming shortlist export: throughput and memory by export size.
+
+    python -m bench.bench_export [--rows 100000,300000] [--formats csv,ndjson,parquet]
+
+Seeds a fresh SQLite file with --rows evaluations for one JD (DATABASE_URL is
+pointed at it before the app is imported), then calls the
+/search/shortlist/export handler with min_score=0 in each format and drains
+the StreamingResponse body, reporting rows/sec, response bytes and the
+Python heap peak. TestClient is not used: it buffers the whole body, which
+is exactly the memory being measured. With a server-side cursor the heap
+peak stays flat as --rows grows. Parquet is skipped without pyarrow.
+"""
+import argparse, asyncio, json, os, random, sys, tempfile, time, tracemalloc
+
+
+def seed(engine, n: int, seed: int = 0):
+    from sqlalchemy import insert
+    from app.models import Evaluation, JobDescription, Resume
+    rnd = random.Random(seed)
+    cities, stages = ["Hyderabad", "Pune", "Bangalore", "Delhi"], ["fresher", "junior", "mid", "senior"]
+    with engine.begin() as conn:
+        conn.execute(insert(JobDescription), [dict(id=1, title="Data Scientist", company="co", raw_text="jd",
+                                                   must_have=[], good_to_have=[])])
+        for s in range(0, n, 20000):
+            ids = range(s + 1, min(n, s + 20000) + 1)
+            conn.execute(insert(Resume), [dict(id=i, raw_text="", anonymized_text="", sections={},
+                                               location=rnd.choice(cities), career_stage=rnd.choice(stages)) for i in ids])
+            conn.execute(insert(Evaluation), [dict(id=i, resume_id=i, jd_id=1, relevance_score=round(rnd.uniform(0, 100), 2),
+                                                   verdict="Medium", bias_anonymized=True,
+                                                   missing_elements={"skills": [], "certifications": [], "projects": []})
+                                              for i in ids])
+
+
+def consume(fmt: str) -> int:
+    from app.db import SessionLocal
+    from app.routers import search
+
+    async def drain(resp):
+        size = 0
+        async for chunk in resp.body_iterator:
+            size += len(chunk)
+        return size
+    with SessionLocal() as db:
+        resp = search.shortlist_export(1, format=fmt, min_score=0, location=None, career_stage=None, db=db)
+    return asyncio.run(drain(resp))
+
+
+def run(sizes, formats) -> list:
+    from sqlalchemy import delete
+    from app.db import engine
+    from app.migrate import sync_schema
+    from app.models import Evaluation, JobDescription, Resume
+    sync_schema(engine)
+    out = []
+    for n in sizes:
+        with engine.begin() as conn:
+            for model in (Evaluation, Resume, JobDescription):
+                conn.execute(delete(model))
+        seed(engine, n)
+        for fmt in formats:
+            t0 = time.perf_counter()
+            size = consume(fmt)
+            took = time.perf_counter() - t0
+            tracemalloc.start()
+            consume(fmt)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            row = {"rows": n, "format": fmt, "rows_per_s": round(n / took), "mb": round(size / 1e6, 2),
+                   "heap_peak_mb": round(peak / 1e6, 2)}
+            print(f"✅ {fmt} {n} rows: {row['rows_per_s']}/s, heap peak {row['heap_peak_mb']} MB", file=sys.stderr)
+            out.append(row)
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="100000,300000")
+    ap.add_argument("--formats", default="csv,ndjson,parquet")
+    ap.add_argument("--database-url", default="", help="defaults to a fresh SQLite file")
+    a = ap.parse_args()
+    work = tempfile.mkdtemp(prefix="bench_export_")
+    # before any app import: app.db builds its engine from the environment
+    os.environ["DATABASE_URL"] = a.database_url or f"sqlite:///{os.path.join(work, 'export.db')}"
+    from app.routers import search
+    formats = [f for f in a.formats.split(",") if f != "parquet" or search.pq is not None]
+    print(json.dumps(run([int(s) for s in a.rows.split(",")], formats), indent=2))
@@ -0,0 +1,68 @@
+"""Per-document time and peak RSS for PDF text extraction.
+
+    python -m bench.bench_pdf_extract [--pages 200] [--files a.pdf b.pdf]
+
+Each (document, mode) runs in a fresh process so ru_maxrss is that document's
+peak. Modes: ``legacy`` (pdfplumber, every page joined in one pass, caches
+kept), ``pdfplumber`` and ``auto`` (streaming ``extract_pdf``; auto uses the
+pdfium text layer first). Without --files a synthetic text PDF is generated.
+"""
+import argparse, json, multiprocessing as mp, os, random, resource, sys, tempfile, time
+
+from bench.bench_skill_matcher import FILLER
+from bench.corpus import write_pdf
+
+MODES = ("legacy", "pdfplumber", "auto")
+
+
+def synthetic_pdf(path: str, pages: int, lines_per_page: int = 50, seed: int = 0):
+    rnd = random.Random(seed)
+    rows = [" ".join(rnd.choice(FILLER) for _ in range(12)) for _ in range(pages * lines_per_page)]
+    write_pdf(path, rows, lines_per_page)
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024 * 1024) if sys.platform == "darwin" else r / 1024
+
+
+def _child(path: str, mode: str, max_pages: int, conn):
+    import pdfplumber
+    from app.parsing import extract_pdf
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        with pdfplumber.open(path) as pdf:
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        info = {"pages": None, "truncated": ""}
+    else:
+        text, info = extract_pdf(path, max_pages=max_pages, engine=mode)
+    conn.send({"mode": mode, "seconds": round(time.perf_counter() - t0, 3), "chars": len(text),
+               "pages": info["pages"], "truncated": info["truncated"],
+               "peak_rss_mb": round(_rss_mb(), 1), "rss_growth_mb": round(_rss_mb() - base, 1)})
+
+
+def measure(path: str, mode: str, max_pages: int) -> dict:
+    ctx = mp.get_context("spawn")
+    recv, send = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_child, args=(path, mode, max_pages, send))
+    p.start()
+    row = recv.recv()
+    p.join()
+    return {"file": os.path.basename(path), **row}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--max-pages", type=int, default=10_000, help="page cap for the streaming modes")
+    ap.add_argument("--files", nargs="*")
+    ap.add_argument("--modes", default=",".join(MODES))
+    a = ap.parse_args()
+    files = a.files
+    if not files:
+        tmp = os.path.join(tempfile.mkdtemp(), f"synthetic_{a.pages}p.pdf")
+        synthetic_pdf(tmp, a.pages)
+        files = [tmp]
+    print(json.dumps([measure(f, m, a.max_pages) for f in files for m in a.modes.split(",")], indent=2))
@@ -0,0 +1,51 @@
+"""What-if re-ranking over stored score components, by candidate count.
+
+    python -m bench.bench_rescore [--sizes 1000,10000,100000] [--must 8] [--good 8] [--top-k 20]
+
+Builds ``whatif.Components`` from synthetic match_scores rows (random
+coverage, similarity and per-skill hit flags; no database, no model) and
+times ``whatif.rescore`` with new weights, a promoted and a dropped
+must-have skill, and a candidate's assumed skills. Reports milliseconds per
+call and the time to build the columns from rows (the cache-miss cost on
+top of the SQL read).
+"""
+import argparse, json, random, time
+from types import SimpleNamespace
+
+
+def rows(n: int, skills: int, seed: int = 0):
+    rnd = random.Random(seed)
+    flags = (0, 1 | 4, 1 | 4, 2, 4)
+    return [SimpleNamespace(resume_id=i + 1, hard_coverage=rnd.random(), soft_similarity=rnd.uniform(0.2, 0.9),
+                            ats_norm=rnd.uniform(0.3, 1.0), skill_hits=bytes(rnd.choice(flags) for _ in range(skills)))
+            for i in range(n)]
+
+
+def run(sizes, must: int, good: int, top_k: int):
+    from app.whatif import Components, rescore
+    skills = [f"skill{i}" for i in range(must + good)]
+    out = []
+    for n in sizes:
+        data = rows(n, len(skills))
+        t0 = time.perf_counter()
+        c = Components(None, skills, must, data)
+        build = time.perf_counter() - t0
+        kw = dict(weights={"hard": 0.4, "soft": 0.4, "ats": 0.2}, add_must=[skills[must]], remove_must=[skills[0]],
+                  resume_id=n // 2, assume_skills=skills[1:3], top_k=top_k)
+        runs, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < 0.5 or runs < 3:
+            rescore(c, **kw)
+            runs += 1
+        out.append({"candidates": n, "skills": len(skills), "build_ms": round(build * 1000, 2),
+                    "rescore_ms": round((time.perf_counter() - t0) / runs * 1000, 3)})
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--must", type=int, default=8)
+    ap.add_argument("--good", type=int, default=8)
+    ap.add_argument("--top-k", type=int, default=20)
+    a = ap.parse_args()
+    print(json.dumps(run([int(s) for s in a.sizes.split(",")], a.must, a.good, a.top_k), indent=2))
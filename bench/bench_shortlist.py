@@ -0,0 +1,120 @@
+"""Load test for GET /search/shortlist against a large seeded SQLite DB.
+
+    python -m bench.bench_shortlist [--evaluations 1000000] [--requests 2000] [--concurrency 8]
+
+Seeds resumes, JDs and evaluations (once per --db path), then fires random
+shortlist requests (random JD, optional location / career-stage filter, a
+few cursor pages deep) from --concurrency threads. Reports throughput,
+latency percentiles and how many pages came back short although more
+matching rows existed (always 0 now that filtering happens in SQL).
+"""
+import argparse, json, os, random, tempfile, threading, time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Evaluation
+from app.routers import search
+
+CITIES = ["Hyderabad", "Pune", "Bangalore", "Delhi", "Chennai", "Mumbai", "Kolkata", "Noida"]
+STAGES = ["fresher", "junior", "mid", "senior"]
+
+
+def seed(engine, n_evals: int, n_resumes: int, n_jds: int, seed: int = 0):
+    rnd = random.Random(seed)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.executemany("INSERT INTO job_descriptions (id, title, company, location, raw_text) VALUES (?, ?, ?, ?, ?)",
+                        [(i, f"Role {i}", "co", rnd.choice(CITIES), "") for i in range(1, n_jds + 1)])
+        cur.executemany("INSERT INTO resumes (id, location, career_stage, raw_text, anonymized_text) VALUES (?, ?, ?, ?, ?)",
+                        [(i, rnd.choice(CITIES), rnd.choice(STAGES), "x" * 2000, "x" * 2000)
+                         for i in range(1, n_resumes + 1)])
+        batch = 100_000
+        for start in range(0, n_evals, batch):
+            cur.executemany("INSERT INTO evaluations (resume_id, jd_id, relevance_score, verdict) VALUES (?, ?, ?, ?)",
+                            [(rnd.randint(1, n_resumes), rnd.randint(1, n_jds), round(rnd.uniform(0, 100), 2), "Medium")
+                             for _ in range(min(batch, n_evals - start))])
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(p * len(xs)))], 2) if xs else None
+
+
+def run(db_path, n_evals, n_requests, concurrency, n_jds, depth):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        have = db.scalar(select(func.count(Evaluation.id)))
+    seed_s = None
+    if not have:
+        t0 = time.perf_counter()
+        seed(engine, n_evals, max(1, n_evals // 10), n_jds)
+        seed_s = round(time.perf_counter() - t0, 1)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(search.router)
+    app.dependency_overrides[search.get_db] = get_db
+    lat, short = [], [0]
+    lock = threading.Lock()
+    per_thread = n_requests // concurrency
+
+    def worker(seed: int):
+        rnd = random.Random(seed)
+        client = TestClient(app)
+        for _ in range(per_thread):
+            params = {"jd_id": rnd.randint(1, n_jds), "min_score": rnd.choice([0, 40, 60, 80]), "limit": 50}
+            if rnd.random() < 0.5:
+                params["location"] = rnd.choice(CITIES)[:4].lower()
+            if rnd.random() < 0.3:
+                params["career_stage"] = rnd.choice(STAGES)
+            cursor = None
+            for _ in range(rnd.randint(1, depth)):
+                t0 = time.perf_counter()
+                body = client.get("/search/shortlist", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+                ms = (time.perf_counter() - t0) * 1000
+                with lock:
+                    lat.append(ms)
+                    if body["next_cursor"] and len(body["items"]) < params["limit"]:
+                        short[0] += 1
+                cursor = body["next_cursor"]
+                if not cursor:
+                    break
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    return {"evaluations": have or n_evals, "seed_s": seed_s, "requests": len(lat), "concurrency": concurrency,
+            "req_per_s": round(len(lat) / wall, 1), "p50_ms": pct(lat, 0.50), "p95_ms": pct(lat, 0.95),
+            "p99_ms": pct(lat, 0.99), "short_pages": short[0]}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--evaluations", type=int, default=1_000_000)
+    ap.add_argument("--jds", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--depth", type=int, default=3, help="max cursor pages followed per request")
+    ap.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_shortlist.db"))
+    a = ap.parse_args()
+    print(json.dumps(run(a.db, a.evaluations, a.requests, a.concurrency, a.jds, a.depth), indent=2))
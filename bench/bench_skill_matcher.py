@@ -0,0 +1,104 @@
+"""Resumes/sec for skill extraction against synthetic ontologies of growing size.
+
+    python -m bench.bench_skill_matcher [--resumes 20] [--legacy]
+
+--legacy also times the old per-n-gram ``process.extractOne`` scan (slow at 10k).
+The report starts with exact-match recall on the list formats JDs use
+("Python,SQL", "docker;aws", "python/django").
+"""
+import argparse, json, random, string, time
+
+from rapidfuzz import process
+
+from app.matcher import SkillMatcher, normalize_token, tokenize
+
+FILLER = ("designed built maintained services team project using with for and the "
+          "improved latency reduced cost by percent led migration across stack").split()
+
+
+def synthetic_vocab(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    vocab = set()
+    while len(vocab) < n:
+        words = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 9)))
+                 for _ in range(rnd.choice([1, 1, 2, 3]))]
+        vocab.add(" ".join(words))
+    return sorted(vocab)
+
+
+def synthetic_resume(vocab, words: int = 600, seed: int = 0):
+    rnd = random.Random(seed)
+    out = []
+    while len(out) < words:
+        if rnd.random() < 0.08:
+            out.extend(rnd.choice(vocab).split())
+        else:
+            out.append(rnd.choice(FILLER))
+    return " ".join(out)
+
+
+LIST_FORMATS = [
+    ("Skills: Python,SQL,Docker,Pandas", {"python", "sql", "docker", "pandas"}),
+    ("Tools - docker;aws; kubernetes.", {"docker", "aws", "kubernetes"}),
+    ("python/django, sql", {"python", "django", "sql"}),
+    ("Experience with C++ | Node.js | machine learning", {"c++", "node.js", "machine learning"}),
+]
+
+
+def list_recall() -> dict:
+    matcher = SkillMatcher(set().union(*(want for _, want in LIST_FORMATS)))
+    found = want_n = 0
+    missed = []
+    for text, want in LIST_FORMATS:
+        got = matcher.find_exact(tokenize(text))
+        found += len(want & got)
+        want_n += len(want)
+        missed += sorted(want - got)
+    return {"list_formats_recall": round(found / want_n, 3), "missed": missed}
+
+
+def legacy_extract(text, base):
+    words = [normalize_token(w) for w in text.split()]
+    grams = set()
+    for n in [1, 2, 3]:
+        for i in range(len(words) - n + 1):
+            grams.add(" ".join(words[i:i + n]).strip())
+    found = set()
+    for g in grams:
+        match, score, _ = process.extractOne(g, list(base))
+        if score >= 90:
+            found.add(match)
+    return found
+
+
+def run(sizes, n_resumes, legacy):
+    report = [list_recall()]
+    for size in sizes:
+        vocab = synthetic_vocab(size)
+        resumes = [synthetic_resume(vocab, seed=i) for i in range(n_resumes)]
+        t0 = time.perf_counter()
+        matcher = SkillMatcher(vocab)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for r in resumes:
+            matcher.match(tokenize(r))
+        elapsed = time.perf_counter() - t0
+        row = {"ontology_size": size, "build_s": round(build, 4),
+               "resumes_per_s": round(n_resumes / elapsed, 2)}
+        if legacy:
+            sample = resumes[: max(1, n_resumes // 10)]
+            t0 = time.perf_counter()
+            for r in sample:
+                legacy_extract(r, set(vocab))
+            row["legacy_resumes_per_s"] = round(len(sample) / (time.perf_counter() - t0), 2)
+        report.append(row)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--resumes", type=int, default=20)
+    ap.add_argument("--legacy", action="store_true")
+    a = ap.parse_args()
+    print(json.dumps(run([int(s) for s in a.sizes.split(",")], a.resumes, a.legacy), indent=2))
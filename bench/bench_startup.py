@@ -0,0 +1,69 @@
+"""Import time and cold start of the API process.
+
+    python -m bench.bench_startup [--modes off,background,eager] [--runs 3]
+
+Each run is a fresh interpreter: time to ``import app.main``, time until the
+first /healthz response (startup hooks included), time until every required
+model is loaded (spaCy only with ANONYMIZE_NER=1), and RSS at each point. ``eager`` matches the old behaviour, where
+both models loaded before the app could answer anything. Schema sync, the
+ingest pipeline and the matrix maintainer are disabled so no database is
+needed.
+"""
+import argparse, json, os, resource, subprocess, sys, time
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child():
+    t0 = time.perf_counter()
+    import app.main as main
+    out = {"import_s": time.perf_counter() - t0, "import_rss_mb": _rss_mb()}
+    from fastapi.testclient import TestClient
+    from app import lazy
+    with TestClient(main.app) as client:  # runs the startup hooks
+        assert client.get("/healthz").status_code == 200
+        out["first_response_s"] = time.perf_counter() - t0
+        out["first_response_rss_mb"] = _rss_mb()
+        if lazy.WARM_MODELS == "off":
+            lazy.warm_up()  # what the first scoring request would pay
+        while not all(m.loaded for m in lazy._registry.values() if m.required):
+            time.sleep(0.01)
+        out["models_ready_s"] = time.perf_counter() - t0
+        out["models_rss_mb"] = _rss_mb()
+        out["models"] = lazy.status()
+    print(json.dumps(out))
+
+
+def run(modes, runs):
+    report = []
+    for mode in modes:
+        env = dict(os.environ, WARM_MODELS=mode, SYNC_SCHEMA_ON_STARTUP="0", INGEST_ENABLED="0",
+                   MATRIX_ENABLED="0")
+        samples = []
+        for _ in range(runs):
+            res = subprocess.run([sys.executable, "-m", "bench.bench_startup", "--child"], env=env,
+                                 capture_output=True, text=True, check=True)
+            samples.append(json.loads(res.stdout.strip().splitlines()[-1]))
+        keys = [k for k in samples[0] if k != "models"]
+        row = {"mode": mode, **{k: round(sorted(s[k] for s in samples)[len(samples) // 2], 3) for k in keys}}
+        row["load_seconds"] = {n: m["load_seconds"] for n, m in samples[-1]["models"].items()}
+        report.append(row)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modes", default="off,background,eager")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.child:
+        child()
+    else:
+        print(json.dumps(run(a.modes.split(","), a.runs), indent=2))
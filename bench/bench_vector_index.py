@@ -0,0 +1,63 @@
+"""Latency and recall@k of VectorIndex: brute force vs IVF.
+
+    python -m bench.bench_vector_index [--sizes 10000,100000] [--k 20] [--queries 200]
+
+Vectors are drawn around random topic centres (resumes cluster by role), then
+unit-normalized like MiniLM output. Recall is measured against the exact top-k.
+"""
+import argparse, json, time
+
+import numpy as np
+
+from app.vector_index import VectorIndex
+
+
+def corpus(n: int, dim: int, topics: int = 64, seed: int = 0):
+    centres = np.random.default_rng(0).standard_normal((topics, dim)).astype(np.float32)
+    rnd = np.random.default_rng(seed)
+    data = centres[rnd.integers(0, topics, n)] + 0.6 * rnd.standard_normal((n, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def pct(xs, p):
+    return round(float(np.percentile(xs, p)) * 1000, 3)
+
+
+def run(sizes, k, n_queries, dim=384):
+    report = []
+    for n in sizes:
+        data = corpus(n, dim)
+        queries = corpus(n_queries, dim, seed=1)
+        exact = VectorIndex(dim, path=None, ivf_min=10 ** 12)
+        ivf = VectorIndex(dim, path=None, ivf_min=0)
+        ids = np.arange(n)
+        for idx in (exact, ivf):
+            idx.rebuild(zip(ids, data))
+        t0 = time.perf_counter()
+        ivf.search(queries[0], k)  # builds the IVF lists
+        build = time.perf_counter() - t0
+        row = {"vectors": n, "k": k, "ivf_build_s": round(build, 2)}
+        truth = []
+        for name, idx in (("exact", exact), ("ivf", ivf)):
+            lat, res = [], []
+            for q in queries:
+                t0 = time.perf_counter()
+                res.append({i for i, _ in idx.search(q, k)})
+                lat.append(time.perf_counter() - t0)
+            if name == "exact":
+                truth = res
+            row[f"{name}_p50_ms"] = pct(lat, 50)
+            row[f"{name}_p95_ms"] = pct(lat, 95)
+            row[f"{name}_recall_at_k"] = round(float(np.mean([len(a & b) / k for a, b in zip(res, truth)])), 4)
+        report.append(row)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--queries", type=int, default=200)
+    a = ap.parse_args()
+    print(json.dumps(run([int(s) for s in a.sizes.split(",")], a.k, a.queries), indent=2))
@@ -0,0 +1,53 @@
+"""Load + cosine throughput: legacy JSON list embeddings vs packed float32 blobs.
+
+    python -m bench.bench_vectors [--rows 20000] [--dim 384]
+
+Uses an in-memory SQLite table holding both representations of the same vectors.
+"""
+import argparse, json, time
+
+import numpy as np
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, create_engine, select
+
+from app.vectors import Vector
+
+
+def run(rows: int, dim: int):
+    engine = create_engine("sqlite://")
+    md = MetaData()
+    t = Table("vecs", md, Column("id", Integer, primary_key=True),
+              Column("as_json", JSON), Column("as_f32", Vector(dim)))
+    md.create_all(engine)
+    rnd = np.random.default_rng(0)
+    data = rnd.standard_normal((rows, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    with engine.begin() as conn:
+        conn.execute(t.insert(), [{"id": i, "as_json": v.tolist(), "as_f32": v} for i, v in enumerate(data)])
+    q = data[0]
+    out = {"rows": rows, "dim": dim}
+    with engine.connect() as conn:
+        out["json_bytes"] = conn.exec_driver_sql("select sum(length(as_json)) from vecs").scalar()
+        out["f32_bytes"] = conn.exec_driver_sql("select sum(length(as_f32)) from vecs").scalar()
+
+        t0 = time.perf_counter()
+        sims = [float(np.clip(np.dot(np.array(v), np.array(q.tolist())), -1, 1))
+                for v in conn.execute(select(t.c.as_json)).scalars()]
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        mat = np.stack(list(conn.execute(select(t.c.as_f32)).scalars()))
+        sims2 = np.clip(mat @ q, -1, 1)
+        packed = time.perf_counter() - t0
+    assert np.allclose(sims, sims2, atol=1e-5)
+    out["json_rows_per_s"] = round(rows / legacy)
+    out["f32_rows_per_s"] = round(rows / packed)
+    out["speedup"] = round(legacy / packed, 2)
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=384)
+    a = ap.parse_args()
+    print(json.dumps(run(a.rows, a.dim), indent=2))
@@ -0,0 +1,150 @@
+"""Synthetic resume / JD corpus built from the skill ontology's vocabulary.
+
+    python -m bench.corpus --out /tmp/corpus [--resumes 50] [--jds 5] [--lines 60] [--formats txt,docx,pdf]
+
+Resumes get a name, email and phone (so anonymization has work), section
+headings, bullets and a random draw of ontology skills and aliases mixed into
+filler text; ``--lines`` controls document size. DOCX and PDF files are
+written by hand (a minimal WordprocessingML zip, a Helvetica text PDF), so no
+writer libraries are needed.
+"""
+import argparse, json, os, random, zipfile
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from bench.bench_skill_matcher import FILLER
+
+FIRST = ["Asha", "Rahul", "Priya", "Vikram", "Neha", "Arjun", "Meera", "Karan", "Divya", "Rohan"]
+LAST = ["Sharma", "Iyer", "Reddy", "Patel", "Gupta", "Nair", "Singh", "Das", "Mehta", "Rao"]
+CITIES = ["Hyderabad", "Pune", "Bangalore", "Delhi", "Chennai", "Mumbai"]
+SECTIONS = ["Summary", "Experience", "Projects", "Skills", "Education", "Certifications"]
+TITLES = ["Software Engineer", "Data Scientist", "Backend Developer", "ML Engineer"]
+
+
+def vocabulary(path: str = "data/skill_ontology.json") -> Dict[str, List[str]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    roles = data["roles"] if isinstance(data.get("roles"), dict) else data
+    must = sorted({s for r in roles.values() for s in r.get("must_have", [])})
+    good = sorted({s for r in roles.values() for s in r.get("good_to_have", [])})
+    return {"must": must, "good": good, "aliases": sorted(data.get("aliases", {})),
+            "roles": {name: r for name, r in roles.items() if isinstance(r, dict)}}
+
+
+def _filler(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(FILLER) for _ in range(words))
+
+
+def resume_lines(vocab: Dict, lines: int, seed: int) -> List[str]:
+    rnd = random.Random(seed)
+    skills = vocab["must"] + vocab["good"] + vocab["aliases"]
+    name = f"{rnd.choice(FIRST)} {rnd.choice(LAST)}"
+    years = rnd.randint(0, 12)
+    out = [name, f"Name: {name}", f"{name.split()[0].lower()}.{seed}@example.com | +91 98{rnd.randint(10000000, 99999999)}",
+           f"{rnd.choice(CITIES)}, India", f"{years} years of experience"]
+    per_section = max(1, (lines - len(out)) // len(SECTIONS))
+    for section in SECTIONS:
+        out.append(section)
+        for _ in range(per_section - 1):
+            picked = ", ".join(rnd.sample(skills, k=min(len(skills), rnd.randint(1, 3))))
+            text = f"{_filler(rnd, rnd.randint(6, 14))} {picked} {_filler(rnd, rnd.randint(2, 6))}"
+            out.append(f"- {text}" if rnd.random() < 0.6 else text)
+    return out[:max(lines, 6)]
+
+
+def jd_fields(vocab: Dict, seed: int, lines: int = 20) -> Dict:
+    rnd = random.Random(10_000 + seed)
+    role = rnd.choice(sorted(vocab["roles"]))
+    must, good = list(vocab["roles"][role].get("must_have", [])), list(vocab["roles"][role].get("good_to_have", []))
+    body = [f"We are hiring a {rnd.choice(TITLES)} in {rnd.choice(CITIES)}.", "Must have: " + ", ".join(must),
+            "Good to have: " + ", ".join(good)]
+    body += [_filler(rnd, 12) for _ in range(max(0, lines - len(body)))]
+    return {"title": f"{rnd.choice(TITLES)} {seed}", "company": f"Company {seed % 7}", "location": rnd.choice(CITIES),
+            "raw_text": "\n".join(body), "must_have": must, "good_to_have": good}
+
+
+def write_txt(path: str, lines: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_docx(path: str, lines: List[str]):
+    # the smallest package docx2txt (and Word) will open: content types, rels, document
+    paras = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(l)}</w:t></w:r></w:p>" for l in lines)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml",
+                   '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/>'
+                   '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                   '</Types>')
+        z.writestr("_rels/.rels",
+                   '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+                   '</Relationships>')
+        z.writestr("word/document.xml",
+                   '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                   f"<w:body>{paras}</w:body></w:document>")
+
+
+def _pdf_str(s: str) -> str:
+    s = s.encode("latin-1", "replace").decode("latin-1")
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, lines: List[str], lines_per_page: int = 60):
+    # minimal hand-written PDF: one Helvetica text stream per page
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objs: List[Optional[str]] = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+                                 "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for rows in pages:
+        body = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_str(r)}) Tj T*" for r in rows) + " ET"
+        objs.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objs)} 0 R "
+                    f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+    out, offsets = [b"%PDF-1.4\n"], []
+    for i, o in enumerate(objs, 1):
+        offsets.append(sum(len(b) for b in out))
+        out.append(f"{i} 0 obj\n{o}\nendobj\n".encode("latin-1"))
+    xref = sum(len(b) for b in out)
+    out.append(f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode())
+    out.extend(f"{off:010d} 00000 n \n".encode() for off in offsets)
+    out.append(f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    with open(path, "wb") as f:
+        f.write(b"".join(out))
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def generate(out_dir: str, resumes: int, jds: int, lines: int, formats: List[str], seed: int = 0,
+             ontology: str = "data/skill_ontology.json") -> Dict:
+    """Write resumes round-robin over ``formats`` plus ``jds.json``; returns the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    vocab = vocabulary(ontology)
+    files = []
+    for i in range(resumes):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(out_dir, f"resume_{i:05d}.{fmt}")
+        WRITERS[fmt](path, resume_lines(vocab, lines, seed + i))
+        files.append({"path": path, "format": fmt})
+    jd_list = [jd_fields(vocab, seed + j) for j in range(jds)]
+    with open(os.path.join(out_dir, "jds.json"), "w", encoding="utf-8") as f:
+        json.dump(jd_list, f, indent=1)
+    return {"resumes": files, "jds": jd_list}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--resumes", type=int, default=50)
+    ap.add_argument("--jds", type=int, default=5)
+    ap.add_argument("--lines", type=int, default=60, help="lines per resume (document size)")
+    ap.add_argument("--formats", default="txt,docx,pdf")
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+    m = generate(a.out, a.resumes, a.jds, a.lines, a.formats.split(","), a.seed)
+    print(json.dumps({"out": a.out, "resumes": len(m["resumes"]), "jds": len(m["jds"])}, indent=2))
@@ -24,7 +24,7 @@ def safe_post(url, **kwargs):
 
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "Upload Resume", "Evaluate (Simulated)", "Matrix (Simulated)",
-    "What-if Simulator (Simulated)", "Placement Dashboard (Simulated)"
+    "What-if Simulator", "Placement Dashboard (Simulated)"
 ])
 
 # -------------------------
@@ -89,25 +89,51 @@ with tab3:
     })
 
 # -------------------------
-# Tab 4: What-if Simulator (Simulated)
+# Tab 4: What-if Simulator
 # -------------------------
+def _skill_list(s):
+    return [x.strip() for x in s.split(",") if x.strip()]
+
 with tab4:
-    st.subheader("🔮 What-if Skill Simulator (Simulated)")
-    st.caption("Add hypothetical skills to see how the score could change.")
+    st.subheader("🔮 What-if Skill Simulator")
+    st.caption("Re-rank a JD's candidates under other weights or must-have skills, or add hypothetical skills to one resume.")
+    wi_jd = st.number_input("JD id", min_value=1, step=1, key="whatif_jd")
+    wi_resume = st.number_input("Resume id (0 = whole shortlist only)", min_value=0, step=1, key="whatif_resume")
     add_skills = st.text_input("Pretend I have these skills (comma-separated)")
+    add_must = st.text_input("Also require these JD skills (comma-separated)")
+    remove_must = st.text_input("Stop requiring these skills (comma-separated)")
     weights_hard = st.slider("Weight: Hard", 0.0, 1.0, 0.55, 0.05)
     weights_soft = st.slider("Weight: Soft", 0.0, 1.0, 0.35, 0.05)
     weights_ats = st.slider("Weight: ATS", 0.0, 1.0, 0.10, 0.05)
 
     if st.button("Simulate"):
-        st.metric("Baseline Score", "72.5")
-        st.metric("Simulated Score", "84.3")
-
-        st.subheader("Score Contribution Breakdown")
-        fig, ax = plt.subplots()
-        ax.pie([55, 35, 10], labels=["Hard", "Soft", "ATS"], autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")
-        st.pyplot(fig)
+        payload = {"jd_id": int(wi_jd), "weights": {"hard": weights_hard, "soft": weights_soft, "ats": weights_ats},
+                   "add_must": _skill_list(add_must), "remove_must": _skill_list(remove_must), "top_k": 20}
+        if wi_resume:
+            payload.update(resume_id=int(wi_resume), assume_skills=_skill_list(add_skills))
+        data, err = safe_post(f"{BACKEND}/evaluate/rescore", json=payload)
+        if err:
+            st.error(f"❌ Simulation failed: {err}")
+        else:
+            me = data.get("candidate")
+            if me:
+                st.metric("Baseline Score", f"{me['baseline_score']:.1f}", help=f"rank {me['baseline_rank']}")
+                st.metric("Simulated Score", f"{me['score']:.1f}", delta=f"{me['score'] - me['baseline_score']:+.1f}")
+                st.write(f"Rank {me['baseline_rank']} → {me['rank']} of {data['candidates']} ({me['verdict']})")
+            if data.get("ignored_skills"):
+                st.warning("Not in this JD's skill lists, ignored: " + ", ".join(data["ignored_skills"]))
+            st.caption(f"{data['candidates']} candidates re-scored in {data['took_ms']} ms")
+            if data.get("pending"):
+                st.info(f"{data['pending']} more candidates are still being scored; simulate again shortly to include them.")
+            st.dataframe([{k: r[k] for k in ("rank", "resume_id", "score", "verdict", "baseline_rank", "baseline_score")}
+                          for r in data.get("items", [])])
+
+            st.subheader("Score Contribution Breakdown")
+            w = data["weights"]
+            fig, ax = plt.subplots()
+            ax.pie([w["hard"], w["soft"], w["ats"]], labels=["Hard", "Soft", "ATS"], autopct="%1.1f%%", startangle=90)
+            ax.axis("equal")
+            st.pyplot(fig)
 
 # -------------------------
 # Tab 5: Placement Dashboard (Simulated)
@@ -0,0 +1,29 @@
+# gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is imported once in the master and the required models are loaded there
+# before forking, so every worker shares their weights copy-on-write instead
+# of loading its own copy. Schema sync also runs once here rather than in
+# every worker.
+import gc, os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_MODELS", "1") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# workers still run the (cheap) dummy inference in the background after fork
+raw_env = ["SYNC_SCHEMA_ON_STARTUP=0"] if preload_app else []
+
+
+def on_starting(server):
+    if not preload_app:
+        return
+    from app.db import engine
+    from app.migrate import sync_schema
+    from app import lazy
+    sync_schema(engine)
+    # weights only: no inference (and so no torch/OpenMP threads) before fork
+    lazy.warm_up(infer=False)
+    # keep the loaded objects out of the collector so it doesn't touch (and
+    # un-share) their pages in the workers
+    gc.freeze()
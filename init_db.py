@@ -1,7 +1,7 @@
 # init_db.py
 
-from app.models import Base
 from app.db import engine
+from app.migrate import sync_schema
 
-Base.metadata.create_all(bind=engine)
+sync_schema(engine)
 print("✅ Tables created successfully!")